@@ -0,0 +1,129 @@
+"""Persistent cache of extraction results keyed by HTML content hash and encoding."""
+import json
+import sqlite3
+import time
+from typing import Optional
+
+from .extract import EXTRACTOR_VERSION, Extraction, Section
+
+# Extraction fields that are only computed on request, in table column order
+OPTIONAL_COLUMNS = ('sections', 'document')
+
+class ExtractionCache:
+    """SQLite-backed map from (HTML hash and encoding, extractor version) to an Extraction.
+
+    Keys come from ``extraction_key``, since the same bytes decoded with
+    another encoding extract differently. Entries written by another
+    extractor version are dropped when the cache is opened. Once the stored
+    text exceeds ``max_bytes``, the least recently used entries are evicted.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 256 * 1024 * 1024, version: int = EXTRACTOR_VERSION):
+        """Open (or create) the cache database at ``path``."""
+        self.path = path
+        self.max_bytes = max_bytes
+        self.version = version
+        self.hits = 0
+        self.misses = 0
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS extractions ("
+            " html_hash TEXT NOT NULL,"
+            " version INTEGER NOT NULL,"
+            " title TEXT,"
+            " content TEXT NOT NULL,"
+            " links TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " last_used REAL NOT NULL,"
+            " sections TEXT,"
+            " document TEXT,"
+            " PRIMARY KEY (html_hash, version))"
+        )
+        # Caches created before the optional outputs were stored lack their columns
+        columns = [row[1] for row in self.db.execute("PRAGMA table_info(extractions)")]
+        for column in OPTIONAL_COLUMNS:
+            if column not in columns:
+                self.db.execute(f"ALTER TABLE extractions ADD COLUMN {column} TEXT")
+        self.db.execute("CREATE INDEX IF NOT EXISTS extractions_lru ON extractions (last_used)")
+        self.db.execute("DELETE FROM extractions WHERE version != ?", (version,))
+        self.db.commit()
+        self.total_bytes = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM extractions").fetchone()[0]
+
+    def __enter__(self):
+        """Context manager entry."""
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit."""
+        self.close()
+
+    def __len__(self) -> int:
+        """Return the number of cached extractions."""
+        return self.db.execute("SELECT COUNT(*) FROM extractions").fetchone()[0]
+
+    def close(self) -> None:
+        """Commit pending writes and close the database."""
+        self.db.commit()
+        self.db.close()
+
+    def get(self, html_hash: str, sections: bool = False, structured: bool = False) -> Optional[Extraction]:
+        """Return the cached extraction for an HTML hash, if present.
+
+        With ``sections`` or ``structured`` set, entries stored without those
+        outputs count as misses.
+        """
+        row = self.db.execute(
+            "SELECT title, content, links, sections, document FROM extractions WHERE html_hash = ? AND version = ?",
+            (html_hash, self.version),
+        ).fetchone()
+        if row is None or (sections and row[3] is None) or (structured and row[4] is None):
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.db.execute(
+            "UPDATE extractions SET last_used = ? WHERE html_hash = ? AND version = ?",
+            (time.time(), html_hash, self.version),
+        )
+        title, content, links, stored_sections, document = row
+        if stored_sections is not None:
+            stored_sections = [Section(headings, text) for headings, text in json.loads(stored_sections)]
+        if document is not None:
+            document = json.loads(document)
+        return Extraction(title, content, json.loads(links), stored_sections, document)
+
+    def put(self, html_hash: str, extraction: Extraction) -> None:
+        """Store an extraction and evict old entries if over the size limit."""
+        links = json.dumps(extraction.links, ensure_ascii=False)
+        sections, document = (
+            None if value is None else json.dumps(value, ensure_ascii=False)
+            for value in (extraction.sections, extraction.document)
+        )
+        size = (len(extraction.content) + len(extraction.title or '') + len(links)
+                + len(sections or '') + len(document or ''))
+        previous = self.db.execute(
+            "SELECT size FROM extractions WHERE html_hash = ? AND version = ?",
+            (html_hash, self.version),
+        ).fetchone()
+        self.db.execute(
+            "INSERT OR REPLACE INTO extractions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (html_hash, self.version, extraction.title, extraction.content, links, size, time.time(),
+             sections, document),
+        )
+        self.total_bytes += size - (previous[0] if previous else 0)
+        if self.total_bytes > self.max_bytes:
+            self.evict()
+        self.db.commit()
+
+    def evict(self) -> None:
+        """Drop least recently used entries until the cache is under 90% of its limit."""
+        target = self.max_bytes * 0.9
+        rows = self.db.execute("SELECT html_hash, size FROM extractions ORDER BY last_used").fetchall()
+        evicted = []
+        for html_hash, size in rows:
+            if self.total_bytes <= target:
+                break
+            evicted.append((html_hash,))
+            self.total_bytes -= size
+        self.db.executemany("DELETE FROM extractions WHERE html_hash = ?", evicted)
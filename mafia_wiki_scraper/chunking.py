@@ -0,0 +1,116 @@
+"""Heading-aware chunking of extracted pages for retrieval pipelines."""
+import hashlib
+import json
+import os
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from .extract import Extraction, Section
+
+DEFAULT_MAX_WORDS = 300
+
+class Chunk(NamedTuple):
+    """One retrieval chunk with a stable ID and precomputed sizes."""
+    id: str
+    url: str
+    headings: List[str]
+    position: int
+    text: str
+    hash: str
+    chars: int
+    words: int
+
+def chunk_id(url: str, headings: List[str], occurrence: int, part: int) -> str:
+    """Return an ID that depends on where a chunk sits, not on its text.
+
+    Editing a section keeps its chunk IDs, and adding or removing other
+    sections does not shift them, so downstream stores can update in place.
+    """
+    key = "\0".join([url, *headings, str(occurrence), str(part)])
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+
+def split_words(text: str, max_words: int) -> List[str]:
+    """Split text into pieces of at most ``max_words`` words."""
+    words = text.split()
+    return [' '.join(words[i:i + max_words]) for i in range(0, len(words), max_words)] or ['']
+
+def chunk_sections(url: str, sections: List[Section], max_words: int = DEFAULT_MAX_WORDS) -> List[Chunk]:
+    """Turn a page's sections into chunks, splitting sections longer than ``max_words``."""
+    chunks = []
+    seen: Dict[Tuple[str, ...], int] = {}
+    for section in sections:
+        path = tuple(section.headings)
+        occurrence = seen.get(path, 0)
+        seen[path] = occurrence + 1
+        for part, text in enumerate(split_words(section.text, max_words)):
+            chunks.append(Chunk(
+                chunk_id(url, section.headings, occurrence, part),
+                url,
+                section.headings,
+                len(chunks),
+                text,
+                hashlib.sha256(text.encode('utf-8')).hexdigest(),
+                len(text),
+                len(text.split()),
+            ))
+    return chunks
+
+def read_chunks(path: str) -> Iterator[Dict]:
+    """Yield the chunk records of a JSONL chunk file."""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+class ChunkWriter:
+    """Write chunks to a JSONL file, one record per line.
+
+    The file is replaced atomically on close. Hashes from the previous file
+    at the same path are compared so each run reports how many chunks are
+    new, changed, unchanged or removed.
+    """
+
+    def __init__(self, path: str, max_words: int = DEFAULT_MAX_WORDS):
+        """Open a temporary file next to ``path`` and load the previous hashes."""
+        self.path = path
+        self.max_words = max_words
+        self.previous: Dict[str, str] = {}
+        if os.path.exists(path):
+            self.previous = {record['id']: record['hash'] for record in read_chunks(path)}
+        self.stats = {'new': 0, 'changed': 0, 'unchanged': 0}
+        self.seen = set()
+        self._tmp_path = f"{path}.tmp"
+        self._file = open(self._tmp_path, 'w', encoding='utf-8')
+
+    def __enter__(self):
+        """Context manager entry."""
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit."""
+        self.close()
+
+    def add(self, url: str, extraction: Extraction) -> None:
+        """Chunk one extracted page and write its chunks."""
+        self.write(chunk_sections(url, extraction.sections or [], self.max_words))
+
+    def write(self, chunks: List[Chunk]) -> None:
+        """Write chunks and count them against the previous file."""
+        for chunk in chunks:
+            previous_hash: Optional[str] = self.previous.get(chunk.id)
+            if previous_hash is None:
+                self.stats['new'] += 1
+            elif previous_hash == chunk.hash:
+                self.stats['unchanged'] += 1
+            else:
+                self.stats['changed'] += 1
+            self.seen.add(chunk.id)
+            self._file.write(json.dumps(chunk._asdict(), ensure_ascii=False))
+            self._file.write("\n")
+
+    def close(self) -> None:
+        """Finish the file and replace the previous one."""
+        if self._file.closed:
+            return
+        self._file.close()
+        os.replace(self._tmp_path, self.path)
+        self.stats['removed'] = len(set(self.previous) - self.seen)
@@ -2,59 +2,683 @@
 import argparse
 import asyncio
 import os
+import re
+import time
+from contextlib import AsyncExitStack, asynccontextmanager
 from datetime import datetime
 import json
-from typing import List, Dict
+from typing import AsyncIterator, List, Dict, Optional, Tuple, Union
+from urllib.parse import urlparse
 
-from .scraper import WikiScraper
+from .cache import ExtractionCache
+from .chunking import ChunkWriter
+from .gitbook import DEFAULT_API_URL, SOURCES, GitBookScraper
+from .columnar import COLUMNAR_FORMATS, ColumnarWriter
+from .history import HistoryStore, parse_when
+from .linkcheck import DEFAULT_CHECK_RATE, LinkChecker, format_report
+from .parallel import crawl_parallel, resolve_base_url
+from .pipeline import DEFAULT_QUEUE_SIZE, EXECUTORS
+from .politeness import HostScheduler
+from .profiling import NULL_PROFILER, PROFILE_MODES, NullProfiler, PhaseProfiler
+from .redirects import RedirectMap
+from .scraper import WikiScraper, create_session
+from .search import InvertedIndex
+from .server import latest_snapshot, serve
+from .snapshot import SNAPSHOT_EXTENSION, SnapshotReader, is_snapshot, write_snapshot
+from .sinks import COMPRESSIONS, TEXT_FORMATS, ShardedWriter, parse_size
+from .tracing import NULL_TRACER, NullTracer, Tracer
+from .warc import ReplaySession, WarcWriter
+from .watch import Watcher, parse_duration, write_json_atomic
 
-def save_output(data: List[Dict[str, str]], output_format: str) -> str:
-    """Save the scraped data to a file in the specified format."""
+DEFAULT_URL = "https://mafiagame.gitbook.io/bnb-mafia"
+
+def output_path(output_format: str, name: Optional[str] = None) -> str:
+    """Return the dated output file path for the given format and site name."""
     output_dir = "output"
     os.makedirs(output_dir, exist_ok=True)
     current_date = datetime.now().strftime("%Y-%m-%d")
-    
-    if output_format == 'json':
-        output_file = os.path.join(output_dir, f"mafia_game_wiki_{current_date}.json")
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=4)
-    else:
-        output_file = os.path.join(output_dir, f"mafia_game_wiki_{current_date}.txt")
-        with open(output_file, 'w', encoding='utf-8') as f:
+    stem = f"{name}_{current_date}" if name else f"mafia_game_wiki_{current_date}"
+    extension = SNAPSHOT_EXTENSION if output_format == 'snapshot' else output_format
+    return os.path.join(output_dir, f"{stem}.{extension}")
+
+def save_output(data: List[Dict[str, str]], output_format: str, compression: Optional[str] = None,
+                shard_size: Optional[int] = None, name: Optional[str] = None) -> str:
+    """Save the scraped data to a file in the specified format.
+
+    With ``compression`` or ``shard_size`` set, a manifest is written next to
+    the output. When sharding, the manifest path is returned instead of a
+    single data file. Only json and txt output can be compressed or sharded.
+    """
+    if output_format not in TEXT_FORMATS and (compression or shard_size):
+        raise ValueError(f"{output_format} output cannot be compressed or sharded")
+    output_file = output_path(output_format, name)
+
+    if output_format in COLUMNAR_FORMATS:
+        with ColumnarWriter(output_file, output_format) as writer:
             for page in data:
-                f.write(f"URL: {page['url']}\n")
-                f.write(f"Title: {page['title']}\n")
-                f.write(f"Content:\n{page['content']}\n\n")
-                f.write("-" * 80 + "\n\n")
-    
-    return output_file
+                writer.write(page)
+        return output_file
+    if output_format == 'snapshot':
+        write_snapshot(data, output_file)
+        return output_file
+
+    if shard_size:
+        # Sorting keeps each shard's URL range disjoint from the others
+        data = sorted(data, key=lambda page: page['url'])
+    with ShardedWriter(output_file, output_format, compression, shard_size) as writer:
+        for page in data:
+            writer.write(page)
+    if shard_size:
+        return writer.manifest_path
+    return os.path.join(os.path.dirname(output_file), writer.shards[0]['file'])
+
+async def stream_columnar(scraper: WikiScraper, output_format: str, name: Optional[str] = None,
+                         tracer: Union[Tracer, NullTracer] = NULL_TRACER,
+                         profiler: Union[PhaseProfiler, NullProfiler] = NULL_PROFILER) -> Tuple[int, str]:
+    """Crawl and write pages to a columnar file as each fetch batch completes."""
+    output_file = output_path(output_format, name)
+    with profiler.phase('discovery'):
+        async for _ in scraper.get_all_internal_links():
+            pass
+
+    written = 0
+    with profiler.phase('fetching'), ColumnarWriter(output_file, output_format) as writer:
+        async for _ in scraper.fetch_pages_with_progress():
+            with profiler.phase('output'), tracer.span('write', pages=len(scraper.results) - written):
+                for page in scraper.results[written:]:
+                    writer.write(page)
+            written = len(scraper.results)
+    return written, output_file
+
+def output_options(args: argparse.Namespace) -> Dict:
+    """Return the compression and sharding keyword arguments for save_output."""
+    options = {}
+    if getattr(args, 'compress', None):
+        options['compression'] = args.compress
+    if getattr(args, 'shard_size', None):
+        options['shard_size'] = parse_size(args.shard_size)
+    return options
+
+def site_name(url: str) -> str:
+    """Return a filesystem-safe name for a site, e.g. ``bnb-mafia.gitbook.io_bnb-mafia``."""
+    parsed = urlparse(url)
+    return re.sub(r'[^A-Za-z0-9.-]+', '_', f"{parsed.netloc}{parsed.path}").strip('_')
+
+def load_sites(path: str) -> List[str]:
+    """Read start URLs from a JSON config file.
+
+    The file holds either a list of URLs or ``{"sites": [{"url": ...}, ...]}``.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    sites = config['sites'] if isinstance(config, dict) else config
+    return [site['url'] if isinstance(site, dict) else site for site in sites]
+
+def start_urls(args: argparse.Namespace) -> List[str]:
+    """Collect the start URLs from ``--url`` flags and ``--config``."""
+    urls = args.url if isinstance(args.url, list) else [args.url] if args.url else []
+    if getattr(args, 'config', None):
+        urls = urls + load_sites(args.config)
+    return list(dict.fromkeys(urls)) or [DEFAULT_URL]
+
+def index_path(name: Optional[str] = None) -> str:
+    """Return the path of the search index kept next to a site's output."""
+    return os.path.join("output", f"{name or 'mafia_game_wiki'}.idx")
+
+HISTORY_PATH = os.path.join("output", "history.sqlite")
+# Hidden, so it is never mistaken for a JSON snapshot of the output directory
+REDIRECTS_PATH = os.path.join("output", ".redirects.json")
+
+def record_history(args: argparse.Namespace, pages: List, site: str, prefix: str = "") -> None:
+    """Add a finished crawl to the ``--history`` store."""
+    path = getattr(args, 'history', None)
+    if not path or not pages:
+        return
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with HistoryStore(path) as history:
+        stats = history.add_snapshot(pages, site)
+    print(f"{prefix}History saved to: {path} ({stats['new']} new, {stats['changed']} changed, "
+          f"{stats['unchanged']} unchanged, {stats['removed']} removed)")
+
+def chunks_path(name: Optional[str] = None) -> str:
+    """Return the path of the JSONL chunk file kept next to a site's output."""
+    return os.path.join("output", f"{name or 'mafia_game_wiki'}.chunks.jsonl")
+
+async def scrape_site(scraper: WikiScraper, args: argparse.Namespace, name: Optional[str] = None,
+                      tracer: Union[Tracer, NullTracer] = NULL_TRACER,
+                      profiler: Union[PhaseProfiler, NullProfiler] = NULL_PROFILER) -> None:
+    """Crawl one site and write its output file."""
+    prefix = f"[{name}] " if name else ""
+    index = None
+    chunk_writer = None
+    if getattr(args, 'index', False) or getattr(args, 'chunks', False):
+        os.makedirs("output", exist_ok=True)
+    if getattr(args, 'index', False):
+        index = InvertedIndex.open(index_path(name))
+        scraper.page_callbacks.append(index.add_page)
+    if getattr(args, 'chunks', False):
+        chunk_writer = ChunkWriter(chunks_path(name))
+        scraper.sections = True
+        scraper.extraction_callbacks.append(chunk_writer.add)
+
+    removed = 0
+    try:
+        await crawl_site(scraper, args, name, prefix, tracer, profiler)
+        if index is not None and scraper.results:
+            # The crawl finished, so pages it did not find are gone from the site
+            removed = index.retain(page['url'] for page in scraper.results)
+    finally:
+        if index is not None:
+            with profiler.phase('output'), tracer.span('write index'):
+                index.save(index_path(name))
+            print(f"{prefix}Search index saved to: {index_path(name)} ({len(index)} pages, {removed} removed)")
+        if chunk_writer is not None:
+            chunk_writer.close()
+            stats = chunk_writer.stats
+            print(f"{prefix}Chunks saved to: {chunks_path(name)} ({stats['new']} new, {stats['changed']} changed, "
+                  f"{stats['unchanged']} unchanged, {stats['removed']} removed)")
+
+async def crawl_site(scraper: WikiScraper, args: argparse.Namespace, name: Optional[str], prefix: str,
+                     tracer: Union[Tracer, NullTracer] = NULL_TRACER,
+                     profiler: Union[PhaseProfiler, NullProfiler] = NULL_PROFILER) -> None:
+    """Run the crawl for one site and save its pages in the requested format."""
+    if args.format in COLUMNAR_FORMATS:
+        count, output_file = await stream_columnar(scraper, args.format, name, tracer, profiler)
+        print(f"{prefix}Scraped {count} pages")
+        print(f"{prefix}Data saved to: {output_file}")
+        record_history(args, scraper.results, scraper.base_url, prefix)
+        return
+
+    all_data = await scraper.scrape_all_pages()
+
+    if all_data:
+        options = output_options(args)
+        if name:
+            options['name'] = name
+        with profiler.phase('output'), tracer.span('write', pages=len(all_data)):
+            output_file = save_output(all_data, args.format, **options)
+        print(f"{prefix}Scraped {len(all_data)} pages")
+        print(f"{prefix}Data saved to: {output_file}")
+        record_history(args, all_data, scraper.base_url, prefix)
+    else:
+        print(f"{prefix}No data was scraped. Please check the URL and try again.")
+
+def open_tracer(args: argparse.Namespace) -> Union[Tracer, NullTracer]:
+    """Return a tracer if ``--trace`` was given, otherwise the no-op tracer."""
+    return Tracer() if getattr(args, 'trace', None) else NULL_TRACER
+
+def save_trace(tracer: Union[Tracer, NullTracer], args: argparse.Namespace) -> None:
+    """Export a recorded trace to the ``--trace`` file."""
+    if tracer.enabled:
+        tracer.export(args.trace)
+        print(f"Trace saved to: {args.trace} ({len(tracer.events)} events)")
+
+def open_profiler(args: argparse.Namespace) -> Union[PhaseProfiler, NullProfiler]:
+    """Return a phase profiler if ``--profile`` was given, otherwise the no-op profiler."""
+    mode = getattr(args, 'profile', None)
+    if not mode:
+        return NULL_PROFILER
+    return PhaseProfiler(mode, getattr(args, 'profile_dir', None) or os.path.join("output", "profile"))
+
+@asynccontextmanager
+async def open_scrapers(args: argparse.Namespace, urls: List[str],
+                        tracer: Union[Tracer, NullTracer] = NULL_TRACER,
+                        profiler: Union[PhaseProfiler, NullProfiler] = NULL_PROFILER
+                        ) -> AsyncIterator[List[WikiScraper]]:
+    """Create one scraper per start URL sharing a session, scheduler, cache and archive.
+
+    Sites get names (used for log prefixes and output files) only when more
+    than one is crawled.
+    """
+    multi_site = len(urls) > 1
+    replay = getattr(args, 'replay', None)
+    if replay:
+        session = ReplaySession(replay)
+    elif multi_site:
+        session = create_session(5 * len(urls), limit_per_host=5,
+                                 trace_configs=tracer.trace_configs())
+    else:
+        session = None
+    warc_writer = WarcWriter(args.warc) if getattr(args, 'warc', None) else None
+    # A replayed archive holds the URLs as first requested, so don't skip its redirects
+    redirects = RedirectMap(None if replay else getattr(args, 'redirects', None))
+    cache = ExtractionCache(args.cache, parse_size(args.cache_size)) if getattr(args, 'cache', None) else None
+    # Replays never touch the network, so politeness pacing and robots.txt do not apply
+    scheduler = None if replay else HostScheduler(
+        rate=getattr(args, 'rate', 5.0),
+        respect_robots=not getattr(args, 'ignore_robots', False),
+    )
+    scraper_class, source_options = WikiScraper, {}
+    if getattr(args, 'source', 'html') == 'gitbook':
+        scraper_class = GitBookScraper
+        source_options = {
+            'api_url': getattr(args, 'gitbook_api', None) or DEFAULT_API_URL,
+            'space': getattr(args, 'gitbook_space', None),
+            'token': getattr(args, 'gitbook_token', None),
+        }
+
+    try:
+        async with AsyncExitStack() as stack:
+            scrapers = []
+            for url in urls:
+                scrapers.append(await stack.enter_async_context(scraper_class(
+                    url, session=session, warc_writer=warc_writer, cache=cache,
+                    scheduler=scheduler, name=site_name(url) if multi_site else None,
+                    structured=getattr(args, 'structured', False), tracer=tracer, profiler=profiler,
+                    redirects=redirects, max_page_size=parse_size(getattr(args, 'max_page_size', '10MB')),
+                    parse_executor=getattr(args, 'parse_executor', 'loop'),
+                    parse_workers=getattr(args, 'parse_workers', 1),
+                    dedup=getattr(args, 'dedup', False),
+                    queue_size=getattr(args, 'queue_size', DEFAULT_QUEUE_SIZE),
+                    **source_options,
+                )))
+            yield scrapers
+    finally:
+        if session is not None:
+            await session.close()
+        if warc_writer:
+            warc_writer.close()
+        redirects.save()
+        if cache:
+            print(f"Extraction cache: {cache.hits} hits, {cache.misses} misses")
+            cache.close()
+
+
+async def run_workers(args: argparse.Namespace, url: str) -> None:
+    """Crawl one site with several worker processes and save the merged pages."""
+    workers = args.workers
+    unsupported = [option for option in ('warc', 'replay', 'cache', 'chunks', 'trace', 'profile')
+                   if getattr(args, option, None)]
+    if getattr(args, 'source', 'html') != 'html':
+        unsupported.append('source')
+    if unsupported:
+        print(f"--workers cannot be combined with {', '.join('--' + option for option in unsupported)}")
+        return
+
+    print(f"Starting scrape from: {url} with {workers} worker processes")
+    os.makedirs("output", exist_ok=True)
+    options = {
+        # The per-host rate is a total across all workers
+        'rate': getattr(args, 'rate', 5.0) / workers,
+        'respect_robots': not getattr(args, 'ignore_robots', False),
+        'structured': getattr(args, 'structured', False),
+        'max_page_size': parse_size(getattr(args, 'max_page_size', '10MB')),
+        'redirects': getattr(args, 'redirects', None),
+    }
+    # Resolved here rather than in crawl_parallel, so history is keyed by the same site as a single-process crawl
+    redirects = RedirectMap(options['redirects'])
+    url = await resolve_base_url(url, redirects, options['rate'], options['respect_robots'])
+    redirects.save()
+    loop = asyncio.get_running_loop()
+    pages = await loop.run_in_executor(
+        None, lambda: crawl_parallel(url, workers, "output", resolve=False, **options))
+    if not pages:
+        print("No data was scraped. Please check the URL and try again.")
+        return
+
+    output_file = save_output(pages, args.format, **output_options(args))
+    print(f"Scraped {len(pages)} pages")
+    print(f"Data saved to: {output_file}")
+    record_history(args, pages, url)
+    if getattr(args, 'index', False):
+        index = InvertedIndex.open(index_path())
+        for page in pages:
+            index.add_page(page)
+        removed = index.retain(page['url'] for page in pages)
+        index.save(index_path())
+        print(f"Search index saved to: {index_path()} ({len(index)} pages, {removed} removed)")
 
 async def run_scraper(args: argparse.Namespace) -> None:
-    """Run the scraper with the provided arguments."""
-    start_url = args.url or "https://mafiagame.gitbook.io/bnb-mafia"
-    
-    async with WikiScraper(start_url) as scraper:
-        print(f"Starting scrape from: {start_url}")
-        all_data = await scraper.scrape_all_pages()
-        
-        if all_data:
-            output_file = save_output(all_data, args.format)
-            print(f"Scraped {len(all_data)} pages")
-            print(f"Data saved to: {output_file}")
+    """Run the scraper with the provided arguments.
+
+    Several start URLs are crawled concurrently over one shared connection
+    pool, DNS cache and host scheduler, each writing its own output file.
+    """
+    urls = start_urls(args)
+    if getattr(args, 'workers', 1) > 1:
+        if len(urls) > 1:
+            print("--workers crawls one site at a time; pass a single --url.")
+            return
+        await run_workers(args, urls[0])
+        return
+
+    multi_site = len(urls) > 1
+    names = [site_name(url) if multi_site else None for url in urls]
+    replay = getattr(args, 'replay', None)
+    tracer = open_tracer(args)
+    profiler = open_profiler(args)
+    if profiler.enabled and multi_site:
+        print("--profile measures one crawl at a time; crawl a single site to profile it.")
+        return
+    profiler.start()
+
+    async with open_scrapers(args, urls, tracer, profiler) as scrapers:
+        for url, name in zip(urls, names):
+            prefix = f"[{name}] " if name else ""
+            if replay:
+                print(f"{prefix}Replaying {url} from: {replay}")
+            else:
+                print(f"{prefix}Starting scrape from: {url}")
+
+        results = await asyncio.gather(
+            *(scrape_site(scraper, args, name, tracer, profiler) for scraper, name in zip(scrapers, names)),
+            return_exceptions=multi_site,
+        )
+        for name, result in zip(names, results):
+            if isinstance(result, Exception):
+                print(f"[{name}] Failed: {str(result)}")
+    save_trace(tracer, args)
+    if profiler.enabled:
+        print(profiler.close())
+
+async def run_watch(args: argparse.Namespace) -> None:
+    """Keep the output snapshot of each site up to date until interrupted."""
+    urls = start_urls(args)
+    interval = parse_duration(args.interval)
+    tracer = open_tracer(args)
+
+    try:
+        await watch_sites(args, urls, interval, tracer)
+    finally:
+        save_trace(tracer, args)
+
+async def watch_sites(args: argparse.Namespace, urls: List[str], interval: float,
+                      tracer: Union[Tracer, NullTracer]) -> None:
+    """Run one watcher per site until interrupted."""
+    async with open_scrapers(args, urls, tracer) as scrapers:
+        watchers = []
+        for scraper in scrapers:
+            # Explicit paths only apply to a single site; several sites get one file each
+            output_file = os.path.join("output", f"{scraper.name or 'mafia_game_wiki'}.json")
+            status_file = os.path.join("output", f"{scraper.name or 'watch'}.status.json")
+            if len(scrapers) == 1:
+                output_file = args.output or output_file
+                status_file = args.status_file or status_file
+            watchers.append(Watcher(scraper, output_file, interval, status_file=status_file))
+            print(f"Watching {scraper.base_url} every {args.interval}, writing {output_file}")
+        await asyncio.gather(*(watcher.run() for watcher in watchers))
+
+async def run_check_links(args: argparse.Namespace) -> None:
+    """Check every link on each site and report broken links, redirects and slow endpoints."""
+    urls = start_urls(args)
+    session = create_session(args.concurrency, limit_per_host=args.per_host)
+    scheduler = HostScheduler(
+        rate=getattr(args, 'rate', DEFAULT_CHECK_RATE),
+        respect_robots=not getattr(args, 'ignore_robots', False),
+    )
+    reports = {}
+    try:
+        for url in urls:
+            # A fresh redirect map, so a redirecting start URL is reported rather than skipped
+            async with WikiScraper(url, session=session, max_concurrent=args.concurrency, scheduler=scheduler,
+                                   redirects=RedirectMap(), max_page_size=parse_size(args.max_page_size)) as scraper:
+                checker = LinkChecker(scraper, external=args.external, concurrency=args.concurrency,
+                                      timeout=args.timeout)
+                report = await checker.run()
+            if len(urls) > 1:
+                print(f"=== {url} ===")
+            print(format_report(report, args.slow))
+            reports[url] = report.to_dict(args.slow)
+    finally:
+        await session.close()
+    if args.output:
+        write_json_atomic(args.output, reports)
+        print(f"Report saved to: {args.output}")
+
+async def run_serve(args: argparse.Namespace) -> None:
+    """Serve the latest (or the given) snapshot over HTTP until interrupted."""
+    snapshot = args.snapshot or latest_snapshot()
+    if not snapshot:
+        print("No snapshot found. Run a scrape with --format json first or pass --snapshot.")
+        return
+    await serve(snapshot, args.host, args.port, parse_duration(args.reload_interval))
+
+def run_search(args: argparse.Namespace) -> None:
+    """Print the best matching pages for a query."""
+    path = args.index or index_path()
+    if not os.path.exists(path):
+        print(f"No search index at {path}. Scrape with --index first.")
+        return
+    index = InvertedIndex.load(path)
+    start = time.perf_counter()
+    hits = index.search(" ".join(args.query), args.limit)
+    elapsed = (time.perf_counter() - start) * 1000
+    for hit in hits:
+        print(f"{hit.score:6.2f}  {hit.title}\n        {hit.url}")
+    print(f"{len(hits)} results from {len(index)} pages in {elapsed:.1f} ms")
+
+def run_show(args: argparse.Namespace) -> None:
+    """Print one page from a snapshot, or list the URLs it contains."""
+    if not is_snapshot(args.snapshot):
+        print(f"{args.snapshot} is not a snapshot file. Scrape with --format snapshot to create one.")
+        return
+    with SnapshotReader(args.snapshot) as reader:
+        if not args.page_url:
+            for url in reader.urls():
+                print(url)
+            return
+        page = reader.get(args.page_url)
+        if page is None:
+            print(f"No page for {args.page_url} in {args.snapshot}")
         else:
-            print("No data was scraped. Please check the URL and try again.")
+            print(json.dumps(page, ensure_ascii=False, indent=4))
+
+def run_history(args: argparse.Namespace) -> None:
+    """List every stored version of a page."""
+    if not os.path.exists(args.store):
+        print(f"No history at {args.store}. Scrape with --history first.")
+        return
+    with HistoryStore(args.store) as history:
+        versions = history.history(args.page_url)
+    if not versions:
+        print(f"No history for {args.page_url}")
+        return
+    for taken_at, page in versions:
+        when = datetime.fromtimestamp(taken_at).strftime("%Y-%m-%d %H:%M:%S")
+        if page is None:
+            print(f"{when}  removed")
+        else:
+            print(f"{when}  {page['title']} ({len(page['content'])} chars)")
+
+def run_as_of(args: argparse.Namespace) -> None:
+    """Print a page, or save every page, as it stood at a past date."""
+    if not os.path.exists(args.store):
+        print(f"No history at {args.store}. Scrape with --history first.")
+        return
+    when = parse_when(args.date)
+    with HistoryStore(args.store) as history:
+        if args.page_url:
+            page = history.page_as_of(args.page_url, when)
+            if page is None:
+                print(f"No page for {args.page_url} as of {args.date}")
+            else:
+                print(json.dumps(page, ensure_ascii=False, indent=4))
+            return
+        site = getattr(args, 'site', None)
+        sites = history.sites()
+        if site is None and len(sites) > 1:
+            print(f"History holds several sites; choose one with --site: {', '.join(sites)}")
+            return
+        pages = history.as_of(when, site)
+    if not pages:
+        print(f"No snapshot as of {args.date}")
+    elif args.output:
+        write_json_atomic(args.output, pages)
+        print(f"Saved {len(pages)} pages as of {args.date} to: {args.output}")
+    else:
+        for page in pages:
+            print(page['url'])
+
+def add_crawl_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the options that control how sites are crawled."""
+    parser.add_argument('--url', type=str, action='append',
+                      help=f'Starting URL; repeat to crawl several sites at once (default: {DEFAULT_URL})')
+    parser.add_argument('--config', type=str,
+                      help='JSON file listing the start URLs of several sites to crawl together')
+    parser.add_argument('--cache', type=str,
+                      help='Reuse extraction results for unchanged pages from this cache file')
+    parser.add_argument('--cache-size', type=str, default='256MB',
+                      help='Maximum size of the extraction cache (default: 256MB)')
+    parser.add_argument('--rate', type=float, default=5.0,
+                      help='Maximum requests per second to each host (default: 5)')
+    parser.add_argument('--ignore-robots', action='store_true',
+                      help='Do not fetch or honour robots.txt')
+    parser.add_argument('--trace', type=str,
+                      help='Record a timeline of the crawl to this Chrome trace JSON file')
+    parser.add_argument('--structured', action='store_true',
+                      help='Add each page\'s section tree, tables and lists as a "document" field')
+    parser.add_argument('--redirects', type=str, default=REDIRECTS_PATH,
+                      help='Remember redirects in this file so later runs request their targets directly '
+                           f'(default: {REDIRECTS_PATH})')
+    parser.add_argument('--max-page-size', type=str, default='10MB',
+                      help='Skip pages larger than this, e.g. 2MB (default: 10MB)')
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the argument parser for scraping and its subcommands."""
+    parser = argparse.ArgumentParser(description="Scrape Mafia Game website")
+    parser.add_argument('--format', choices=['json', 'txt', 'snapshot', *COLUMNAR_FORMATS], default='txt',
+                      help='Output format (json, txt, snapshot, parquet or arrow)')
+    add_crawl_arguments(parser)
+    parser.add_argument('--compress', choices=COMPRESSIONS,
+                      help='Compress json/txt output with gzip or zstd')
+    parser.add_argument('--shard-size', type=str,
+                      help='Roll json/txt output into numbered shards of this size (e.g. 50MB)')
+    parser.add_argument('--warc', type=str,
+                      help='Archive every HTTP request/response to this .warc.gz file')
+    parser.add_argument('--replay', type=str,
+                      help='Re-extract an archived crawl from this WARC file instead of the network')
+    parser.add_argument('--profile', choices=PROFILE_MODES,
+                      help='Profile CPU time or memory separately for discovery, fetching, extraction and output')
+    parser.add_argument('--profile-dir', type=str,
+                      help='Directory for per-phase pstats/tracemalloc files (default: output/profile)')
+    parser.add_argument('--source', choices=SOURCES, default='html',
+                      help='Read pages from the rendered HTML or as Markdown through the GitBook content API, '
+                           'falling back to HTML where the API cannot be used (default: html)')
+    parser.add_argument('--gitbook-api', type=str, default=DEFAULT_API_URL,
+                      help=f'GitBook content API endpoint (default: {DEFAULT_API_URL})')
+    parser.add_argument('--gitbook-space', type=str,
+                      help='GitBook space id (default: looked up from the URL)')
+    parser.add_argument('--gitbook-token', type=str,
+                      help='GitBook API token (default: the GITBOOK_TOKEN environment variable)')
+    parser.add_argument('--parse-executor', choices=EXECUTORS, default='loop',
+                      help='Parse pages on the event loop, in threads or in worker processes (default: loop)')
+    parser.add_argument('--parse-workers', type=int, default=1,
+                      help='Pages parsed at once by the parse stage (default: 1)')
+    parser.add_argument('--queue-size', type=int, default=DEFAULT_QUEUE_SIZE,
+                      help=f'Pages each pipeline stage may have waiting before earlier stages pause '
+                           f'(default: {DEFAULT_QUEUE_SIZE})')
+    parser.add_argument('--dedup', action='store_true',
+                      help='Drop pages whose title and text repeat an earlier page')
+    parser.add_argument('--workers', type=int, default=1,
+                      help='Crawl with this many processes sharing an on-disk frontier (default: 1)')
+    parser.add_argument('--index', action='store_true',
+                      help='Update the full-text search index in output/ as pages are fetched')
+    parser.add_argument('--chunks', action='store_true',
+                      help='Also write heading-aware chunks for retrieval to output/<site>.chunks.jsonl')
+    parser.add_argument('--history', type=str, nargs='?', const=HISTORY_PATH,
+                      help=f'Record this crawl in a snapshot history that stores only changed pages '
+                           f'(default file: {HISTORY_PATH})')
+
+    subparsers = parser.add_subparsers(dest='command')
+    watch = subparsers.add_parser('watch', help='Keep re-checking the wiki and update the output in place')
+    add_crawl_arguments(watch)
+    watch.add_argument('--interval', type=str, default='15m',
+                      help='Base re-check interval, e.g. 30s, 15m or 2h (default: 15m)')
+    watch.add_argument('--output', type=str,
+                      help='JSON snapshot to keep up to date (default: output/mafia_game_wiki.json)')
+    watch.add_argument('--status-file', type=str,
+                      help='JSON status file (default: output/watch.status.json)')
+
+    check_parser = subparsers.add_parser('check-links', help='Report broken links, redirects and slow endpoints')
+    check_parser.add_argument('--url', type=str, action='append',
+                      help=f'Site to check; repeat to check several (default: {DEFAULT_URL})')
+    check_parser.add_argument('--config', type=str,
+                      help='JSON file listing the start URLs of several sites to check')
+    check_parser.add_argument('--external', action='store_true',
+                      help='Also check links that leave the site')
+    check_parser.add_argument('--concurrency', type=int, default=50,
+                      help='Maximum requests in flight (default: 50)')
+    check_parser.add_argument('--per-host', type=int, default=8,
+                      help='Maximum connections to any one host (default: 8)')
+    check_parser.add_argument('--rate', type=float, default=DEFAULT_CHECK_RATE,
+                      help=f'Maximum requests per second to each host (default: {DEFAULT_CHECK_RATE:g}, ten times '
+                           'the crawl default; robots.txt crawl delays still apply)')
+    check_parser.add_argument('--ignore-robots', action='store_true',
+                      help='Do not fetch or honour robots.txt')
+    check_parser.add_argument('--timeout', type=float, default=10.0,
+                      help='Seconds before a link check counts as failed; the crawl itself uses the '
+                           "scraper's 10s timeout (default: 10)")
+    check_parser.add_argument('--slow', type=float, default=2.0,
+                      help='Report endpoints slower than this many seconds (default: 2)')
+    check_parser.add_argument('--max-page-size', type=str, default='10MB',
+                      help='Do not read links from pages larger than this (default: 10MB)')
+    check_parser.add_argument('--output', type=str,
+                      help='Also save the full report to this JSON file')
+
+    serve_parser = subparsers.add_parser('serve', help='Serve the scraped pages over a local HTTP API')
+    serve_parser.add_argument('--snapshot', type=str,
+                      help='JSON or binary snapshot to serve (default: newest one in output/)')
+    serve_parser.add_argument('--host', type=str, default='127.0.0.1',
+                      help='Address to listen on (default: 127.0.0.1)')
+    serve_parser.add_argument('--port', type=int, default=8080,
+                      help='Port to listen on (default: 8080)')
+    serve_parser.add_argument('--reload-interval', type=str, default='5s',
+                      help='How often to check the snapshot for changes (default: 5s)')
+
+    show_parser = subparsers.add_parser('show', help='Look up a page in a snapshot file')
+    show_parser.add_argument('snapshot', type=str, help='Snapshot file written with --format snapshot')
+    show_parser.add_argument('page_url', type=str, nargs='?', help='URL of the page to print (default: list URLs)')
+
+    history_parser = subparsers.add_parser('history', help='List the stored versions of a page')
+    history_parser.add_argument('page_url', type=str, help='URL of the page')
+    history_parser.add_argument('--store', type=str, default=HISTORY_PATH,
+                      help=f'History written with --history (default: {HISTORY_PATH})')
+
+    as_of_parser = subparsers.add_parser('as-of', help='Rebuild a page or the whole wiki as it was at a date')
+    as_of_parser.add_argument('date', type=str, help='Date or date-time, e.g. 2026-10-01 or 2026-10-01T12:00')
+    as_of_parser.add_argument('page_url', type=str, nargs='?', help='URL of the page to print (default: list URLs)')
+    as_of_parser.add_argument('--output', type=str, help='Save every page to this JSON file instead')
+    as_of_parser.add_argument('--site', type=str,
+                      help='Base URL of the site to rebuild, as crawled (needed when the store holds several)')
+    as_of_parser.add_argument('--store', type=str, default=HISTORY_PATH,
+                      help=f'History written with --history (default: {HISTORY_PATH})')
+
+    search_parser = subparsers.add_parser('search', help='Search the scraped pages')
+    search_parser.add_argument('query', type=str, nargs='+', help='Words to search for')
+    search_parser.add_argument('--index', type=str,
+                      help='Search index to query (default: output/mafia_game_wiki.idx)')
+    search_parser.add_argument('--limit', type=int, default=10,
+                      help='Maximum number of results (default: 10)')
+    return parser
 
 async def main() -> None:
     """Main entry point for the CLI."""
-    parser = argparse.ArgumentParser(description="Scrape Mafia Game website")
-    parser.add_argument('--format', choices=['json', 'txt'], default='txt',
-                      help='Output format (json or txt)')
-    parser.add_argument('--url', type=str,
-                      help='Starting URL (default: https://mafiagame.gitbook.io/bnb-mafia)')
+    parser = build_parser()
     args = parser.parse_args()
+    if args.command is None and args.format not in TEXT_FORMATS:
+        given = [option for option, value in (('--compress', args.compress), ('--shard-size', args.shard_size))
+                 if value]
+        if given:
+            parser.error(f"{' and '.join(given)} cannot be used with --format {args.format}; "
+                         "only json and txt output can be compressed or sharded")
 
     try:
-        await run_scraper(args)
+        if args.command == 'watch':
+            await run_watch(args)
+        elif args.command == 'serve':
+            await run_serve(args)
+        elif args.command == 'check-links':
+            await run_check_links(args)
+        elif args.command == 'show':
+            run_show(args)
+        elif args.command == 'search':
+            run_search(args)
+        elif args.command == 'history':
+            run_history(args)
+        elif args.command == 'as-of':
+            run_as_of(args)
+        else:
+            await run_scraper(args)
     except KeyboardInterrupt:
         print("\nScraping interrupted by user")
     except Exception as e:
@@ -0,0 +1,124 @@
+"""Columnar Parquet / Arrow IPC export for scraped pages."""
+import hashlib
+import time
+from typing import Dict, List, Optional, Union
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - optional dependency
+    pa = None
+
+from .records import PageRecord
+
+COLUMNAR_FORMATS = ('parquet', 'arrow')
+
+def _require_pyarrow() -> None:
+    """Raise a helpful error when pyarrow is not installed."""
+    if pa is None:
+        raise ImportError("Parquet/Arrow output requires pyarrow (pip install pyarrow)")
+
+def page_schema() -> "pa.Schema":
+    """Return the Arrow schema used for exported pages."""
+    _require_pyarrow()
+    return pa.schema([
+        ('url', pa.string()),
+        # Titles and statuses repeat across pages, so store them dictionary-encoded
+        ('title', pa.dictionary(pa.int32(), pa.string())),
+        ('content', pa.large_string()),
+        ('fetched_at', pa.timestamp('ms', tz='UTC')),
+        ('status', pa.dictionary(pa.int8(), pa.int16())),
+        ('content_hash', pa.string()),
+        ('byte_size', pa.int64()),
+    ])
+
+class ColumnarWriter:
+    """Stream scraped pages into a Parquet or Arrow IPC file in record batches."""
+
+    def __init__(self, path: str, output_format: str = 'parquet', batch_size: int = 1000):
+        """Open the output file for the given columnar format."""
+        _require_pyarrow()
+        if output_format not in COLUMNAR_FORMATS:
+            raise ValueError(f"Unsupported columnar format: {output_format}")
+        self.path = path
+        self.output_format = output_format
+        self.batch_size = batch_size
+        self.schema = page_schema()
+        self.rows_written = 0
+        self._rows: Dict[str, list] = {name: [] for name in self.schema.names}
+        if output_format == 'parquet':
+            self._writer = pq.ParquetWriter(
+                path, self.schema, compression='zstd', use_dictionary=['title', 'status']
+            )
+        else:
+            self._writer = ipc.new_file(
+                path, self.schema, options=ipc.IpcWriteOptions(compression='zstd')
+            )
+
+    def __enter__(self):
+        """Context manager entry."""
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit."""
+        self.close()
+
+    def write(self, page: Union[PageRecord, Dict[str, str]], status: Optional[int] = None,
+              fetched_at: Optional[float] = None) -> None:
+        """Buffer a page and flush a record batch once the batch is full.
+
+        A ``PageRecord`` brings its own status, fetch time, and hash and size
+        of the fetched bytes, so rows agree with the other outputs. Plain
+        dicts, such as pages merged from worker processes, carry none of
+        these; they get ``status`` (default 200), ``fetched_at`` (default now)
+        and the hash and size of their text. Arguments given override both.
+        """
+        content = page['content']
+        record = page if isinstance(page, PageRecord) else None
+        if record is not None and record.content_hash is not None:
+            digest, size = record.content_hash, record.size
+        else:
+            encoded = content.encode('utf-8')
+            digest, size = hashlib.sha256(encoded).hexdigest(), len(encoded)
+        if status is None:
+            status = record.status if record is not None else 200
+        if fetched_at is None:
+            fetched_at = record.fetched_at if record is not None and record.fetched_at else time.time()
+        self._rows['url'].append(page['url'])
+        self._rows['title'].append(page['title'])
+        self._rows['content'].append(content)
+        self._rows['fetched_at'].append(int(fetched_at * 1000))
+        self._rows['status'].append(status)
+        self._rows['content_hash'].append(digest)
+        self._rows['byte_size'].append(size)
+        if len(self._rows['url']) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write buffered rows out as a single record batch."""
+        count = len(self._rows['url'])
+        if not count:
+            return
+        batch = pa.RecordBatch.from_pydict(self._rows, schema=self.schema)
+        self._writer.write_batch(batch)
+        self.rows_written += count
+        self._rows = {name: [] for name in self.schema.names}
+
+    def close(self) -> None:
+        """Flush remaining rows and finalise the file."""
+        if self._writer is None:
+            return
+        self.flush()
+        self._writer.close()
+        self._writer = None
+
+def read_columnar(path: str) -> List[Dict[str, str]]:
+    """Read a Parquet or Arrow IPC export back into page dicts."""
+    _require_pyarrow()
+    if path.endswith('.parquet'):
+        table = pq.read_table(path)
+    else:
+        with pa.memory_map(path, 'r') as source:
+            table = ipc.open_file(source).read_all()
+    return table.select(['url', 'title', 'content']).to_pylist()
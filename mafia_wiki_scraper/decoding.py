@@ -0,0 +1,79 @@
+"""Choosing a page's character encoding without decoding or scanning the whole body."""
+import codecs
+import functools
+import re
+from typing import NamedTuple, Optional
+
+from lxml import etree
+
+DEFAULT_ENCODING = 'utf-8'
+
+# Browsers look for a <meta> charset declaration in the first 1024 bytes only
+PRESCAN_SIZE = 1024
+
+# UTF-32 BOMs start with the UTF-16 ones, so they are checked first
+BOMS = (
+    (codecs.BOM_UTF32_LE, 'utf-32le'),
+    (codecs.BOM_UTF32_BE, 'utf-32be'),
+    (codecs.BOM_UTF8, 'utf-8'),
+    (codecs.BOM_UTF16_LE, 'utf-16le'),
+    (codecs.BOM_UTF16_BE, 'utf-16be'),
+)
+
+HEADER_CHARSET = re.compile(r'charset\s*=\s*["\']?([^"\';\s]+)', re.IGNORECASE)
+# Matches both <meta charset="..."> and <meta http-equiv="Content-Type" content="...; charset=...">
+META_CHARSET = re.compile(rb'<meta[^>]+?charset\s*=\s*["\']?\s*([-\w.:]+)', re.IGNORECASE)
+
+class Body(NamedTuple):
+    """Raw bytes of a fetched page and the encoding to decode them with."""
+    content: bytes
+    encoding: str
+
+    def text(self) -> str:
+        """Decode the body, replacing any invalid bytes."""
+        return self.content.decode(self.encoding, errors='replace')
+
+def known_encoding(label: Optional[str]) -> Optional[str]:
+    """Return a name for the encoding ``label`` that Python and lxml both accept, or None."""
+    return encoding_name(label.strip().lower()) if label else None
+
+@functools.lru_cache(maxsize=None)
+def encoding_name(label: str) -> Optional[str]:
+    """Map a lowercased label to a usable encoding name.
+
+    Python and libxml2 know different aliases (``latin-1`` versus
+    ``utf-16-le``), so the label is kept if lxml accepts it and Python's
+    canonical name is tried next.
+    """
+    try:
+        name = codecs.lookup(label).name
+    except LookupError:
+        return None
+    for candidate in (label, name):
+        try:
+            etree.HTMLParser(encoding=candidate)
+        except LookupError:
+            continue
+        return candidate
+    return None
+
+def header_encoding(content_type: Optional[str]) -> Optional[str]:
+    """Return the charset parameter of a Content-Type header."""
+    match = HEADER_CHARSET.search(content_type or '')
+    return known_encoding(match.group(1)) if match else None
+
+def bom_encoding(content: bytes) -> Optional[str]:
+    """Return the encoding signalled by a byte order mark."""
+    for bom, encoding in BOMS:
+        if content.startswith(bom):
+            return encoding
+    return None
+
+def meta_encoding(content: bytes) -> Optional[str]:
+    """Return the charset declared by a ``<meta>`` tag near the start of the document."""
+    match = META_CHARSET.search(content, 0, PRESCAN_SIZE)
+    return known_encoding(match.group(1).decode('ascii')) if match else None
+
+def declared_encoding(content: bytes, content_type: Optional[str] = None) -> Optional[str]:
+    """Return the encoding from the BOM, Content-Type header or ``<meta>`` prefix, in that order."""
+    return bom_encoding(content) or header_encoding(content_type) or meta_encoding(content)
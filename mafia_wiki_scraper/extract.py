@@ -0,0 +1,142 @@
+"""HTML and Markdown extraction shared by the scraper's discovery and fetch paths."""
+import hashlib
+import re
+from typing import Dict, List, NamedTuple, Optional, Tuple, Union
+
+from bs4 import BeautifulSoup, NavigableString, Tag
+
+from .decoding import known_encoding
+from .structured import extract_document
+
+# Bump whenever extract() output changes so cached extractions are invalidated
+EXTRACTOR_VERSION = 2
+
+# Headings that start a new section; deeper levels stay inside their parent section
+SECTION_HEADINGS = ('h1', 'h2', 'h3')
+
+HEADING_RE = re.compile(r'^(#{1,6})\s+(.*?)\s*#*\s*$')
+# Inline Markdown reduced to its text: images, links, code, emphasis and GitBook {% %} blocks
+IMAGE_RE = re.compile(r'!\[([^\]]*)\]\([^)]*\)')
+LINK_RE = re.compile(r'\[([^\]]*)\]\([^)]*\)')
+TAG_RE = re.compile(r'\{%.*?%\}|<[^>]+>')
+MARKUP_RE = re.compile(r'`+|\*+|(?<!\w)_+|_+(?!\w)|~~')
+LINE_MARKER_RE = re.compile(r'^\s*(?:>\s*)*(?:[-*+]\s+|\d+[.)]\s+)?')
+TABLE_RULE_RE = re.compile(r'^\s*\|?\s*:?-{3,}:?\s*(\|\s*:?-{3,}:?\s*)*\|?\s*$')
+
+class Section(NamedTuple):
+    """Text under one heading, with the path of headings leading to it."""
+    headings: List[str]
+    text: str
+
+class Extraction(NamedTuple):
+    """Title, flattened text and raw link targets extracted from one page."""
+    title: Optional[str]
+    content: str
+    links: List[str]
+    sections: Optional[List[Section]] = None
+    document: Optional[Dict] = None
+
+def content_hash(html: Union[str, bytes]) -> str:
+    """Return the SHA-256 hex digest identifying an HTML document, as text or raw bytes."""
+    if isinstance(html, str):
+        html = html.encode('utf-8', errors='surrogatepass')
+    return hashlib.sha256(html).hexdigest()
+
+def extraction_key(html: Union[str, bytes], encoding: str) -> str:
+    """Return the extraction cache key of a page: its content hash and the encoding it is decoded with."""
+    return f"{content_hash(html)}:{encoding}"
+
+def extract_sections(soup: BeautifulSoup) -> List[Section]:
+    """Split the body text of a parsed page at its ``<h1>``-``<h3>`` headings."""
+    path: List[Tuple[int, str]] = []
+    sections: List[Section] = []
+    current: List[str] = []
+    heading_strings = set()
+
+    def flush():
+        """Close the section collected so far."""
+        if current:
+            sections.append(Section([heading for _, heading in path], ' '.join(current)))
+            current.clear()
+
+    for node in (soup.body or soup).descendants:
+        if isinstance(node, Tag) and node.name in SECTION_HEADINGS:
+            flush()
+            level = int(node.name[1])
+            path = [entry for entry in path if entry[0] < level]
+            path.append((level, node.get_text(separator=' ', strip=True)))
+            heading_strings.update(id(string) for string in node.strings)
+        elif type(node) is NavigableString and id(node) not in heading_strings:
+            text = node.strip()
+            if text:
+                current.append(text)
+    flush()
+    return sections
+
+def extract(html: Union[str, bytes], sections: bool = False, structured: bool = False,
+            encoding: Optional[str] = None) -> Extraction:
+    """Parse an HTML document once and extract its title, text and links.
+
+    Raw bytes are handed straight to lxml, which decodes them as
+    ``encoding`` without an intermediate ``str`` copy or any sniffing.
+    With ``sections`` set, the heading structure is also captured from the
+    same parse before the text is flattened. With ``structured`` set, the
+    section tree, tables and lists are captured as a structured document.
+    """
+    if isinstance(html, bytes):
+        soup = BeautifulSoup(html, 'lxml', from_encoding=known_encoding(encoding))
+    else:
+        soup = BeautifulSoup(html, 'lxml')
+    title = soup.title.string if soup.title else ""
+    links = [link.get('href') for link in soup.find_all('a', href=True) if link.get('href')]
+    content = soup.get_text(separator=' ', strip=True)
+    return Extraction(
+        str(title) if title is not None else None, content, links,
+        extract_sections(soup) if sections else None,
+        extract_document(soup) if structured else None,
+    )
+
+def markdown_text(markdown: str) -> str:
+    """Return the words of a Markdown document as one whitespace-normalised string."""
+    words = []
+    for line in markdown.splitlines():
+        heading = HEADING_RE.match(line)
+        text = heading.group(2) if heading else line
+        if TABLE_RULE_RE.match(text) or text.strip().startswith('```'):
+            continue
+        text = LINE_MARKER_RE.sub('', text)
+        text = IMAGE_RE.sub(r'\1', text)
+        text = LINK_RE.sub(r'\1', text)
+        text = TAG_RE.sub(' ', text)
+        text = MARKUP_RE.sub('', text).replace('|', ' ')
+        words.extend(text.split())
+    return ' '.join(words)
+
+def markdown_sections(markdown: str) -> List[Section]:
+    """Split a Markdown document at its level 1-3 headings, as ``extract_sections`` does for HTML."""
+    path: List[Tuple[int, str]] = []
+    sections: List[Section] = []
+    current: List[str] = []
+
+    def flush():
+        """Close the section collected so far."""
+        text = markdown_text('\n'.join(current))
+        if text:
+            sections.append(Section([heading for _, heading in path], text))
+        current.clear()
+
+    for line in markdown.splitlines():
+        heading = HEADING_RE.match(line)
+        if heading and len(heading.group(1)) <= len(SECTION_HEADINGS):
+            flush()
+            level = len(heading.group(1))
+            path = [entry for entry in path if entry[0] < level]
+            path.append((level, markdown_text(heading.group(2))))
+        else:
+            current.append(line)
+    flush()
+    return sections
+
+def extract_markdown(markdown: str, title: Optional[str] = None, sections: bool = False) -> Extraction:
+    """Extract a Markdown page's text, and with ``sections`` set its heading structure."""
+    return Extraction(title, markdown_text(markdown), [], markdown_sections(markdown) if sections else None)
@@ -0,0 +1,104 @@
+"""Crawl frontier shared by several processes through SQLite in WAL mode."""
+import sqlite3
+import time
+from contextlib import contextmanager
+from typing import Iterable, Iterator, List
+
+PENDING = 0
+CLAIMED = 1
+DONE = 2
+FAILED = 3
+
+class Frontier:
+    """The set of URLs to crawl and who is crawling them.
+
+    Every URL is stored once. ``claim`` moves pending URLs to a worker inside
+    an immediate transaction, so concurrent workers never claim the same URL.
+    Workers add the links they found before completing the page that linked
+    to them, so ``finished`` only becomes true once nothing is pending or
+    claimed anywhere.
+    """
+
+    def __init__(self, path: str, timeout: float = 30.0):
+        """Open (or create) the frontier database at ``path``."""
+        self.path = path
+        self.db = sqlite3.connect(path, timeout=timeout, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS frontier ("
+            " url TEXT PRIMARY KEY,"
+            " state INTEGER NOT NULL,"
+            " worker INTEGER,"
+            " claimed_at REAL)"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS frontier_state ON frontier (state)")
+
+    def __enter__(self):
+        """Context manager entry."""
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit."""
+        self.close()
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self.db.close()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Run the block in a write transaction, taking the lock up front."""
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            yield self.db
+        except BaseException:
+            self.db.execute("ROLLBACK")
+            raise
+        self.db.execute("COMMIT")
+
+    def add(self, urls: Iterable[str]) -> int:
+        """Queue URLs not seen before and return how many were new."""
+        with self._transaction() as db:
+            before = db.total_changes
+            db.executemany(
+                "INSERT OR IGNORE INTO frontier (url, state) VALUES (?, ?)",
+                ((url, PENDING) for url in urls),
+            )
+            return db.total_changes - before
+
+    def claim(self, worker: int, limit: int) -> List[str]:
+        """Claim up to ``limit`` pending URLs for ``worker``."""
+        with self._transaction() as db:
+            urls = [row[0] for row in db.execute(
+                "SELECT url FROM frontier WHERE state = ? LIMIT ?", (PENDING, limit)
+            )]
+            now = time.time()
+            db.executemany(
+                "UPDATE frontier SET state = ?, worker = ?, claimed_at = ? WHERE url = ?",
+                ((CLAIMED, worker, now, url) for url in urls),
+            )
+        return urls
+
+    def complete(self, urls: Iterable[str], state: int = DONE) -> None:
+        """Mark claimed URLs as done (or failed)."""
+        with self._transaction() as db:
+            db.executemany("UPDATE frontier SET state = ? WHERE url = ?", ((state, url) for url in urls))
+
+    def release(self, worker: int) -> int:
+        """Return the URLs claimed by a worker that died to the pending queue."""
+        with self._transaction() as db:
+            return db.execute(
+                "UPDATE frontier SET state = ?, worker = NULL WHERE state = ? AND worker = ?",
+                (PENDING, CLAIMED, worker),
+            ).rowcount
+
+    def count(self, state: int) -> int:
+        """Return the number of URLs in ``state``."""
+        return self.db.execute("SELECT COUNT(*) FROM frontier WHERE state = ?", (state,)).fetchone()[0]
+
+    def finished(self) -> bool:
+        """Return whether no URL is pending or claimed."""
+        return self.db.execute(
+            "SELECT 1 FROM frontier WHERE state IN (?, ?) LIMIT 1", (PENDING, CLAIMED)
+        ).fetchone() is None
@@ -0,0 +1,114 @@
+"""GitBook content-API backend that reads pages as Markdown instead of scraping HTML."""
+import asyncio
+import json
+import os
+from typing import AsyncGenerator, Dict, Optional, Tuple
+from urllib.parse import quote
+
+import aiohttp
+
+from .decoding import Body
+from .politeness import DisallowedByRobots
+from .scraper import FetchedPage, WikiScraper
+
+DEFAULT_API_URL = "https://api.gitbook.com/v1"
+TOKEN_VARIABLE = "GITBOOK_TOKEN"
+SOURCES = ('html', 'gitbook')
+
+class GitBookError(Exception):
+    """Raised when the content API cannot be used for a space."""
+
+class GitBookScraper(WikiScraper):
+    """Scraper that reads a GitBook space through its content API.
+
+    The page tree comes from a single listing request and each page is then
+    fetched as Markdown, without the sidebar and markup that every rendered
+    HTML page repeats, and without parsing HTML. If the space cannot be
+    listed (no token, no API, robots.txt, or ``structured`` output, which
+    needs the HTML), the whole crawl falls back to scraping HTML; a page
+    whose content request fails falls back on its own.
+    """
+
+    def __init__(self, base_url: str, api_url: str = DEFAULT_API_URL, space: Optional[str] = None,
+                 token: Optional[str] = None, **kwargs):
+        """Configure the API endpoint; ``space`` is looked up from ``base_url`` when not given.
+
+        ``token`` defaults to the ``GITBOOK_TOKEN`` environment variable.
+        Other keyword arguments are passed to ``WikiScraper``.
+        """
+        super().__init__(base_url, **kwargs)
+        self.api_url = api_url.rstrip('/')
+        self.space = space
+        self.token = token if token is not None else os.environ.get(TOKEN_VARIABLE)
+        # Page URL to GitBook page id, for every page listed by the API
+        self.page_ids: Dict[str, str] = {}
+
+    def headers(self) -> Dict[str, str]:
+        """Return the request headers for the API."""
+        headers = {'Accept': 'application/json'}
+        if self.token:
+            headers['Authorization'] = f"Bearer {self.token}"
+        return headers
+
+    async def api_get(self, path: str) -> Tuple[Dict, int]:
+        """GET an API path and return its decoded JSON and size in bytes."""
+        url = f"{self.api_url}{path}"
+        try:
+            async with self._request(url, headers=self.headers()) as response:
+                body = await response.read()
+                await self._archive(url, response, body)
+                if response.status != 200:
+                    raise GitBookError(f"{url} returned {response.status}")
+                return json.loads(body), len(body)
+        except (aiohttp.ClientError, asyncio.TimeoutError, DisallowedByRobots, ValueError) as e:
+            raise GitBookError(f"{url} failed: {str(e) or type(e).__name__}") from e
+
+    async def list_pages(self) -> Dict[str, str]:
+        """Return the URL and id of every document page in the space, in one listing request."""
+        if self.space is None:
+            resolved, _ = await self.api_get(f"/urls/content?url={quote(self.base_url, safe='')}")
+            if not resolved.get('space'):
+                raise GitBookError(f"{self.base_url} is not a GitBook space")
+            self.space = resolved['space']
+        content, _ = await self.api_get(f"/spaces/{self.space}/content")
+
+        pages: Dict[str, str] = {}
+        stack = list(reversed(content.get('pages', [])))
+        while stack:
+            node = stack.pop()
+            # Groups only hold other pages and links point elsewhere; documents have content
+            if node.get('type', 'document') == 'document':
+                path = node.get('path', '').strip('/')
+                pages[f"{self.base_url}/{path}" if path else self.base_url] = node['id']
+            stack.extend(reversed(node.get('pages', [])))
+        return pages
+
+    async def get_all_internal_links(self) -> AsyncGenerator[Tuple[int, int], None]:
+        """List every page through the API, or discover them from the HTML if it cannot be used."""
+        if self.structured:
+            self.log("Structured output needs the rendered HTML, scraping it instead of using the GitBook API")
+        else:
+            try:
+                self.page_ids = await self.list_pages()
+            except GitBookError as e:
+                self.log(f"GitBook API unavailable ({e}), falling back to HTML scraping")
+        if not self.page_ids:
+            async for progress in super().get_all_internal_links():
+                yield progress
+            return
+        self.all_links = set(self.page_ids)
+        self.log(f"Listed {len(self.all_links)} pages through the GitBook API")
+        yield len(self.all_links), len(self.all_links)
+
+    async def fetch_page(self, url: str) -> Optional[FetchedPage]:
+        """Fetch a listed page as Markdown, or its HTML if it was not listed or the API fails."""
+        page_id = self.page_ids.get(url)
+        if page_id is None:
+            return await super().fetch_page(url)
+        try:
+            page, _ = await self.api_get(f"/spaces/{self.space}/content/page/{page_id}?format=markdown")
+        except GitBookError as e:
+            self.log(f"Error when fetching {url} from the GitBook API: {e}")
+            return await super().fetch_page(url)
+        markdown = (page.get('markdown') or '').encode('utf-8')
+        return FetchedPage(url, 200, Body(markdown, 'utf-8'), format='markdown', title=page.get('title'))
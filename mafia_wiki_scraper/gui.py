@@ -3,6 +3,8 @@ import asyncio
 import os
 import sys
 import tkinter as tk
+import tkinter.font as tkfont
+from contextlib import nullcontext
 from datetime import datetime
 from pathlib import Path
 from tkinter import filedialog
@@ -10,14 +12,18 @@ import json
 import subprocess
 import threading
 import webbrowser
-from typing import Optional
+from typing import Callable, List, Optional, Tuple
 import queue
 
 import customtkinter as ctk
 from PIL import Image, ImageTk
 import pygame.mixer
 
+from .records import PageRecord
 from .scraper import WikiScraper
+from .search import InvertedIndex
+from .sinks import ShardedWriter
+from .snapshot import SNAPSHOT_EXTENSION, is_snapshot, read_pages, write_snapshot
 
 # Set theme and color scheme
 ctk.set_appearance_mode("dark")
@@ -36,6 +42,177 @@ COLORS = {
     'emerald': '#50C878',     # Classic emerald for scraping
 }
 
+# Live results list layout: column key, heading and share of the width
+RESULT_COLUMNS = (
+    ('title', "Title", 0.34),
+    ('url', "URL", 0.46),
+    ('size', "Size", 0.10),
+    ('status', "Status", 0.10),
+)
+ROW_HEIGHT = 22
+# Pages arriving from the scraper thread are shown in batches this often (ms)
+RESULTS_BATCH_INTERVAL = 100
+# Longest page text shown in the preview pane
+PREVIEW_LIMIT = 20000
+# Output format choices shown in the window, and the file extension each one writes
+OUTPUT_FORMATS = {"JSON": 'json', "Snapshot": SNAPSHOT_EXTENSION}
+
+def format_size(size: int) -> str:
+    """Format a byte count for display."""
+    for unit in ("B", "KB", "MB"):
+        if size < 1024 or unit == "MB":
+            return f"{size} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+def result_row(page: PageRecord) -> Tuple[str, str, str, str]:
+    """Return the results list cells for a page."""
+    return (page.title or "(untitled)", page.url, format_size(page.size), str(page.status))
+
+def visible_rows(top: int, height: int, total: int) -> range:
+    """Return the indexes of the rows shown from row ``top`` in ``height`` pixels."""
+    return range(top, min(total, top + -(-height // ROW_HEIGHT)))
+
+def fit_text(text: str, width: int, char_width: int) -> str:
+    """Cut ``text`` to roughly fit ``width`` pixels of characters ``char_width`` wide."""
+    limit = max(1, width // max(1, char_width))
+    return text if len(text) <= limit else text[:max(0, limit - 1)] + "\u2026"
+
+def output_file_name(output_format: str) -> str:
+    """Return the name of the file a scrape saves in the given format ("JSON" or "Snapshot")."""
+    return f"mafia_wiki.{OUTPUT_FORMATS.get(output_format, 'json')}"
+
+def load_pages(path: str) -> List[PageRecord]:
+    """Read the pages of a JSON output file or binary snapshot for the results list."""
+    return [
+        PageRecord(page['url'], page.get('title'), page.get('content') or "", document=page.get('document'))
+        for page in read_pages(path)
+    ]
+
+class ResultsList(ctk.CTkFrame):
+    """Scrollable list of scraped pages that only draws the rows in view.
+
+    Pages are kept as plain records; a fixed pool of canvas text items,
+    one row per visible line, is relabelled on scroll, so the number of
+    Tk items stays the same whether the list holds ten pages or a
+    hundred thousand.
+    """
+
+    def __init__(self, master, on_select: Optional[Callable[[PageRecord], None]] = None, **kwargs):
+        """Create the list; ``on_select`` is called with the page clicked."""
+        super().__init__(master, fg_color=COLORS['black'], **kwargs)
+        self.pages: List[PageRecord] = []
+        self.on_select = on_select
+        self.top = 0
+        self.selected: Optional[int] = None
+        self.follow = True
+        self.rows: List[Tuple[int, List[int]]] = []
+        self.font = tkfont.Font(family="Inter", size=11)
+        self.char_width = self.font.measure("0")
+
+        header = ctk.CTkFrame(self, fg_color="transparent", height=ROW_HEIGHT)
+        header.pack(fill="x")
+        x = 0.0
+        for _, heading, share in RESULT_COLUMNS:
+            label = ctk.CTkLabel(header, text=heading, anchor="w", font=("Inter", 12, "bold"),
+                                 text_color=COLORS['amber'])
+            label.place(relx=x, relwidth=share, rely=0, relheight=1)
+            x += share
+
+        body = ctk.CTkFrame(self, fg_color="transparent")
+        body.pack(fill="both", expand=True)
+        self.scrollbar = ctk.CTkScrollbar(body, orientation="vertical", command=self.yview)
+        self.scrollbar.pack(side="right", fill="y")
+        self.canvas = tk.Canvas(body, background=COLORS['black'], highlightthickness=0, borderwidth=0)
+        self.canvas.pack(side="left", fill="both", expand=True)
+        self.canvas.bind("<Configure>", lambda event: self.build_rows())
+        self.canvas.bind("<Button-1>", self.click)
+        self.canvas.bind("<MouseWheel>", self.wheel)
+        self.canvas.bind("<Button-4>", self.wheel)
+        self.canvas.bind("<Button-5>", self.wheel)
+
+    def page_rows(self) -> int:
+        """Return how many whole rows fit in the canvas."""
+        return max(1, self.canvas.winfo_height() // ROW_HEIGHT)
+
+    def build_rows(self) -> None:
+        """Create one pooled row of canvas items per line that fits, then redraw."""
+        self.canvas.delete("all")
+        self.rows = []
+        width = self.canvas.winfo_width()
+        count = -(-self.canvas.winfo_height() // ROW_HEIGHT)
+        for line in range(count):
+            y = line * ROW_HEIGHT
+            background = self.canvas.create_rectangle(0, y, width, y + ROW_HEIGHT, width=0,
+                                                      fill=COLORS['black'])
+            cells, x = [], 0.0
+            for _, _, share in RESULT_COLUMNS:
+                cells.append(self.canvas.create_text(x * width + 4, y + ROW_HEIGHT / 2, anchor="w",
+                                                     font=self.font, fill=COLORS['white']))
+                x += share
+            self.rows.append((background, cells))
+        self.redraw()
+
+    def redraw(self) -> None:
+        """Relabel the pooled rows with the pages now in view and update the scrollbar."""
+        width = self.canvas.winfo_width()
+        shown = visible_rows(self.top, len(self.rows) * ROW_HEIGHT, len(self.pages))
+        for line, (background, cells) in enumerate(self.rows):
+            index = self.top + line
+            values = result_row(self.pages[index]) if index in shown else ("",) * len(cells)
+            fill = COLORS['primary_dark'] if index == self.selected else COLORS['black']
+            self.canvas.itemconfigure(background, fill=fill)
+            for cell, value, (_, _, share) in zip(cells, values, RESULT_COLUMNS):
+                self.canvas.itemconfigure(cell, text=fit_text(value, int(share * width) - 8, self.char_width))
+        total = max(len(self.pages), 1)
+        self.scrollbar.set(self.top / total, min(1.0, (self.top + self.page_rows()) / total))
+
+    def scroll_to(self, top: int) -> None:
+        """Show the rows from ``top``, keeping following new pages only when at the end."""
+        last = max(0, len(self.pages) - self.page_rows())
+        self.top = max(0, min(top, last))
+        self.follow = self.top == last
+        self.redraw()
+
+    def yview(self, action: str, value, unit: Optional[str] = None) -> None:
+        """Scroll like a Tk scrollable widget, by 'moveto' fraction or 'scroll' units and pages."""
+        if action == 'moveto':
+            self.scroll_to(int(float(value) * len(self.pages)))
+        elif action == 'scroll':
+            step = self.page_rows() if unit == 'pages' else 1
+            self.scroll_to(self.top + int(value) * step)
+
+    def wheel(self, event) -> None:
+        """Scroll three rows per mouse wheel step."""
+        if event.num == 4 or getattr(event, 'delta', 0) > 0:
+            self.yview('scroll', -3, 'units')
+        else:
+            self.yview('scroll', 3, 'units')
+
+    def add(self, pages: List[PageRecord]) -> None:
+        """Append a batch of pages and redraw once, following the end if it was in view."""
+        self.pages.extend(pages)
+        if self.follow:
+            self.top = max(0, len(self.pages) - self.page_rows())
+        self.redraw()
+
+    def clear(self) -> None:
+        """Remove every page."""
+        self.pages = []
+        self.top = 0
+        self.selected = None
+        self.follow = True
+        self.redraw()
+
+    def click(self, event) -> None:
+        """Select the page under the pointer and report it."""
+        index = self.top + event.y // ROW_HEIGHT
+        if index >= len(self.pages):
+            return
+        self.selected = index
+        self.redraw()
+        if self.on_select:
+            self.on_select(self.pages[index])
+
 class AnimatedProgressBar(ctk.CTkProgressBar):
     """Progress bar with pulsing animation."""
     
@@ -86,6 +263,8 @@ class MafiaWikiScraperGUI(ctk.CTk):
         self.current_output_file = None
         self.base_url = "https://bnb-mafia.gitbook.io/bnb-mafia"
         self.output_dir = tk.StringVar()  # Add output directory variable
+        # Pages scraped on the async thread, waiting to be shown in the results list
+        self.pending_pages: "queue.Queue[PageRecord]" = queue.Queue()
         
         # Setup async event loop in a separate thread
         self.async_queue = queue.Queue()
@@ -95,7 +274,7 @@ class MafiaWikiScraperGUI(ctk.CTk):
         
         # Configure window
         self.title("Mafia Wiki Scraper")
-        self.geometry("1000x700")
+        self.geometry("1200x1000")
         self.configure(fg_color=COLORS['black'])
         
         # Center the window
@@ -104,6 +283,7 @@ class MafiaWikiScraperGUI(ctk.CTk):
         # Load and save settings
         self.settings_file = Path.home() / ".mafia_scraper_settings.json"
         self.settings = self.load_settings()
+        self.output_format = tk.StringVar(value=self.settings.get('output_format', "JSON"))
         
         # Create main container with gradient background
         self.container = ctk.CTkFrame(self, fg_color=COLORS['black'])
@@ -193,6 +373,11 @@ class MafiaWikiScraperGUI(ctk.CTk):
         self.setup_directory_frame()
         self.setup_progress_section()
         self.setup_control_buttons()
+        self.setup_results_section()
+        self.setup_search_section()
+
+        # Show newly scraped pages in batches rather than one Tk update per page
+        self.after(RESULTS_BATCH_INTERVAL, self.flush_results)
 
     def setup_directory_frame(self):
         """Setup the directory selection frame."""
@@ -312,6 +497,19 @@ class MafiaWikiScraperGUI(ctk.CTk):
         )
         self.scrape_button.pack(side="left", padx=(0, 10))
 
+        self.format_menu = ctk.CTkOptionMenu(
+            button_frame,
+            values=list(OUTPUT_FORMATS),
+            variable=self.output_format,
+            command=lambda _: self.save_settings(),
+            fg_color=COLORS['dark_gray'],
+            button_color=COLORS['primary'],
+            button_hover_color=COLORS['primary']
+        )
+        self.format_menu.pack(side="right")
+        format_label = ctk.CTkLabel(button_frame, text="Save as:", font=("Optima", 14))
+        format_label.pack(side="right", padx=(0, 10))
+
         # Add stats frame
         self.stats_frame = ctk.CTkFrame(self.content_frame, fg_color=COLORS['black'])
         self.stats_frame.pack(fill="x", padx=20, pady=20)
@@ -355,6 +553,124 @@ class MafiaWikiScraperGUI(ctk.CTk):
         self.open_button.pack(side="right", padx=20)
         self.open_button.configure(state="disabled")
 
+        self.load_button = ctk.CTkButton(
+            self.output_frame,
+            text="Load Results",
+            width=100,
+            command=self.load_results,
+            fg_color=COLORS['primary'],
+            hover_color=COLORS['primary']
+        )
+        self.load_button.pack(side="right")
+
+    def setup_results_section(self):
+        """Setup the live results list and the page preview."""
+        results_frame = ctk.CTkFrame(self.content_frame, fg_color="transparent")
+        results_frame.pack(fill="both", expand=True, padx=20, pady=(0, 20))
+
+        self.results_list = ResultsList(results_frame, on_select=self.show_preview, height=240)
+        self.results_list.pack(side="left", fill="both", expand=True, padx=(0, 10))
+
+        self.preview = ctk.CTkTextbox(
+            results_frame,
+            width=320,
+            wrap="word",
+            fg_color=COLORS['black'],
+            text_color=COLORS['white']
+        )
+        self.preview.pack(side="right", fill="both")
+        self.preview.configure(state="disabled")
+
+    def queue_page(self, page: PageRecord):
+        """Queue a scraped page for the results list; safe to call from the scraper thread."""
+        self.pending_pages.put(page)
+
+    def flush_results(self):
+        """Move the queued pages into the results list in one batch and reschedule."""
+        batch = []
+        try:
+            while True:
+                batch.append(self.pending_pages.get_nowait())
+        except queue.Empty:
+            pass
+        if batch:
+            self.results_list.add(batch)
+            self.pages_label.configure(text=f"Pages Scraped: {len(self.results_list.pages)}")
+        self.after(RESULTS_BATCH_INTERVAL, self.flush_results)
+
+    def show_preview(self, page: PageRecord):
+        """Show the details and text of the selected page in the preview pane."""
+        content = page.content or ""
+        if len(content) > PREVIEW_LIMIT:
+            content = content[:PREVIEW_LIMIT] + "\n\n[...]"
+        fetched = datetime.fromtimestamp(page.fetched_at).strftime("%Y-%m-%d %H:%M:%S") if page.fetched_at else "-"
+        lines = [
+            page.title or "(untitled)",
+            page.url,
+            f"Status {page.status}  |  {format_size(page.size)}  |  {fetched}",
+            "",
+            content,
+        ]
+        self.preview.configure(state="normal")
+        self.preview.delete("1.0", "end")
+        self.preview.insert("end", "\n".join(lines))
+        self.preview.configure(state="disabled")
+
+    def setup_search_section(self):
+        """Setup the search box over the scraped pages."""
+        search_frame = ctk.CTkFrame(self.content_frame, fg_color="transparent")
+        search_frame.pack(fill="both", expand=True, padx=20, pady=(0, 20))
+
+        entry_frame = ctk.CTkFrame(search_frame, fg_color="transparent")
+        entry_frame.pack(fill="x")
+
+        self.search_entry = ctk.CTkEntry(
+            entry_frame,
+            placeholder_text="Search scraped pages..."
+        )
+        self.search_entry.pack(side="left", fill="x", expand=True, padx=(0, 10))
+        self.search_entry.bind("<Return>", lambda event: self.run_search())
+
+        search_button = ctk.CTkButton(
+            entry_frame,
+            text="Search",
+            width=100,
+            command=self.run_search,
+            fg_color=COLORS['primary'],
+            hover_color=COLORS['primary']
+        )
+        search_button.pack(side="right")
+
+        self.search_results = ctk.CTkTextbox(
+            search_frame,
+            height=120,
+            fg_color=COLORS['black'],
+            text_color=COLORS['white']
+        )
+        self.search_results.pack(fill="both", expand=True, pady=(10, 0))
+        self.search_results.configure(state="disabled")
+
+    def index_file(self) -> Path:
+        """Return the search index path in the output directory."""
+        return Path(self.output_dir.get()) / "mafia_wiki.idx"
+
+    def run_search(self):
+        """Search the index in the output directory and show the results."""
+        query = self.search_entry.get().strip()
+        if not query:
+            return
+        index_file = self.index_file()
+        if not index_file.exists():
+            lines = ["No search index yet. Scrape the wiki first."]
+        else:
+            hits = InvertedIndex.load(str(index_file)).search(query, limit=20)
+            lines = [f"{hit.title}\n    {hit.url}" for hit in hits] or ["No matching pages."]
+
+        self.search_results.configure(state="normal")
+        self.search_results.delete("1.0", "end")
+        self.search_results.insert("end", "\n".join(lines))
+        self.search_results.configure(state="disabled")
+
     def play_sound(self, sound_name: str):
         """Play a sound effect."""
         try:
@@ -397,7 +713,8 @@ class MafiaWikiScraperGUI(ctk.CTk):
     def save_settings(self):
         """Save settings to file."""
         settings = {
-            "last_directory": self.output_dir.get()
+            "last_directory": self.output_dir.get(),
+            "output_format": self.output_format.get()
         }
         try:
             with open(self.settings_file, 'w') as f:
@@ -465,7 +782,7 @@ class MafiaWikiScraperGUI(ctk.CTk):
         self.update()  # Force update of GUI state
 
     def open_output_file(self):
-        """Open the output file in the default text editor."""
+        """Open the output file in the default text editor, or the folder holding a binary snapshot."""
         self.play_sound('click')
         if not self.current_output_file:
             return
@@ -473,6 +790,8 @@ class MafiaWikiScraperGUI(ctk.CTk):
         output_path = Path(self.current_output_file)
         if not output_path.exists():
             return
+        if is_snapshot(str(output_path)):
+            output_path = output_path.parent
             
         if sys.platform == "darwin":  # macOS
             subprocess.run(["open", str(output_path)])
@@ -481,6 +800,30 @@ class MafiaWikiScraperGUI(ctk.CTk):
         else:  # Linux and others
             subprocess.run(["xdg-open", str(output_path)])
 
+    def load_results(self):
+        """Show the pages of a saved JSON file or snapshot in the results list."""
+        self.play_sound('click')
+        if self.scraping:
+            return
+        path = filedialog.askopenfilename(
+            initialdir=self.output_dir.get() or os.getcwd(),
+            title="Load Scraped Pages",
+            filetypes=[("Scraped pages", f"*.json *.{SNAPSHOT_EXTENSION}"), ("All files", "*")]
+        )
+        if not path:
+            return
+        try:
+            pages = load_pages(path)
+        except (OSError, ValueError, KeyError) as e:
+            self.show_error(f"Could not load {path}: {e}")
+            return
+        self.results_list.clear()
+        self.results_list.add(pages)
+        self.pages_label.configure(text=f"Pages Scraped: {len(pages)}")
+        self.current_output_file = path
+        self.open_button.configure(state="normal")
+        self.update_status(f"Loaded {len(pages)} pages from {path}")
+
     def start_scraping(self):
         """Start or stop the scraping process."""
         if self.scraping:
@@ -509,6 +852,11 @@ class MafiaWikiScraperGUI(ctk.CTk):
             self.fetching_progress.set(0)
             self.progress_bar.set(0)
             self.update_status("Starting scraper...")
+
+            # Clear the results of any previous run
+            self.results_list.clear()
+            self.pending_pages = queue.Queue()
+            self.pages_label.configure(text="Pages Scraped: 0")
             
             # Start the scraping process in the background
             asyncio.run_coroutine_threadsafe(self._run_scraper(), self.loop)
@@ -523,6 +871,9 @@ class MafiaWikiScraperGUI(ctk.CTk):
             self.show_error("Please select an output directory first.")
             return
 
+        # Pages stream into a partial file that replaces the last good output only once
+        # the scrape finishes, so a cancelled or failed run leaves that output intact
+        partial_file = None
         try:
             self.update_status("Initializing scraper...")
             async with WikiScraper(self.base_url) as scraper:
@@ -538,13 +889,23 @@ class MafiaWikiScraperGUI(ctk.CTk):
                 if total_links == 0:
                     raise Exception("No pages found to scrape. Please check your internet connection.")
 
-                # Fetch all pages
+                # Fetch all pages, updating the search index as they arrive
                 self.update_status("Fetching pages...")
-                pages = []
-                async for current, total in scraper.fetch_pages_with_progress():
-                    if not self.scraping:  # Check if we should stop
-                        raise asyncio.CancelledError("Scraping cancelled by user")
-                    self.update_fetching_progress(current, total)
+                index = InvertedIndex.open(str(self.index_file()))
+                scraper.page_callbacks.append(index.add_page)
+                scraper.page_callbacks.append(self.queue_page)
+                output_format = self.output_format.get()
+                output_file = os.path.join(self.output_dir.get(), output_file_name(output_format))
+                partial_file = f"{output_file}.part"
+                # JSON is written as the pipeline's sink stage finishes each page; a snapshot's
+                # URL index needs every page, so it is written once they are all in
+                with ShardedWriter(partial_file, 'json') if output_format == "JSON" else nullcontext() as writer:
+                    if writer is not None:
+                        scraper.page_callbacks.append(writer.write)
+                    async for current, total in scraper.fetch_pages_with_progress():
+                        if not self.scraping:  # Check if we should stop
+                            raise asyncio.CancelledError("Scraping cancelled by user")
+                        self.update_fetching_progress(current, total)
 
                 # Scrape all pages
                 self.update_status("Extracting content...")
@@ -557,11 +918,13 @@ class MafiaWikiScraperGUI(ctk.CTk):
                     self.update_progress((current / total_links) * 100)
                     self.update_status(f"Scraping page {current} of {total_links}")
 
-                # Save results to file
+                # Save the search index, without pages this crawl no longer found
                 self.update_status("Saving results...")
-                output_file = os.path.join(self.output_dir.get(), "mafia_wiki.json")
-                with open(output_file, "w", encoding="utf-8") as f:
-                    json.dump(scraper.results, f, indent=4, ensure_ascii=False)
+                if output_format != "JSON":
+                    write_snapshot(scraped_pages, partial_file)
+                os.replace(partial_file, output_file)
+                index.retain(page['url'] for page in scraped_pages)
+                index.save(str(self.index_file()))
 
                 self.current_output_file = output_file
                 self.open_button.configure(state="normal")
@@ -576,6 +939,8 @@ class MafiaWikiScraperGUI(ctk.CTk):
             traceback.print_exc()
             self.show_error(str(e))
         finally:
+            if partial_file and os.path.exists(partial_file):
+                os.remove(partial_file)
             self.scraping = False
             self.scrape_button.configure(text="Start Scraping", state="normal")
             self.update()  # Force update of GUI state
@@ -0,0 +1,168 @@
+"""Snapshot history that stores each page version once and each run as its changes."""
+import hashlib
+import json
+import sqlite3
+import time
+import zlib
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+from .records import PageRecord, as_dict
+
+class HistoryStore:
+    """SQLite store of crawl snapshots with time-travel queries.
+
+    Page versions are stored as compressed blobs keyed by the hash of their
+    JSON, so a page that is unchanged across runs is stored once. Each
+    snapshot only records the pages of its site that were added, changed or
+    removed since the site's previous snapshot, so the store grows with the
+    amount of change rather than with the number of runs. Any page or whole
+    snapshot is rebuilt from the latest change at or before a given time.
+    """
+
+    def __init__(self, path: str):
+        """Open (or create) the history database at ``path``."""
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS blobs ("
+            " hash TEXT PRIMARY KEY,"
+            " data BLOB NOT NULL)"
+        )
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS snapshots ("
+            " id INTEGER PRIMARY KEY,"
+            " site TEXT NOT NULL,"
+            " taken_at REAL NOT NULL)"
+        )
+        # A NULL hash records that the page was gone from that snapshot on
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS changes ("
+            " url TEXT NOT NULL,"
+            " snapshot INTEGER NOT NULL,"
+            " hash TEXT,"
+            " PRIMARY KEY (url, snapshot))"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS snapshots_taken_at ON snapshots (taken_at)")
+        self.db.commit()
+
+    def __enter__(self):
+        """Context manager entry."""
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit."""
+        self.close()
+
+    def __len__(self) -> int:
+        """Return the number of snapshots."""
+        return self.db.execute("SELECT COUNT(*) FROM snapshots").fetchone()[0]
+
+    def close(self) -> None:
+        """Commit pending writes and close the database."""
+        self.db.commit()
+        self.db.close()
+
+    def _state(self, snapshot: Optional[int] = None, site: Optional[str] = None) -> Dict[str, str]:
+        """Return the URL to version hash of every live page as of a snapshot id (default: latest)."""
+        conditions, params = [], []
+        if snapshot is not None:
+            conditions.append("c.snapshot <= ?")
+            params.append(snapshot)
+        if site is not None:
+            conditions.append("s.site = ?")
+            params.append(site)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        # SQLite takes the bare hash column from the row holding MAX(snapshot)
+        rows = self.db.execute(
+            f"SELECT c.url, c.hash, MAX(c.snapshot) FROM changes c JOIN snapshots s ON s.id = c.snapshot "
+            f"{where} GROUP BY c.url",
+            params,
+        )
+        return {url: page_hash for url, page_hash, _ in rows if page_hash is not None}
+
+    def add_snapshot(self, pages: Iterable[Union[PageRecord, Dict[str, Any]]], site: str = '',
+                     taken_at: Optional[float] = None) -> Dict[str, int]:
+        """Record a crawl of ``site`` and return how many pages were new, changed, unchanged or removed."""
+        previous = self._state(site=site)
+        current: Dict[str, str] = {}
+        blobs: List[Tuple[str, bytes]] = []
+        for page in pages:
+            data = json.dumps(as_dict(page), ensure_ascii=False, sort_keys=True).encode('utf-8')
+            page_hash = hashlib.sha256(data).hexdigest()
+            current[page['url']] = page_hash
+            if previous.get(page['url']) != page_hash:
+                blobs.append((page_hash, zlib.compress(data)))
+
+        stats = {'new': 0, 'changed': 0, 'unchanged': 0, 'removed': 0}
+        changes: List[Tuple[str, Optional[str]]] = []
+        for url, page_hash in current.items():
+            old_hash = previous.get(url)
+            if old_hash == page_hash:
+                stats['unchanged'] += 1
+                continue
+            stats['new' if old_hash is None else 'changed'] += 1
+            changes.append((url, page_hash))
+        for url in previous.keys() - current.keys():
+            stats['removed'] += 1
+            changes.append((url, None))
+
+        with self.db:
+            snapshot = self.db.execute(
+                "INSERT INTO snapshots (site, taken_at) VALUES (?, ?)",
+                (site, time.time() if taken_at is None else taken_at),
+            ).lastrowid
+            self.db.executemany("INSERT OR IGNORE INTO blobs (hash, data) VALUES (?, ?)", blobs)
+            self.db.executemany(
+                "INSERT INTO changes (url, snapshot, hash) VALUES (?, ?, ?)",
+                ((url, snapshot, page_hash) for url, page_hash in changes),
+            )
+        return stats
+
+    def sites(self) -> List[str]:
+        """Return every site with a snapshot in the store, sorted."""
+        return [site for site, in self.db.execute("SELECT DISTINCT site FROM snapshots ORDER BY site")]
+
+    def _load(self, page_hash: str) -> Dict[str, Any]:
+        """Return the page stored under a version hash."""
+        data = self.db.execute("SELECT data FROM blobs WHERE hash = ?", (page_hash,)).fetchone()[0]
+        return json.loads(zlib.decompress(data).decode('utf-8'))
+
+    def _snapshot_at(self, when: float) -> Optional[int]:
+        """Return the id of the last snapshot taken at or before ``when``."""
+        return self.db.execute("SELECT MAX(id) FROM snapshots WHERE taken_at <= ?", (when,)).fetchone()[0]
+
+    def as_of(self, when: float, site: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Rebuild every page as it stood at ``when``, sorted by URL."""
+        snapshot = self._snapshot_at(when)
+        if snapshot is None:
+            return []
+        state = self._state(snapshot, site)
+        return [self._load(state[url]) for url in sorted(state)]
+
+    def page_as_of(self, url: str, when: float) -> Optional[Dict[str, Any]]:
+        """Return ``url`` as it stood at ``when``, or None if it did not exist then."""
+        row = self.db.execute(
+            "SELECT c.hash FROM changes c JOIN snapshots s ON s.id = c.snapshot "
+            "WHERE c.url = ? AND s.taken_at <= ? ORDER BY c.snapshot DESC LIMIT 1",
+            (url, when),
+        ).fetchone()
+        return None if row is None or row[0] is None else self._load(row[0])
+
+    def history(self, url: str) -> List[Tuple[float, Optional[Dict[str, Any]]]]:
+        """Return every version of ``url`` as ``(taken_at, page)``, with None where it was removed."""
+        rows = self.db.execute(
+            "SELECT s.taken_at, c.hash FROM changes c JOIN snapshots s ON s.id = c.snapshot "
+            "WHERE c.url = ? ORDER BY c.snapshot",
+            (url,),
+        ).fetchall()
+        return [(taken_at, None if page_hash is None else self._load(page_hash)) for taken_at, page_hash in rows]
+
+def parse_when(value: str) -> float:
+    """Parse an ISO date or date-time in local time; a bare date means the end of that day."""
+    moment = datetime.fromisoformat(value)
+    if len(value) == 10:
+        moment += timedelta(days=1, microseconds=-1)
+    return moment.timestamp()
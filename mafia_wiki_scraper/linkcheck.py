@@ -0,0 +1,214 @@
+"""Fast link checking for site health audits."""
+import asyncio
+import time
+from typing import Dict, List, Optional, Set, Tuple
+from urllib.parse import urlparse
+
+import aiohttp
+
+from .extract import Extraction
+from .politeness import DisallowedByRobots
+from .scraper import WikiScraper
+
+# Links with other schemes (mailto:, javascript:, ...) are not checked
+CHECKED_SCHEMES = ('http', 'https')
+
+ROBOTS_ERROR = "disallowed by robots.txt"
+
+# Each link is one cheap request, so audits default to ten times the crawl rate per host
+DEFAULT_CHECK_RATE = 50.0
+
+class LinkResult:
+    """Outcome of checking one URL."""
+
+    __slots__ = ('url', 'status', 'chain', 'final_url', 'elapsed', 'error', 'method')
+
+    def __init__(self, url: str, status: Optional[int] = None, chain: Optional[List[Tuple[str, int]]] = None,
+                 final_url: Optional[str] = None, elapsed: float = 0.0, error: Optional[str] = None,
+                 method: str = 'GET'):
+        """Store the outcome; ``chain`` lists the ``(url, status)`` redirect hops before ``final_url``."""
+        self.url = url
+        self.status = status
+        self.chain = chain or []
+        self.final_url = final_url or url
+        self.elapsed = elapsed
+        self.error = error
+        self.method = method
+
+    @property
+    def broken(self) -> bool:
+        """Return whether the link failed or ended in an error status."""
+        return self.error is not None or self.status is None or self.status >= 400
+
+    def to_dict(self) -> Dict:
+        """Return the result in report form."""
+        return {
+            "url": self.url,
+            "status": self.status,
+            "redirects": [{"url": url, "status": status} for url, status in self.chain],
+            "final_url": self.final_url,
+            "elapsed": round(self.elapsed, 3),
+            "error": self.error,
+            "method": self.method,
+        }
+
+class LinkReport:
+    """Every checked link, with the pages that link to it."""
+
+    def __init__(self):
+        """Start with nothing checked."""
+        self.results: Dict[str, LinkResult] = {}
+        self.sources: Dict[str, Set[str]] = {}
+        self.pages = 0
+        self.elapsed = 0.0
+
+    def broken(self) -> List[LinkResult]:
+        """Return the broken links, by URL."""
+        return [result for _, result in sorted(self.results.items()) if result.broken]
+
+    def redirects(self) -> List[LinkResult]:
+        """Return the links that redirect, by URL."""
+        return [result for _, result in sorted(self.results.items()) if result.chain]
+
+    def slow(self, threshold: float) -> List[LinkResult]:
+        """Return the links slower than ``threshold`` seconds, slowest first."""
+        return sorted((result for result in self.results.values() if result.elapsed > threshold),
+                      key=lambda result: -result.elapsed)
+
+    def to_dict(self, threshold: float) -> Dict:
+        """Return the report as JSON-ready data."""
+        def entry(result: LinkResult) -> Dict:
+            """Add the linking pages to a result."""
+            return dict(result.to_dict(), linked_from=sorted(self.sources.get(result.url, ())))
+
+        return {
+            "checked": len(self.results),
+            "pages": self.pages,
+            "elapsed": round(self.elapsed, 3),
+            "broken": [entry(result) for result in self.broken()],
+            "redirects": [entry(result) for result in self.redirects()],
+            "slow": [entry(result) for result in self.slow(threshold)],
+        }
+
+class LinkChecker:
+    """Validate every link on the pages a scraper's link discovery reaches.
+
+    The site is crawled by the scraper's own ``get_all_internal_links``, so
+    redirects, fragments and the content-type and size guards work as in a
+    scrape, and every link on each page it reads is recorded with that page
+    as a source. Pages discovery read need no second request. Every other
+    target, such as a page that failed or a link known to redirect, is
+    checked with HEAD, falling back to GET when HEAD fails, and its redirect
+    chain recorded. Links off the site are only checked when ``external`` is
+    set. Requests go through the scraper's session and scheduler, so its
+    connection limits, rate limits and robots.txt rules apply.
+    """
+
+    def __init__(self, scraper: WikiScraper, external: bool = False, concurrency: int = 50,
+                 timeout: float = 10.0):
+        """Configure the checker around ``scraper``."""
+        self.scraper = scraper
+        self.external = external
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.report = LinkReport()
+        # Pages discovery read, with how long each took to fetch
+        self.read: Dict[str, float] = {}
+
+    def record(self, url: str, extraction: Extraction, elapsed: float) -> None:
+        """Record the links on a page discovery read, as a ``discovery_callbacks`` entry."""
+        self.read[url] = elapsed
+        for link in self.scraper.page_links(extraction, url):
+            self.report.sources.setdefault(link, set()).add(url)
+
+    async def _request(self, url: str, method: str) -> LinkResult:
+        """Request ``url`` once and return its result."""
+        scraper = self.scraper
+        start = time.perf_counter()
+        try:
+            if scraper.scheduler:
+                await scraper.scheduler.acquire(url, scraper.session)
+            start = time.perf_counter()
+            async with scraper.session.request(method, url, timeout=self.timeout) as response:
+                chain = [(str(hop.url), hop.status) for hop in getattr(response, 'history', ())]
+                result = LinkResult(url, response.status, chain, str(response.url), method=method)
+        except DisallowedByRobots:
+            result = LinkResult(url, error=ROBOTS_ERROR, method=method)
+        except asyncio.TimeoutError:
+            result = LinkResult(url, error="timeout", method=method)
+        except aiohttp.ClientError as e:
+            result = LinkResult(url, error=str(e) or type(e).__name__, method=method)
+        except Exception as e:
+            # Anything else, such as a URL aiohttp cannot request, is this link's failure, not the audit's
+            result = LinkResult(url, error=f"{type(e).__name__}: {e}", method=method)
+        result.elapsed = time.perf_counter() - start
+        return result
+
+    async def check(self, url: str) -> None:
+        """Check one link with HEAD, confirming a failure with GET."""
+        async with self.semaphore:
+            result = await self._request(url, 'HEAD')
+            if result.broken and result.error != ROBOTS_ERROR:
+                # Plenty of servers reject or mishandle HEAD, so confirm with GET
+                result = await self._request(url, 'GET')
+        self.report.results[url] = result
+
+    def needs_check(self, url: str, bases: Tuple[str, ...]) -> bool:
+        """Return whether a link is checked, recording a result for those that need no request.
+
+        Targets that cannot even be parsed are reported as broken.
+        """
+        try:
+            scheme = urlparse(url).scheme
+        except ValueError as e:
+            self.report.results[url] = LinkResult(url, error=f"invalid URL: {e}")
+            return False
+        if scheme not in CHECKED_SCHEMES or not (self.external or url.startswith(bases)):
+            return False
+        if url in self.read and self.scraper.redirects.resolve(url) == url:
+            self.report.results[url] = LinkResult(url, 200, elapsed=self.read[url])
+            return False
+        return True
+
+    async def run(self) -> LinkReport:
+        """Check every link reachable from the base URL and return the report."""
+        start = time.perf_counter()
+        base_url = self.scraper.base_url
+        self.scraper.discovery_callbacks.append(self.record)
+        try:
+            async for _ in self.scraper.get_all_internal_links():
+                pass
+        finally:
+            self.scraper.discovery_callbacks.remove(self.record)
+        self.report.pages = len(self.read)
+
+        # Links to the base URL as given stay internal if the crawl moved to where it redirects
+        bases = (base_url, self.scraper.base_url)
+        links = sorted(set(self.report.sources) | {base_url})
+        await asyncio.gather(*(self.check(url) for url in links if self.needs_check(url, bases)))
+        self.report.sources = {url: sources for url, sources in self.report.sources.items()
+                               if url in self.report.results}
+        self.report.elapsed = time.perf_counter() - start
+        return self.report
+
+def format_report(report: LinkReport, threshold: float, limit: int = 10) -> str:
+    """Render a report as text, listing at most ``limit`` linking pages per broken link."""
+    lines = [f"Checked {len(report.results)} links on {report.pages} pages in {report.elapsed:.1f}s"]
+    broken = report.broken()
+    lines.append(f"Broken links: {len(broken)}")
+    for result in broken:
+        sources = sorted(report.sources.get(result.url, ()))
+        shown = ", ".join(sources[:limit]) + (f" and {len(sources) - limit} more" if len(sources) > limit else "")
+        lines.append(f"  {result.error or result.status}  {result.url}")
+        if shown:
+            lines.append(f"      linked from: {shown}")
+    redirects = report.redirects()
+    lines.append(f"Redirects: {len(redirects)}")
+    for result in redirects:
+        hops = " -> ".join(f"{url} ({status})" for url, status in result.chain)
+        lines.append(f"  {hops} -> {result.final_url} ({result.status})")
+    slow = report.slow(threshold)
+    lines.append(f"Slower than {threshold:g}s: {len(slow)}")
+    for result in slow:
+        lines.append(f"  {result.elapsed:6.2f}s  {result.url}")
+    return "\n".join(lines)
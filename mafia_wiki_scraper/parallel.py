@@ -0,0 +1,153 @@
+"""Crawl one site with several processes sharing an on-disk frontier."""
+import asyncio
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+from .frontier import DONE, FAILED, Frontier
+from .politeness import HostScheduler
+from .redirects import RedirectMap
+from .scraper import DEFAULT_MAX_PAGE_SIZE, WikiScraper
+
+def worker_output(directory: str, worker: int) -> str:
+    """Return the JSONL file a worker writes its pages to."""
+    return os.path.join(directory, f"worker-{worker}.jsonl")
+
+async def crawl_worker(frontier_path: str, base_url: str, worker: int, output_file: str,
+                       max_concurrent: int = 5, rate: Optional[float] = None,
+                       respect_robots: bool = True, structured: bool = False,
+                       max_page_size: int = DEFAULT_MAX_PAGE_SIZE, redirects: Optional[str] = None) -> int:
+    """Claim, fetch and expand URLs from the frontier until the crawl is finished.
+
+    Each page is fetched once; its links go into the frontier and its
+    record is appended to ``output_file``. Known redirects are read from
+    the ``redirects`` file but not written back, as every worker would
+    overwrite the others'. Returns the number of pages written.
+    """
+    scheduler = HostScheduler(rate=rate, respect_robots=respect_robots) if rate else None
+    written = 0
+    with Frontier(frontier_path) as frontier, open(output_file, 'a', encoding='utf-8') as output:
+        async with WikiScraper(base_url, max_concurrent=max_concurrent, scheduler=scheduler,
+                               structured=structured, max_page_size=max_page_size,
+                               redirects=RedirectMap(redirects), name=f"worker {worker}") as scraper:
+            while True:
+                urls = frontier.claim(worker, max_concurrent * 2)
+                if not urls:
+                    if frontier.finished():
+                        return written
+                    await asyncio.sleep(0.05)
+                    continue
+
+                results = await asyncio.gather(*(scraper.crawl_page(url) for url in urls))
+                links = set()
+                done, failed = [], []
+                for url, (page, page_links) in zip(urls, results):
+                    links.update(page_links)
+                    if page is None:
+                        failed.append(url)
+                        continue
+                    output.write(json.dumps(page.to_dict(), ensure_ascii=False) + "\n")
+                    done.append(url)
+                output.flush()
+                # New links must be queued before their source completes, or another
+                # worker could see an empty frontier and stop early
+                frontier.add(links)
+                frontier.complete(done, DONE)
+                frontier.complete(failed, FAILED)
+                written += len(done)
+
+async def resolve_base_url(base_url: str, redirects: RedirectMap, rate: Optional[float] = None,
+                           respect_robots: bool = True) -> str:
+    """Return where a crawl of ``base_url`` really starts, following a redirect of the base URL.
+
+    A redirect already in ``redirects`` costs no request; otherwise the base
+    URL is fetched once and any redirect is recorded there.
+    """
+    scheduler = HostScheduler(rate=rate, respect_robots=respect_robots) if rate else None
+    async with WikiScraper(base_url, scheduler=scheduler, redirects=redirects) as scraper:
+        if scraper.base_url == base_url:
+            try:
+                await scraper.fetch(base_url)
+            except Exception as e:
+                # The workers report the base URL's failure when they fetch it
+                scraper.log(f"Could not check {base_url} for redirects: {str(e) or type(e).__name__}")
+        return scraper.base_url
+
+def worker_main(frontier_path: str, base_url: str, worker: int, output_file: str, options: Dict) -> None:
+    """Entry point of a worker process."""
+    pages = asyncio.run(crawl_worker(frontier_path, base_url, worker, output_file, **options))
+    print(f"[worker {worker}] Wrote {pages} pages")
+
+def merge_outputs(paths: List[str]) -> List[Dict]:
+    """Merge worker outputs into one list of pages sorted by URL.
+
+    A page can appear twice if a worker died after writing it but before
+    completing it; the later copy wins.
+    """
+    pages: Dict[str, Dict] = {}
+    for path in paths:
+        if not os.path.exists(path):
+            continue
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    page = json.loads(line)
+                    pages[page['url']] = page
+    return [pages[url] for url in sorted(pages)]
+
+def crawl_parallel(base_url: str, workers: int, work_dir: Optional[str] = None, resolve: bool = True,
+                   **options) -> List[Dict]:
+    """Crawl a site with ``workers`` processes and return the merged pages.
+
+    Keyword options are passed to each worker's ``crawl_worker``. A worker
+    that exits abnormally has its claimed URLs released so the others pick
+    them up. If the base URL redirects, it is resolved once up front, so
+    every worker crawls under its target rather than only the one that
+    happens to fetch it; the redirect is saved to the ``redirects`` option's
+    file when given. Pass ``resolve=False`` for a base URL that has already
+    been through ``resolve_base_url``.
+    """
+    if resolve:
+        redirects = RedirectMap(options.get('redirects'))
+        base_url = asyncio.run(resolve_base_url(base_url, redirects, options.get('rate'),
+                                                options.get('respect_robots', True)))
+        redirects.save()
+    context = multiprocessing.get_context('spawn')
+    with tempfile.TemporaryDirectory(dir=work_dir) as directory:
+        frontier_path = os.path.join(directory, "frontier.sqlite")
+        with Frontier(frontier_path) as frontier:
+            frontier.add([base_url])
+
+            def spawn(worker: int) -> multiprocessing.process.BaseProcess:
+                """Start the process for one worker."""
+                process = context.Process(
+                    target=worker_main,
+                    args=(frontier_path, base_url, worker, worker_output(directory, worker), options),
+                )
+                process.start()
+                return process
+
+            start = time.perf_counter()
+            processes = {worker: spawn(worker) for worker in range(1, workers + 1)}
+            restarts = 0
+            while processes:
+                for worker, process in list(processes.items()):
+                    process.join(timeout=0.1)
+                    if process.exitcode is None:
+                        continue
+                    del processes[worker]
+                    if process.exitcode != 0:
+                        released = frontier.release(worker)
+                        print(f"[worker {worker}] Exited with code {process.exitcode}; "
+                              f"released {released} claimed URLs")
+                        if restarts < workers and not frontier.finished():
+                            restarts += 1
+                            processes[worker] = spawn(worker)
+            elapsed = time.perf_counter() - start
+            print(f"Crawled {frontier.count(DONE)} pages with {workers} workers in {elapsed:.1f}s "
+                  f"({frontier.count(FAILED)} failed)")
+
+        return merge_outputs([worker_output(directory, worker) for worker in range(1, workers + 1)])
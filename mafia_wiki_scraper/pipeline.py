@@ -0,0 +1,222 @@
+"""Staged processing pipeline connected by bounded queues."""
+import asyncio
+import inspect
+import multiprocessing
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, AsyncIterable, AsyncIterator, Callable, Dict, Iterable, List, Optional, Union
+
+# Where a stage runs its function: on the event loop, in a thread pool or in worker processes
+EXECUTORS = ('loop', 'thread', 'process')
+DEFAULT_QUEUE_SIZE = 64
+
+# Marks the end of a stage's input; one is queued per worker
+_DONE = object()
+
+class Stage:
+    """One step of a pipeline: a function applied to every item by its own workers.
+
+    The function returns the item to pass on, or None to drop it. On the
+    ``loop`` executor it may be a coroutine function. ``process`` stages
+    need a function that can be pickled, such as a module-level function
+    or a ``functools.partial`` of one.
+    """
+
+    def __init__(self, name: str, fn: Callable[[Any], Any], concurrency: int = 1, executor: str = 'loop'):
+        """Describe the stage; ``concurrency`` workers take items from its queue."""
+        if executor not in EXECUTORS:
+            raise ValueError(f"Unsupported executor: {executor}")
+        self.name = name
+        self.fn = fn
+        self.concurrency = max(1, concurrency)
+        self.executor = executor
+
+class StageStats:
+    """Counters for one stage, updated while the pipeline runs."""
+
+    def __init__(self, stage: Stage, queue: asyncio.Queue):
+        """Start counting for ``stage``, whose input is ``queue``."""
+        self.name = stage.name
+        self.concurrency = stage.concurrency
+        self.executor = stage.executor
+        self.queue = queue
+        self.processed = 0
+        self.emitted = 0
+        self.errors = 0
+        self.busy = 0.0
+        self.max_depth = 0
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+
+    @property
+    def depth(self) -> int:
+        """Return how many items are waiting for this stage."""
+        return self.queue.qsize()
+
+    @property
+    def elapsed(self) -> float:
+        """Return the seconds since the pipeline started, up to when this stage finished."""
+        return (self.finished or time.perf_counter()) - self.started
+
+    @property
+    def throughput(self) -> float:
+        """Return the items processed per second."""
+        return self.processed / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def utilisation(self) -> float:
+        """Return the fraction of the workers' time spent processing items."""
+        return self.busy / (self.elapsed * self.concurrency) if self.elapsed else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the counters as JSON-ready data."""
+        return {
+            'stage': self.name,
+            'executor': self.executor,
+            'concurrency': self.concurrency,
+            'processed': self.processed,
+            'emitted': self.emitted,
+            'errors': self.errors,
+            'throughput': round(self.throughput, 2),
+            'utilisation': round(self.utilisation, 3),
+            'depth': self.depth,
+            'max_depth': self.max_depth,
+        }
+
+    def __str__(self) -> str:
+        """Summarise the stage on one line."""
+        return (f"{self.name}: {self.processed} in, {self.emitted} out, {self.errors} errors, "
+                f"{self.throughput:.1f}/s, {self.utilisation:.0%} busy, "
+                f"queue {self.depth} (max {self.max_depth})")
+
+class Pipeline:
+    """Run items through stages connected by bounded queues.
+
+    Every stage reads from a queue of at most ``queue_size`` items, so a
+    slow stage makes the stages before it wait rather than letting items
+    pile up in memory. An item whose stage function raises is logged,
+    counted and dropped; the rest carry on. With ``report_interval`` set,
+    each stage's throughput and queue depth are logged that often.
+    """
+
+    def __init__(self, stages: List[Stage], queue_size: int = DEFAULT_QUEUE_SIZE,
+                 log: Callable[[str], None] = print, report_interval: Optional[float] = None):
+        """Connect ``stages`` in order."""
+        if not stages:
+            raise ValueError("A pipeline needs at least one stage")
+        self.stages = stages
+        self.queue_size = max(1, queue_size)
+        self.log = log
+        self.report_interval = report_interval
+        self.stats: List[StageStats] = []
+
+    def _executor(self, stage: Stage) -> Optional[Executor]:
+        """Create the pool a stage's function runs in, or None for the event loop."""
+        if stage.executor == 'thread':
+            return ThreadPoolExecutor(stage.concurrency, thread_name_prefix=stage.name)
+        if stage.executor == 'process':
+            return ProcessPoolExecutor(stage.concurrency, mp_context=multiprocessing.get_context('spawn'))
+        return None
+
+    async def stream(self, items: Union[Iterable, AsyncIterable]) -> AsyncIterator[Any]:
+        """Feed ``items`` through the stages and yield what comes out of the last one."""
+        loop = asyncio.get_running_loop()
+        queues = [asyncio.Queue(self.queue_size) for _ in range(len(self.stages) + 1)]
+        self.stats = [StageStats(stage, queue) for stage, queue in zip(self.stages, queues)]
+        pools = [self._executor(stage) for stage in self.stages]
+        # The last queue holds output until the caller takes it; one end marker follows
+        workers_after = [stage.concurrency for stage in self.stages[1:]] + [1]
+
+        async def put(index: int, item: Any) -> None:
+            """Queue an item for stage ``index``, waiting while the queue is full."""
+            await queues[index].put(item)
+            if index < len(self.stats):
+                self.stats[index].max_depth = max(self.stats[index].max_depth, queues[index].qsize())
+
+        async def feed() -> None:
+            """Queue the input items, then one end marker per first-stage worker."""
+            try:
+                if hasattr(items, '__aiter__'):
+                    async for item in items:
+                        await put(0, item)
+                else:
+                    for item in items:
+                        await put(0, item)
+            finally:
+                for _ in range(self.stages[0].concurrency):
+                    await queues[0].put(_DONE)
+
+        async def call(index: int, item: Any) -> Any:
+            """Apply stage ``index`` to an item on its executor."""
+            stage = self.stages[index]
+            if pools[index] is None:
+                result = stage.fn(item)
+                return await result if inspect.isawaitable(result) else result
+            return await loop.run_in_executor(pools[index], stage.fn, item)
+
+        async def work(index: int) -> None:
+            """Process items from stage ``index``'s queue until its end marker."""
+            stats = self.stats[index]
+            while True:
+                item = await queues[index].get()
+                if item is _DONE:
+                    return
+                start = time.perf_counter()
+                try:
+                    result = await call(index, item)
+                except Exception as e:
+                    stats.errors += 1
+                    self.log(f"{stats.name} failed: {str(e) or type(e).__name__}")
+                    continue
+                finally:
+                    stats.busy += time.perf_counter() - start
+                    stats.processed += 1
+                if result is not None:
+                    stats.emitted += 1
+                    await put(index + 1, result)
+
+        async def run_stage(index: int) -> None:
+            """Run a stage's workers, then tell the next stage no more items are coming."""
+            try:
+                await asyncio.gather(*(work(index) for _ in range(self.stages[index].concurrency)))
+            finally:
+                self.stats[index].finished = time.perf_counter()
+                for _ in range(workers_after[index]):
+                    await queues[index + 1].put(_DONE)
+
+        async def report() -> None:
+            """Log every stage's progress every ``report_interval`` seconds."""
+            while True:
+                await asyncio.sleep(self.report_interval)
+                self.log(self.summary())
+
+        tasks = [asyncio.ensure_future(feed())]
+        tasks.extend(asyncio.ensure_future(run_stage(index)) for index in range(len(self.stages)))
+        if self.report_interval:
+            tasks.append(asyncio.ensure_future(report()))
+        try:
+            while True:
+                item = await queues[-1].get()
+                if item is _DONE:
+                    break
+                yield item
+            # Surface anything that went wrong outside a stage function
+            for task in tasks[:len(self.stages) + 1]:
+                await task
+        finally:
+            for task in tasks:
+                task.cancel()
+            for pool in pools:
+                if pool is not None:
+                    pool.shutdown(wait=False, cancel_futures=True)
+
+    async def run(self, items: Union[Iterable, AsyncIterable]) -> int:
+        """Feed ``items`` through the stages, discarding the output, and return how many came out."""
+        count = 0
+        async for _ in self.stream(items):
+            count += 1
+        return count
+
+    def summary(self) -> str:
+        """Describe every stage's progress, one line each."""
+        return "\n".join(f"  {stats}" for stats in self.stats)
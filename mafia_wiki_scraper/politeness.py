@@ -0,0 +1,144 @@
+"""Per-host request scheduling with token buckets, robots.txt and Retry-After."""
+import asyncio
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+
+import aiohttp
+
+# Responses that ask the client to slow down and try again later
+RETRY_STATUSES = (429, 503)
+
+class DisallowedByRobots(Exception):
+    """Raised when robots.txt forbids fetching a URL."""
+
+def origin_of(url: str) -> str:
+    """Return the ``scheme://host[:port]`` origin of a URL."""
+    parsed = urlparse(url)
+    return f"{parsed.scheme}://{parsed.netloc}"
+
+def parse_retry_after(value: Optional[str], default: float = 1.0) -> float:
+    """Return the delay in seconds requested by a Retry-After header."""
+    if not value:
+        return default
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return default
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+class TokenBucket:
+    """Token bucket handing out send slots at ``rate`` per second.
+
+    Tokens may go negative: each reservation queues behind the ones before
+    it, so waiters are served in order without needing a lock.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        """Create a full bucket."""
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        """Add the tokens accrued since the last update."""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self) -> float:
+        """Take a token and return how long to wait before using it."""
+        self._refill()
+        self.tokens -= 1
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def pause(self, seconds: float) -> None:
+        """Push every future slot back by at least ``seconds``."""
+        self._refill()
+        self.tokens = min(self.tokens, 0.0) - seconds * self.rate
+
+class HostScheduler:
+    """Rate-limit requests per origin and honour robots.txt.
+
+    One scheduler can be shared by several scrapers: each origin gets its own
+    bucket, so a slow or throttled host never holds up requests to another.
+    """
+
+    def __init__(self, rate: float = 5.0, burst: int = 5, user_agent: str = '*', respect_robots: bool = True):
+        """Configure the default per-host rate and robots.txt handling."""
+        self.rate = rate
+        self.burst = burst
+        self.user_agent = user_agent
+        self.respect_robots = respect_robots
+        self.buckets: Dict[str, TokenBucket] = {}
+        self.robots: Dict[str, Optional[RobotFileParser]] = {}
+        self._robots_tasks: Dict[str, asyncio.Task] = {}
+
+    def bucket(self, origin: str) -> TokenBucket:
+        """Return the token bucket for an origin, creating it on first use."""
+        if origin not in self.buckets:
+            self.buckets[origin] = TokenBucket(self.rate, self.burst)
+        return self.buckets[origin]
+
+    async def _fetch_robots(self, origin: str, session: aiohttp.ClientSession) -> Optional[RobotFileParser]:
+        """Download and parse an origin's robots.txt, applying its crawl delay."""
+        try:
+            async with session.get(f"{origin}/robots.txt") as response:
+                if response.status != 200:
+                    return None
+                text = await response.text()
+        except Exception as e:
+            print(f"Could not fetch robots.txt for {origin}: {str(e)}")
+            return None
+
+        parser = RobotFileParser()
+        parser.parse(text.splitlines())
+        delay = parser.crawl_delay(self.user_agent)
+        request_rate = parser.request_rate(self.user_agent)
+        rate = self.rate
+        if delay:
+            rate = min(rate, 1 / float(delay))
+        if request_rate:
+            rate = min(rate, request_rate.requests / request_rate.seconds)
+        if rate != self.rate:
+            self.buckets[origin] = TokenBucket(rate, 1)
+        return parser
+
+    async def allowed(self, url: str, session: aiohttp.ClientSession) -> bool:
+        """Return whether robots.txt lets us fetch ``url``; fetched once per origin."""
+        if not self.respect_robots:
+            return True
+        origin = origin_of(url)
+        if origin not in self.robots:
+            if origin not in self._robots_tasks:
+                self._robots_tasks[origin] = asyncio.ensure_future(self._fetch_robots(origin, session))
+            self.robots[origin] = await self._robots_tasks[origin]
+        parser = self.robots[origin]
+        return parser is None or parser.can_fetch(self.user_agent, url)
+
+    async def acquire(self, url: str, session: aiohttp.ClientSession) -> None:
+        """Wait for a send slot on the URL's origin.
+
+        Raises DisallowedByRobots if robots.txt forbids the URL.
+        """
+        if not await self.allowed(url, session):
+            raise DisallowedByRobots(f"Disallowed by robots.txt: {url}")
+        delay = self.bucket(origin_of(url)).reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def defer(self, url: str, retry_after: Optional[str] = None) -> float:
+        """Back off an origin after a 429/503, returning the delay applied."""
+        delay = parse_retry_after(retry_after)
+        self.bucket(origin_of(url)).pause(delay)
+        return delay
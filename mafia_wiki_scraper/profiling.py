@@ -0,0 +1,183 @@
+"""Per-phase CPU and memory profiling of a crawl.
+
+Phases nest: extraction runs inside discovery and fetching, and columnar
+output is written inside fetching. Time and allocations are charged to the
+innermost active phase, so discovery and fetching show the cost of network
+handling and scheduling with parsing split out into ``extraction``.
+
+Only one crawl can be profiled at a time, since phases are process-wide.
+"""
+import cProfile
+import io
+import os
+import pstats
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from typing import Dict, Iterator, List, Optional
+
+PROFILE_MODES = ('cpu', 'mem')
+PHASES = ('discovery', 'fetching', 'extraction', 'output')
+
+class PhaseStats:
+    """Memory figures for one phase."""
+
+    __slots__ = ('calls', 'retained', 'peak', 'start', 'end')
+
+    def __init__(self):
+        """Start with no recorded calls."""
+        self.calls = 0
+        self.retained = 0
+        self.peak = 0
+        self.start: Optional[tracemalloc.Snapshot] = None
+        self.end: Optional[tracemalloc.Snapshot] = None
+
+class PhaseProfiler:
+    """Capture cProfile stats or tracemalloc figures separately for each crawl phase.
+
+    In ``cpu`` mode each phase has its own ``cProfile.Profile``; entering a
+    nested phase pauses the outer one. In ``mem`` mode outermost phases take
+    tracemalloc snapshots at entry and exit. Nested phases run once per page,
+    where a snapshot would cost more than the work measured, so they only
+    record retained and peak traced memory.
+    """
+
+    enabled = True
+
+    def __init__(self, mode: str, output_dir: str = os.path.join("output", "profile"), top: int = 15):
+        """Configure the profiler; ``start()`` begins tracing memory in ``mem`` mode."""
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode: {mode}")
+        self.mode = mode
+        self.output_dir = output_dir
+        self.top = top
+        self.profiles: Dict[str, cProfile.Profile] = {}
+        self.stats: Dict[str, PhaseStats] = {}
+        self.stack: List[str] = []
+        self.outer_peak = 0
+
+    def start(self) -> None:
+        """Begin tracing allocations in ``mem`` mode."""
+        if self.mode == 'mem' and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Charge the enclosed block to phase ``name``."""
+        if self.mode == 'cpu':
+            with self._cpu_phase(name):
+                yield
+        else:
+            with self._mem_phase(name):
+                yield
+
+    @contextmanager
+    def _cpu_phase(self, name: str) -> Iterator[None]:
+        """Profile the block with the phase's own profiler, pausing the outer one."""
+        profile = self.profiles.setdefault(name, cProfile.Profile())
+        outer = self.profiles[self.stack[-1]] if self.stack else None
+        if outer is not None:
+            outer.disable()
+        self.stack.append(name)
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            self.stack.pop()
+            if outer is not None:
+                outer.enable()
+
+    @contextmanager
+    def _mem_phase(self, name: str) -> Iterator[None]:
+        """Record retained and peak traced memory, with snapshots for outermost phases."""
+        stats = self.stats.setdefault(name, PhaseStats())
+        stats.calls += 1
+        nested = bool(self.stack)
+        before, peak = tracemalloc.get_traced_memory()
+        if nested:
+            # Keep the outer phase's peak before resetting it for this one
+            self.outer_peak = max(self.outer_peak, peak)
+        else:
+            self.outer_peak = 0
+            stats.start = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        self.stack.append(name)
+        try:
+            yield
+        finally:
+            self.stack.pop()
+            after, peak = tracemalloc.get_traced_memory()
+            stats.retained += after - before
+            if nested:
+                stats.peak = max(stats.peak, peak - before)
+                self.outer_peak = max(self.outer_peak, peak)
+            else:
+                stats.peak = max(stats.peak, max(self.outer_peak, peak) - before)
+                stats.end = tracemalloc.take_snapshot()
+
+    def close(self) -> str:
+        """Stop tracing, save per-phase files and return the summary report."""
+        os.makedirs(self.output_dir, exist_ok=True)
+        sections = []
+        for name in sorted(self.profiles if self.mode == 'cpu' else self.stats, key=phase_order):
+            sections.append(self._cpu_report(name) if self.mode == 'cpu' else self._mem_report(name))
+        if self.mode == 'mem' and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        return "\n".join(sections)
+
+    def _cpu_report(self, name: str) -> str:
+        """Save a phase's pstats file and return its top functions."""
+        path = os.path.join(self.output_dir, f"{name}.pstats")
+        profile = self.profiles[name]
+        profile.dump_stats(path)
+        stream = io.StringIO()
+        pstats.Stats(profile, stream=stream).sort_stats('cumulative').print_stats(self.top)
+        return f"=== CPU profile: {name} (saved to {path}) ===\n{stream.getvalue().strip()}\n"
+
+    def _mem_report(self, name: str) -> str:
+        """Save a phase's end snapshot and return its memory figures and top allocation sites."""
+        stats = self.stats[name]
+        lines = [
+            f"=== Memory: {name}: {stats.calls} calls, {format_bytes(stats.retained)} retained, "
+            f"peak {format_bytes(stats.peak)} ==="
+        ]
+        if stats.start is not None and stats.end is not None:
+            path = os.path.join(self.output_dir, f"{name}.tracemalloc")
+            stats.end.dump(path)
+            lines[0] += f"\nSnapshot saved to {path}"
+            for difference in stats.end.compare_to(stats.start, 'lineno')[:self.top]:
+                lines.append(f"  {difference}")
+        return "\n".join(lines) + "\n"
+
+class NullProfiler:
+    """A profiler that measures nothing, used when profiling is off."""
+
+    enabled = False
+
+    def start(self) -> None:
+        """Do nothing."""
+
+    def phase(self, name: str):
+        """Return a context manager that does nothing."""
+        return _NULL_CONTEXT
+
+    def close(self) -> str:
+        """Return an empty report."""
+        return ""
+
+def phase_order(name: str) -> int:
+    """Sort known phases in crawl order, with any others after them."""
+    return PHASES.index(name) if name in PHASES else len(PHASES)
+
+def format_bytes(size: float) -> str:
+    """Return a signed byte count in human units, e.g. ``+1.5 MB``."""
+    sign = '-' if size < 0 else '+'
+    size = abs(size)
+    for unit in ('B', 'KB', 'MB'):
+        if size < 1024:
+            return f"{sign}{size:.1f} {unit}"
+        size /= 1024
+    return f"{sign}{size:.1f} GB"
+
+_NULL_CONTEXT = nullcontext()
+NULL_PROFILER = NullProfiler()
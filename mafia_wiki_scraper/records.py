@@ -0,0 +1,70 @@
+"""Compact in-memory record of a scraped page."""
+import sys
+from typing import Any, Dict, Iterator, Optional, Union
+
+class PageRecord:
+    """One scraped page, stored without a per-page dict.
+
+    The URL is interned so it is the same string object as the scraper's
+    link sets. Output keys (``url``, ``title``, ``content`` and, for
+    structured crawls, ``document``) can still be read with ``page['title']``;
+    ``to_dict()`` gives the JSON output form.
+    """
+
+    __slots__ = ('url', 'title', 'content', 'status', 'fetched_at', 'content_hash', 'size', 'document')
+
+    def __init__(self, url: str, title: Optional[str], content: str, status: int = 200,
+                 fetched_at: float = 0.0, content_hash: Optional[str] = None, size: int = 0,
+                 document: Optional[Dict] = None):
+        """Store the page's fields."""
+        self.url = sys.intern(url)
+        self.title = title
+        self.content = content
+        self.status = status
+        self.fetched_at = fetched_at
+        self.content_hash = content_hash
+        self.size = size
+        self.document = document
+
+    def keys(self) -> Iterator[str]:
+        """Yield the keys present in the output form."""
+        yield from ('url', 'title', 'content')
+        if self.document is not None:
+            yield 'document'
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the page in JSON output form."""
+        return {key: getattr(self, key) for key in self.keys()}
+
+    def __getitem__(self, key: str) -> Any:
+        """Read an output field by key, as with the dicts pages used to be."""
+        if key not in self.keys():
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Read an output field by key, or ``default`` if it is absent."""
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key: str) -> bool:
+        """Return whether ``key`` is an output field of this page."""
+        return key in self.keys()
+
+    def __eq__(self, other: object) -> bool:
+        """Compare output forms, so a re-fetch of the same page is equal whenever it was fetched."""
+        if isinstance(other, (PageRecord, dict)):
+            return self.to_dict() == as_dict(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        """Show the URL and title."""
+        return f"PageRecord(url={self.url!r}, title={self.title!r})"
+
+def as_dict(page: Union[PageRecord, Dict[str, Any]]) -> Dict[str, Any]:
+    """Return a page in JSON output form, whether it is a record or already a dict."""
+    return page.to_dict() if isinstance(page, PageRecord) else page
@@ -0,0 +1,54 @@
+"""Persistent map of URLs known to redirect, so later requests skip the hops."""
+import json
+import os
+from typing import Dict, Iterable, Optional
+
+class RedirectMap:
+    """Map from redirecting URLs to where their redirect chain ended.
+
+    Loaded from and saved to a JSON file when ``path`` is given, so every
+    run after the first goes straight to the final URL.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        """Load the map from ``path`` if it exists."""
+        self.path = path
+        self.targets: Dict[str, str] = {}
+        self.dirty = False
+        if path and os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                self.targets = json.load(f)
+
+    def __len__(self) -> int:
+        """Return the number of known redirects."""
+        return len(self.targets)
+
+    def resolve(self, url: str) -> str:
+        """Return where ``url`` ends up, following recorded hops."""
+        seen = {url}
+        while url in self.targets:
+            url = self.targets[url]
+            if url in seen:
+                break
+            seen.add(url)
+        return url
+
+    def record(self, hops: Iterable[str], target: str) -> None:
+        """Remember that each URL in ``hops`` redirects to ``target``."""
+        for hop in hops:
+            if hop != target and self.targets.get(hop) != target:
+                self.targets[hop] = target
+                self.dirty = True
+
+    def save(self) -> None:
+        """Write the map to its file if it changed."""
+        if not self.path or not self.dirty:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.targets, f, ensure_ascii=False, indent=4, sort_keys=True)
+        os.replace(tmp_path, self.path)
+        self.dirty = False
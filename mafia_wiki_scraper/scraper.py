@@ -1,33 +1,163 @@
 """Core scraping functionality for the Mafia Wiki Scraper."""
 import asyncio
 import ssl
-from typing import List, Dict, Optional, Set, AsyncGenerator, Tuple
-from urllib.parse import urljoin, urlparse
+import sys
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from functools import partial
+from typing import (Callable, Deque, List, Dict, Mapping, NamedTuple, Optional, Set, AsyncGenerator, AsyncIterator,
+                    Tuple, Union)
+from urllib.parse import urldefrag, urljoin, urlparse
 
 import aiohttp
-from bs4 import BeautifulSoup
 import lxml
 
+from .cache import ExtractionCache
+from .decoding import DEFAULT_ENCODING, Body, declared_encoding
+from .extract import Extraction, content_hash, extract, extract_markdown, extraction_key
+from .pipeline import DEFAULT_QUEUE_SIZE, Pipeline, Stage, StageStats
+from .politeness import RETRY_STATUSES, HostScheduler
+from .profiling import NULL_PROFILER, NullProfiler, PhaseProfiler
+from .records import PageRecord
+from .redirects import RedirectMap
+from .tracing import NULL_TRACER, NullTracer, Tracer
+from .warc import WarcWriter
+
+# Content types parsed as pages; other responses are handed to asset_callbacks unread
+HTML_TYPES = ('text/html', 'application/xhtml+xml')
+DEFAULT_MAX_PAGE_SIZE = 10 * 1024 * 1024
+READ_CHUNK_SIZE = 64 * 1024
+# How often a running page pipeline logs each stage's throughput and queue depth (seconds)
+PIPELINE_REPORT_INTERVAL = 30.0
+
+class FetchedPage(NamedTuple):
+    """A downloaded page on its way from the fetch stage to the parse stage."""
+    url: str
+    status: int
+    body: Body
+    # 'html', or 'markdown' for pages read from a content API
+    format: str = 'html'
+    title: Optional[str] = None
+    # Filled in by the parse stage, or up front when the extraction cache has it
+    extraction: Optional[Extraction] = None
+    cached: bool = False
+
+def parse_page(page: FetchedPage, sections: bool = False, structured: bool = False) -> FetchedPage:
+    """Return a fetched page with its extraction filled in.
+
+    A module function, so the parse stage can run it in worker threads or
+    processes.
+    """
+    if page.extraction is not None:
+        return page
+    if page.format == 'markdown':
+        extraction = extract_markdown(page.body.text(), page.title, sections)
+    else:
+        extraction = extract(page.body.content, sections=sections, structured=structured, encoding=page.body.encoding)
+    return page._replace(extraction=extraction)
+
+def create_session(max_concurrent: int = 5, limit_per_host: int = 0,
+                   trace_configs: Optional[List[aiohttp.TraceConfig]] = None) -> aiohttp.ClientSession:
+    """Create a client session with a DNS-caching connector.
+
+    One session can be shared by several scrapers so they reuse connections,
+    DNS lookups and TLS sessions.
+    """
+    # Create SSL context that doesn't verify certificates
+    ssl_context = ssl.create_default_context()
+    ssl_context.check_hostname = False
+    ssl_context.verify_mode = ssl.CERT_NONE
+    connector = aiohttp.TCPConnector(
+        ssl=ssl_context,
+        limit=max_concurrent,
+        limit_per_host=limit_per_host,
+        use_dns_cache=True,
+        ttl_dns_cache=300,
+    )
+    return aiohttp.ClientSession(
+        connector=connector,
+        timeout=aiohttp.ClientTimeout(total=10),
+        trace_configs=trace_configs or None,
+    )
+
 class WikiScraper:
     """Main scraper class for extracting content from wiki pages."""
 
-    def __init__(self, base_url: str, session: Optional[aiohttp.ClientSession] = None, max_concurrent: int = 5):
-        """Initialize the scraper with a base URL and optional session."""
+    def __init__(self, base_url: str, session: Optional[aiohttp.ClientSession] = None, max_concurrent: int = 5,
+                 warc_writer: Optional[WarcWriter] = None, cache: Optional[ExtractionCache] = None,
+                 scheduler: Optional[HostScheduler] = None, max_retries: int = 2, name: Optional[str] = None,
+                 sections: bool = False, structured: bool = False, tracer: Optional[Tracer] = None,
+                 profiler: Optional[PhaseProfiler] = None, redirects: Optional[RedirectMap] = None,
+                 max_page_size: int = DEFAULT_MAX_PAGE_SIZE, parse_executor: str = 'loop',
+                 parse_workers: int = 1, dedup: bool = False, queue_size: int = DEFAULT_QUEUE_SIZE):
+        """Initialize the scraper with a base URL and optional session.
+
+        Every argument after ``base_url`` is optional:
+
+        - ``session``: shared session; only a session the scraper creates is closed
+        - ``max_concurrent``: pages fetched at once
+        - ``warc_writer``: archive every HTTP exchange for offline replay
+        - ``cache``: skip parsing pages whose HTML is unchanged
+        - ``scheduler``: per-host pacing, robots.txt and Retry-After handling
+        - ``max_retries``: retries for failed requests
+        - ``name``: prefix for log lines
+        - ``sections``: keep each page's heading structure in its extraction
+        - ``structured``: add a ``document`` field with sections, tables and lists
+        - ``tracer``: record queue, request, download and parse timings
+        - ``profiler``: profile discovery, fetching and extraction as phases
+        - ``redirects``: redirect map that later requests skip through
+        - ``max_page_size``: larger or non-HTML responses go to ``asset_callbacks``
+        - ``parse_executor``, ``parse_workers``: where pages are parsed ('loop', 'thread' or 'process')
+        - ``dedup``: drop pages whose text repeats an earlier page
+        - ``queue_size``: pages held between pipeline stages
+        """
         self.base_url = base_url
         self.max_concurrent = max_concurrent
-        # Create SSL context that doesn't verify certificates
-        ssl_context = ssl.create_default_context()
-        ssl_context.check_hostname = False
-        ssl_context.verify_mode = ssl.CERT_NONE
-        connector = aiohttp.TCPConnector(ssl=ssl_context, limit=max_concurrent)
-        self.session = session or aiohttp.ClientSession(
-            connector=connector,
-            timeout=aiohttp.ClientTimeout(total=10)
-        )
+        self.warc_writer = warc_writer
+        self.cache = cache
+        self.scheduler = scheduler
+        self.max_retries = max_retries
+        self.max_page_size = max_page_size
+        self.parse_executor = parse_executor
+        self.parse_workers = parse_workers
+        self.dedup = dedup
+        self.queue_size = queue_size
+        self.name = name
+        self.sections = sections
+        self.structured = structured
+        self.tracer: Union[Tracer, NullTracer] = tracer or NULL_TRACER
+        self.profiler: Union[PhaseProfiler, NullProfiler] = profiler or NULL_PROFILER
+        self.redirects = redirects if redirects is not None else RedirectMap()
+        # Sessions passed in may be shared with other scrapers, so only close our own
+        self.owns_session = session is None
+        self.session = session or create_session(max_concurrent, trace_configs=self.tracer.trace_configs())
         self.scraped_urls: Set[str] = set()
         self.all_links: Set[str] = set()
-        self.results: List[Dict[str, str]] = []
+        self.results: List[PageRecord] = []
+        # Called with each page as soon as it is fetched, e.g. to update a search index
+        self.page_callbacks: List[Callable[[PageRecord], None]] = []
+        # Called with the URL and full extraction of each scraped page
+        self.extraction_callbacks: List[Callable[[str, Extraction], None]] = []
+        # Called with the URL, full extraction and fetch time of each page link discovery reads
+        self.discovery_callbacks: List[Callable[[str, Extraction, float], None]] = []
+        # Called with the URL and headers of each response skipped as non-HTML or too large
+        self.asset_callbacks: List[Callable[[str, Mapping[str, str]], None]] = []
+        self.skipped: Dict[str, str] = {}
+        # Text hash to first URL, and each dropped duplicate's URL to that first URL
+        self.content_hashes: Dict[str, str] = {}
+        self.duplicates: Dict[str, str] = {}
+        # Per-stage counters of the last page pipeline run
+        self.pipeline_stats: List[StageStats] = []
         self.semaphore = asyncio.Semaphore(max_concurrent)
+        # Unconditional fetches in progress, shared by every caller asking for the same URL
+        self.inflight: Dict[str, asyncio.Future] = {}
+        self.coalesced = 0
+        # Last encoding each host declared, for its pages that declare none
+        self.encodings: Dict[str, str] = {}
+        # Requests for a base URL known to redirect skip the hop, so rebase up front
+        if self.redirects.resolve(base_url) != base_url:
+            self.rebase(self.redirects.resolve(base_url))
 
     async def __aenter__(self):
         """Async context manager entry."""
@@ -38,148 +168,454 @@ class WikiScraper:
         await self.close()
 
     async def close(self):
-        """Close the aiohttp session."""
-        if self.session and not self.session.closed:
+        """Close the aiohttp session if this scraper created it."""
+        if self.owns_session and self.session and not self.session.closed:
             await self.session.close()
 
-    async def scrape_page(self, url: str) -> Optional[Dict[str, str]]:
-        """Scrape a single page for its title and content."""
+    def log(self, message: str) -> None:
+        """Print a progress message, prefixed with the site name if set."""
+        print(f"[{self.name}] {message}" if self.name else message)
+
+    @asynccontextmanager
+    async def slot(self, url: str) -> AsyncIterator[None]:
+        """Hold one of the scraper's concurrency slots while working on ``url``."""
+        queued = self.tracer.clock()
         async with self.semaphore:
+            with self.tracer.worker():
+                self.tracer.queued(queued, url)
+                yield
+
+    async def _archive(self, url: str, response: aiohttp.ClientResponse, body: Optional[bytes] = None) -> None:
+        """Write the response to the WARC archive, if one is configured, reading its body unless given."""
+        if self.warc_writer is None:
+            return
+        if body is None:
+            body = await response.read()
+        request_info = getattr(response, 'request_info', None)
+        self.warc_writer.write_exchange(
+            url, response.status, response.reason, response.headers, body,
+            request_headers=request_info.headers if request_info else None,
+        )
+
+    def _follow(self, url: str, response: aiohttp.ClientResponse) -> None:
+        """Record the redirects behind ``response`` and rebase the crawl if the base URL moved."""
+        history = getattr(response, 'history', ())
+        if not history:
+            return
+        target = str(response.url)
+        self.redirects.record([url] + [str(hop.url) for hop in history], target)
+        if url == self.base_url:
+            self.rebase(target)
+
+    def rebase(self, target: str) -> None:
+        """Continue the crawl under ``target``, where the base URL redirects to.
+
+        Only the scheme and host are taken from ``target`` when its path is
+        under the old base path, so a redirect to a landing page inside the
+        site does not narrow the crawl.
+        """
+        old, new = urlparse(self.base_url), urlparse(target)
+        if new.path.startswith(old.path):
+            target = new._replace(path=old.path, query='', fragment='').geturl()
+        if target != self.base_url:
+            self.log(f"{self.base_url} redirects to {target}, crawling that instead")
+            self.base_url = target
+
+    @asynccontextmanager
+    async def _request(self, url: str, **kwargs) -> AsyncIterator[aiohttp.ClientResponse]:
+        """Issue a GET for ``url``, paced and retried by the scheduler if there is one.
+
+        Retried responses are archived here; the caller archives the one
+        yielded once it has decided how much of the body to read.
+        """
+        for attempt in range(self.max_retries + 1):
+            if self.scheduler:
+                with self.tracer.span('politeness wait', url):
+                    await self.scheduler.acquire(url, self.session)
+            async with self.session.get(url, **kwargs) as response:
+                self._follow(url, response)
+                if self.scheduler and response.status in RETRY_STATUSES and attempt < self.max_retries:
+                    await self._archive(url, response)
+                    delay = self.scheduler.defer(url, response.headers.get('Retry-After'))
+                    self.log(f"Got {response.status} for {url}, retrying in {delay:.1f}s")
+                    continue
+                yield response
+                return
+
+    def extract(self, body: Body) -> Extraction:
+        """Extract a page, reusing a cached result when the HTML and its encoding are unchanged."""
+        if self.cache is None:
+            with self.profiler.phase('extraction'), self.tracer.span('parse'):
+                return extract(body.content, sections=self.sections, structured=self.structured,
+                               encoding=body.encoding)
+        key = extraction_key(body.content, body.encoding)
+        extraction = self.cache.get(key, sections=self.sections, structured=self.structured)
+        if extraction is None:
+            with self.profiler.phase('extraction'), self.tracer.span('parse'):
+                extraction = extract(body.content, sections=self.sections, structured=self.structured,
+                                     encoding=body.encoding)
+            self.cache.put(key, extraction)
+        return extraction
+
+    def page(self, url: str, extraction: Extraction, body: Optional[Body] = None, status: int = 200) -> PageRecord:
+        """Build the output record for an extracted page."""
+        return PageRecord(
+            url, extraction.title, extraction.content, status, time.time(),
+            content_hash(body.content) if body is not None else None,
+            len(body.content) if body is not None else 0,
+            extraction.document if self.structured else None,
+        )
+
+    def encoding(self, url: str, content: bytes, content_type: Optional[str]) -> str:
+        """Choose the encoding of a page from its BOM, header or ``<meta>`` prefix.
+
+        Pages that declare nothing use the last encoding declared by their
+        host, so the body never has to be sniffed.
+        """
+        host = urlparse(url).netloc
+        encoding = declared_encoding(content, content_type)
+        if encoding is None:
+            return self.encodings.get(host, DEFAULT_ENCODING)
+        self.encodings[host] = encoding
+        return encoding
+
+    async def fetch(self, url: str, headers: Optional[Dict[str, str]] = None,
+                    timeout: Optional[aiohttp.ClientTimeout] = None) -> Tuple[int, Mapping[str, str], Optional[Body]]:
+        """Fetch a URL and return its status, headers and raw HTML body (for 200 responses).
+
+        Known redirects are skipped by requesting their target directly.
+        Concurrent unconditional fetches of the same URL share one request.
+        """
+        url = self.redirects.resolve(url)
+        if headers:
+            return await self._fetch(url, headers, timeout)
+        pending = self.inflight.get(url)
+        if pending is not None:
+            self.coalesced += 1
+            return await asyncio.shield(pending)
+        future = asyncio.get_running_loop().create_future()
+        self.inflight[url] = future
+        try:
+            result = await self._fetch(url, None, timeout)
+        except BaseException as e:
+            if isinstance(e, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(e)
+                # Mark the exception retrieved in case no other caller was waiting
+                future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self.inflight[url]
+
+    async def _fetch(self, url: str, headers: Optional[Dict[str, str]],
+                     timeout: Optional[aiohttp.ClientTimeout]) -> Tuple[int, Mapping[str, str], Optional[Body]]:
+        """Issue the request behind ``fetch``."""
+        kwargs = {}
+        if headers:
+            kwargs['headers'] = headers
+        if timeout:
+            kwargs['timeout'] = timeout
+        async with self._request(url, **kwargs) as response:
+            if response.status != 200:
+                await self._archive(url, response)
+                return response.status, response.headers, None
+            reason = self.skip_reason(response.headers)
+            if reason is None:
+                with self.tracer.span('download', url):
+                    content = await self.read_body(response)
+                if content is None:
+                    reason = f"larger than {self.max_page_size} bytes"
+            if reason is not None:
+                # Skipped responses are not archived, so replays answer them with a 404
+                self.skip(url, reason, response.headers)
+                return response.status, response.headers, None
+            await self._archive(url, response, content)
+            encoding = self.encoding(url, content, response.headers.get('Content-Type'))
+            return response.status, response.headers, Body(content, encoding)
+
+    def skip_reason(self, headers: Mapping[str, str]) -> Optional[str]:
+        """Return why a response should not be read as a page, judging by its headers alone."""
+        content_type = headers.get('Content-Type')
+        if content_type:
+            mimetype = content_type.split(';')[0].strip().lower()
+            if mimetype not in HTML_TYPES:
+                return f"not HTML ({mimetype})"
+        length = headers.get('Content-Length')
+        if length and length.isdigit() and int(length) > self.max_page_size:
+            return f"too large ({length} bytes)"
+        return None
+
+    async def read_body(self, response: aiohttp.ClientResponse) -> Optional[bytes]:
+        """Stream a response body in chunks, giving up (None) once it exceeds ``max_page_size``.
+
+        Compressed responses are checked as they are decompressed, so a small
+        Content-Length cannot hide a huge page.
+        """
+        chunks = []
+        size = 0
+        async for chunk in response.content.iter_chunked(READ_CHUNK_SIZE):
+            size += len(chunk)
+            if size > self.max_page_size:
+                return None
+            chunks.append(chunk)
+        return b''.join(chunks)
+
+    def skip(self, url: str, reason: str, headers: Mapping[str, str]) -> None:
+        """Record a response that was not read as a page and pass it to the asset callbacks."""
+        self.skipped[url] = reason
+        self.log(f"Skipping {url}: {reason}")
+        for callback in self.asset_callbacks:
+            callback(url, headers)
+
+    async def fetch_page(self, url: str) -> Optional[FetchedPage]:
+        """Download a page for parsing, or return None if there is nothing to parse."""
+        try:
+            status, _, body = await self.fetch(url)
+        except Exception as e:
+            self.log(f"Error when scraping {url}: {str(e)}")
+            return None
+        if body is None:
+            return None
+        cached = None
+        if self.cache is not None:
+            cached = self.cache.get(extraction_key(body.content, body.encoding), sections=self.sections,
+                                    structured=self.structured)
+        return FetchedPage(url, status, body, extraction=cached, cached=cached is not None)
+
+    async def fetch_stage(self, url: str) -> Optional[FetchedPage]:
+        """Fetch a page in one of the scraper's worker slots."""
+        async with self.slot(url):
+            return await self.fetch_page(url)
+
+    def parse(self, page: FetchedPage) -> FetchedPage:
+        """Parse a fetched page on the event loop, profiled and traced."""
+        if page.extraction is not None:
+            return page
+        with self.profiler.phase('extraction'), self.tracer.span('parse', page.url):
+            return parse_page(page, self.sections, self.structured)
+
+    def transform(self, page: FetchedPage) -> Optional[PageRecord]:
+        """Turn a parsed page into its output record, or None if it is a duplicate.
+
+        Fresh extractions are cached, extraction callbacks such as the chunk
+        writer see every page, and titles are stripped of stray whitespace.
+        """
+        extraction = page.extraction
+        if self.cache is not None and not page.cached and page.format == 'html':
+            self.cache.put(extraction_key(page.body.content, page.body.encoding), extraction)
+        for callback in self.extraction_callbacks:
+            callback(page.url, extraction)
+        if self.dedup:
+            text_hash = content_hash(f"{extraction.title}\0{extraction.content}")
+            first = self.content_hashes.setdefault(text_hash, page.url)
+            if first != page.url:
+                self.duplicates[page.url] = first
+                return None
+        if extraction.title is not None and extraction.title != extraction.title.strip():
+            extraction = extraction._replace(title=extraction.title.strip())
+        return self.page(page.url, extraction, page.body, page.status)
+
+    def sink(self, record: PageRecord) -> PageRecord:
+        """Keep a finished page and hand it to the page callbacks."""
+        self.results.append(record)
+        for callback in self.page_callbacks:
+            callback(record)
+        return record
+
+    def page_pipeline(self) -> Pipeline:
+        """Build the fetch, parse, transform and sink pipeline that pages go through."""
+        if self.parse_executor == 'loop':
+            parse = self.parse
+        else:
+            # Threads and processes need a picklable function, and the profiler is not thread-safe
+            parse = partial(parse_page, sections=self.sections, structured=self.structured)
+        return Pipeline([
+            Stage('fetch', self.fetch_stage, self.max_concurrent),
+            Stage('parse', parse, self.parse_workers, self.parse_executor),
+            Stage('transform', self.transform),
+            Stage('sink', self.sink),
+        ], queue_size=self.queue_size, log=self.log, report_interval=PIPELINE_REPORT_INTERVAL)
+
+    async def scrape_page(self, url: str) -> Optional[PageRecord]:
+        """Scrape a single page for its title and content."""
+        async with self.slot(url):
+            page = await self.fetch_page(url)
+        if page is None:
+            return None
+        try:
+            return self.transform(self.parse(page))
+        except Exception as e:
+            self.log(f"Error when scraping {url}: {str(e)}")
+            return None
+
+    async def crawl_page(self, url: str) -> Tuple[Optional[PageRecord], Set[str]]:
+        """Fetch a page once and return both its output record and its internal links."""
+        async with self.slot(url):
             try:
-                async with self.session.get(url) as response:
-                    if response.status == 200:
-                        html = await response.text()
-                        soup = BeautifulSoup(html, 'lxml')
-                        title = soup.title.string if soup.title else ""
-                        content = soup.get_text(separator=' ', strip=True)
-                        return {
-                            "url": url,
-                            "title": title,
-                            "content": content,
-                        }
+                status, _, html = await self.fetch(url)
+                if html is None:
+                    if status != 200:
+                        self.log(f"Error {status} when fetching {url}")
+                    return None, set()
+                extraction = self.extract(html)
+                for callback in self.extraction_callbacks:
+                    callback(url, extraction)
+                return self.page(url, extraction, html, status), self.internal_links(extraction, url)
             except Exception as e:
-                print(f"Error when scraping {url}: {str(e)}")
-            return None
+                self.log(f"Error when crawling {url}: {str(e)}")
+                return None, set()
+
+    def page_links(self, extraction: Extraction, url: Optional[str] = None) -> List[str]:
+        """Resolve an extraction's links against its page URL, dropping fragments.
+
+        Fragments are dropped so ``page`` and ``page#section`` are one link.
+        Targets too malformed to resolve, such as an unclosed IPv6 bracket,
+        are kept as written.
+        """
+        links = []
+        # Relative links are relative to where the page was actually served from
+        page_url = self.redirects.resolve(url or self.base_url)
+        for href in extraction.links:
+            try:
+                links.append(urldefrag(urljoin(page_url, href))[0])
+            except ValueError:
+                links.append(href)
+        return links
+
+    def internal_links(self, extraction: Extraction, url: Optional[str] = None) -> Set[str]:
+        """Return the ``page_links`` under the base URL, each fetched once.
+
+        Links known to redirect are replaced by their targets.
+        """
+        links = set()
+        for link in self.page_links(extraction, url):
+            full_url = self.redirects.resolve(link)
+            if full_url.startswith(self.base_url):
+                links.add(sys.intern(full_url))
+        return links
 
     async def get_internal_links(self, url: str) -> Set[str]:
         """Extract all internal links from the given URL."""
-        async with self.semaphore:
+        async with self.slot(url):
             try:
-                print(f"Fetching links from {url}")  # Debug log
+                self.log(f"Fetching links from {url}")  # Debug log
                 timeout = aiohttp.ClientTimeout(total=10)  # 10 second timeout
-                async with self.session.get(url, timeout=timeout) as response:
-                    if response.status == 200:
-                        html = await response.text()
-                        soup = BeautifulSoup(html, 'lxml')
-                        links = set()
-                        for link in soup.find_all('a', href=True):
-                            href = link.get('href')
-                            if href:
-                                full_url = urljoin(self.base_url, href)
-                                if full_url.startswith(self.base_url):
-                                    links.add(full_url)
-                        print(f"Found {len(links)} links in {url}")  # Debug log
-                        return links
-                    else:
-                        print(f"Error {response.status} when fetching {url}")  # Debug log
-                        return set()
+                start = time.perf_counter()
+                status, _, html = await self.fetch(url, timeout=timeout)
+                elapsed = time.perf_counter() - start
+                if html is not None:
+                    extraction = self.extract(html)
+                    for callback in self.discovery_callbacks:
+                        callback(url, extraction, elapsed)
+                    links = self.internal_links(extraction, url)
+                    self.log(f"Found {len(links)} links in {url}")  # Debug log
+                    return links
+                else:
+                    if status != 200:
+                        self.log(f"Error {status} when fetching {url}")  # Debug log
+                    return set()
             except asyncio.TimeoutError:
-                print(f"Timeout when fetching {url}")  # Debug log
+                self.log(f"Timeout when fetching {url}")  # Debug log
                 return set()
             except Exception as e:
-                print(f"Error extracting links from {url}: {str(e)}")  # Debug log
+                self.log(f"Error extracting links from {url}: {str(e)}")  # Debug log
                 return set()
 
     async def get_all_internal_links(self) -> AsyncGenerator[tuple[int, int], None]:
-        """Recursively get all internal links from the base URL with progress updates."""
-        print("Starting link discovery...")  # Debug log
-        self.all_links = {self.base_url}  # Store as instance variable
-        to_check = {self.base_url}
-        checked = set()
-        
-        # Process URLs in parallel batches for speed
-        batch_size = 10  # Process 10 URLs at once
-        
-        while to_check:
-            # Take a batch of URLs to process
-            current_batch = set()
-            while len(current_batch) < batch_size and to_check:
-                if url := to_check.pop() if to_check else None:
-                    if url not in checked:
-                        current_batch.add(url)
-                        checked.add(url)
-            
-            if not current_batch:
-                break
-                
-            # Process the batch concurrently
-            tasks = [self.get_internal_links(url) for url in current_batch]
-            new_links_sets = await asyncio.gather(*tasks)
-            
-            # Update our sets with new links
-            for links in new_links_sets:
-                new_unchecked = links - checked
-                to_check.update(new_unchecked)
-                self.all_links.update(links)
-            
-            # Yield progress
-            yield len(checked), max(len(self.all_links), len(checked) + len(to_check))
-            print(f"Processed {len(checked)} pages, found {len(self.all_links)} total links")
-        
+        """Recursively get all internal links from the base URL with progress updates.
+
+        Each URL is marked as checked as soon as it is scheduled and a new
+        request starts whenever one finishes, so no URL is requested twice
+        and one slow page does not hold back the rest of a batch.
+        """
+        self.log("Starting link discovery...")  # Debug log
+        base_url = self.base_url
+        self.all_links = {base_url}  # Store as instance variable
+        checked = {base_url}
+        to_check: Deque[str] = deque()
+        # Keep more requests queued than there are slots, so slots never go idle
+        limit = self.max_concurrent * 2
+        pending = {asyncio.ensure_future(self.get_internal_links(base_url))}
+        done_count = 0
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                if base_url != self.base_url:
+                    # The base URL redirected; record the page under its new address
+                    self.all_links.discard(base_url)
+                    base_url = self.base_url
+                    self.all_links.add(base_url)
+                    checked.add(base_url)
+                for task in done:
+                    links = task.result()
+                    self.all_links.update(links)
+                    for link in links - checked:
+                        checked.add(link)
+                        to_check.append(link)
+                while to_check and len(pending) < limit:
+                    pending.add(asyncio.ensure_future(self.get_internal_links(to_check.popleft())))
+
+                # Yield progress
+                previous, done_count = done_count, done_count + len(done)
+                yield done_count, max(len(self.all_links), len(checked))
+                if done_count // limit != previous // limit:
+                    self.log(f"Processed {done_count} pages, found {len(self.all_links)} total links")
+        finally:
+            for task in pending:
+                task.cancel()
+
         # Final yield with the complete count
-        print(f"Link discovery complete. Found {len(self.all_links)} pages")
+        self.log(f"Link discovery complete. Found {len(self.all_links)} pages")
         yield len(self.all_links), len(self.all_links)
 
     async def fetch_pages_with_progress(self) -> AsyncGenerator[tuple[int, int], None]:
-        """Fetch all pages with progress updates."""
+        """Run every discovered page through the page pipeline with progress updates.
+
+        Progress counts the pages the fetch stage has finished with, and is
+        reported about as often as the scraper has slots; finished pages are
+        in ``results`` by the time it is.
+        """
         total_pages = len(self.all_links)
-        fetched = 0
-        batch_size = self.max_concurrent * 2  # Fetch more pages at once
-        
-        # Convert to list for batch processing
-        urls = list(self.all_links)
-        
-        while urls:
-            # Take next batch
-            batch = urls[:batch_size]
-            urls = urls[batch_size:]
-            
-            # Fetch batch concurrently
-            tasks = [self.scrape_page(url) for url in batch]
-            results = await asyncio.gather(*tasks)
-            
-            # Store valid results
-            for result in results:
-                if result:
-                    self.results.append(result)
-            
-            # Update progress
-            fetched += len(batch)
-            yield fetched, total_pages
-            print(f"Fetched {fetched}/{total_pages} pages")
-            
-            # Small delay to prevent overload
-            await asyncio.sleep(0.01)
-        
+        pipeline = self.page_pipeline()
+        step = self.max_concurrent * 2
+        reported = 0
+        with self.tracer.span('page pipeline', pages=total_pages):
+            async for _ in pipeline.stream(list(self.all_links)):
+                fetched = pipeline.stats[0].processed
+                if fetched - reported >= step:
+                    reported = fetched
+                    yield fetched, total_pages
+                    self.log(f"Fetched {fetched}/{total_pages} pages")
+        self.pipeline_stats = pipeline.stats
+        self.log(f"Page pipeline finished with {len(self.results)} pages:\n{pipeline.summary()}")
+        if self.duplicates:
+            self.log(f"Dropped {len(self.duplicates)} duplicate pages")
+
         # Final yield
         yield total_pages, total_pages
 
-    async def scrape_all_pages_with_progress(self) -> AsyncGenerator[Dict[str, str], None]:
+    async def scrape_all_pages_with_progress(self) -> AsyncGenerator[PageRecord, None]:
         """Process all fetched pages and yield results."""
         for result in self.results:
-            self.scraped_urls.add(result['url'])
+            self.scraped_urls.add(result.url)
             yield result
             await asyncio.sleep(0.01)  # Small delay to prevent CPU overload
 
-    async def scrape_all_pages(self) -> List[Dict[str, str]]:
+    async def scrape_all_pages(self) -> List[PageRecord]:
         """Scrape all internal pages starting from the base URL."""
         # First discover all links
-        async for _ in self.get_all_internal_links():
-            pass  # Process all links
+        with self.profiler.phase('discovery'):
+            async for _ in self.get_all_internal_links():
+                pass  # Process all links
             
         # Then fetch all pages
-        async for _ in self.fetch_pages_with_progress():
-            pass  # Wait for all pages to be fetched
+        with self.profiler.phase('fetching'):
+            async for _ in self.fetch_pages_with_progress():
+                pass  # Wait for all pages to be fetched
             
         # Finally process and return all results
         results = []
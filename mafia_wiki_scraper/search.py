@@ -0,0 +1,212 @@
+"""Incremental inverted index with compressed postings and BM25 ranking."""
+import hashlib
+import json
+import math
+import os
+import re
+import struct
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+MAGIC = b"MWIDX001"
+_LENGTH = struct.Struct('<Q')
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase word tokens."""
+    return TOKEN_RE.findall(text.lower())
+
+def encode_varint(value: int, out: bytearray) -> None:
+    """Append ``value`` to ``out`` as a LEB128 varint."""
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+def decode_postings(data: bytes) -> Iterator[Tuple[int, int]]:
+    """Yield ``(doc_id, term_frequency)`` pairs from delta-encoded postings."""
+    doc_id = 0
+    values = []
+    value = shift = 0
+    for byte in data:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        values.append(value)
+        value = shift = 0
+        if len(values) == 2:
+            doc_id += values[0]
+            yield doc_id, values[1]
+            values = []
+
+class SearchHit(NamedTuple):
+    """One ranked search result."""
+    url: str
+    title: Optional[str]
+    score: float
+
+class InvertedIndex:
+    """Pure-Python inverted index over scraped pages.
+
+    Postings are stored per term as varint-encoded ``(doc id delta, term
+    frequency)`` pairs. Document IDs only ever grow, so adding a page appends
+    to the postings of its own terms and nothing else. Replacing or removing a
+    page tombstones its old ID instead of rewriting other postings;
+    ``compact()`` drops tombstoned entries once they pile up.
+    """
+
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self):
+        """Create an empty index."""
+        self.postings: Dict[str, bytearray] = {}
+        self.last_doc: Dict[str, int] = {}
+        self.docs: Dict[int, Tuple[str, Optional[str], int, str]] = {}
+        self.doc_ids: Dict[str, int] = {}
+        self.deleted: Set[int] = set()
+        self.next_id = 1
+        self.total_length = 0
+
+    def __len__(self) -> int:
+        """Return the number of live documents."""
+        return len(self.docs)
+
+    def add_page(self, page: Dict[str, str]) -> bool:
+        """Index a page, replacing any older version; returns False if unchanged."""
+        url = page['url']
+        text = f"{page['title'] or ''} {page['content']}"
+        digest = hashlib.sha1(text.encode('utf-8')).hexdigest()
+        if url in self.doc_ids:
+            if self.docs[self.doc_ids[url]][3] == digest:
+                return False
+            self.remove(url)
+
+        doc_id = self.next_id
+        self.next_id += 1
+        tokens = tokenize(text)
+        frequencies: Dict[str, int] = {}
+        for token in tokens:
+            frequencies[token] = frequencies.get(token, 0) + 1
+        for term, frequency in frequencies.items():
+            postings = self.postings.setdefault(term, bytearray())
+            encode_varint(doc_id - self.last_doc.get(term, 0), postings)
+            encode_varint(frequency, postings)
+            self.last_doc[term] = doc_id
+        self.docs[doc_id] = (url, page['title'], len(tokens), digest)
+        self.doc_ids[url] = doc_id
+        self.total_length += len(tokens)
+        return True
+
+    def remove(self, url: str) -> None:
+        """Tombstone the document for ``url``."""
+        doc_id = self.doc_ids.pop(url, None)
+        if doc_id is None:
+            return
+        self.total_length -= self.docs.pop(doc_id)[2]
+        self.deleted.add(doc_id)
+        if len(self.deleted) > max(100, len(self.docs)):
+            self.compact()
+
+    def retain(self, urls: Iterable[str]) -> int:
+        """Remove every page not in ``urls``, such as pages gone from a new crawl; returns how many.
+
+        Postings are compacted afterwards, so the removed pages no longer
+        count towards any term's document frequency.
+        """
+        keep = set(urls)
+        gone = [url for url in self.doc_ids if url not in keep]
+        for url in gone:
+            self.remove(url)
+        if self.deleted:
+            self.compact()
+        return len(gone)
+
+    def compact(self) -> None:
+        """Rewrite postings without tombstoned documents."""
+        for term in list(self.postings):
+            postings = bytearray()
+            previous = 0
+            for doc_id, frequency in decode_postings(self.postings[term]):
+                if doc_id in self.deleted:
+                    continue
+                encode_varint(doc_id - previous, postings)
+                encode_varint(frequency, postings)
+                previous = doc_id
+            if postings:
+                self.postings[term] = postings
+                self.last_doc[term] = previous
+            else:
+                del self.postings[term]
+                del self.last_doc[term]
+        self.deleted.clear()
+
+    def search(self, query: str, limit: int = 10) -> List[SearchHit]:
+        """Return the best matching pages for ``query`` ranked by BM25."""
+        if not self.docs:
+            return []
+        count = len(self.docs)
+        average_length = self.total_length / count or 1
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(query)):
+            matches = [
+                (doc_id, frequency)
+                for doc_id, frequency in decode_postings(self.postings.get(term, b''))
+                if doc_id not in self.deleted
+            ]
+            if not matches:
+                continue
+            idf = math.log(1 + (count - len(matches) + 0.5) / (len(matches) + 0.5))
+            for doc_id, frequency in matches:
+                length = self.docs[doc_id][2]
+                norm = self.K1 * (1 - self.B + self.B * length / average_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * frequency * (self.K1 + 1) / (frequency + norm)
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], self.docs[item[0]][0]))[:limit]
+        return [SearchHit(self.docs[doc_id][0], self.docs[doc_id][1], score) for doc_id, score in ranked]
+
+    def save(self, path: str) -> None:
+        """Persist the index to ``path`` atomically."""
+        terms = []
+        blob = bytearray()
+        for term, postings in self.postings.items():
+            terms.append([term, len(blob), len(postings), self.last_doc[term]])
+            blob += postings
+        meta = json.dumps({
+            'next_id': self.next_id,
+            'docs': [[doc_id, *doc] for doc_id, doc in self.docs.items()],
+            'deleted': sorted(self.deleted),
+            'terms': terms,
+        }, ensure_ascii=False).encode('utf-8')
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(MAGIC)
+            f.write(_LENGTH.pack(len(meta)))
+            f.write(meta)
+            f.write(blob)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "InvertedIndex":
+        """Load an index written by ``save``."""
+        with open(path, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a search index")
+            (meta_length,) = _LENGTH.unpack(f.read(_LENGTH.size))
+            meta = json.loads(f.read(meta_length).decode('utf-8'))
+            blob = f.read()
+        index = cls()
+        index.next_id = meta['next_id']
+        index.deleted = set(meta['deleted'])
+        for doc_id, url, title, length, digest in meta['docs']:
+            index.docs[doc_id] = (url, title, length, digest)
+            index.doc_ids[url] = doc_id
+            index.total_length += length
+        for term, offset, length, last_doc in meta['terms']:
+            index.postings[term] = bytearray(blob[offset:offset + length])
+            index.last_doc[term] = last_doc
+        return index
+
+    @classmethod
+    def open(cls, path: str) -> "InvertedIndex":
+        """Load the index at ``path`` if it exists, otherwise start an empty one."""
+        return cls.load(path) if os.path.exists(path) else cls()
@@ -0,0 +1,228 @@
+"""Local read API over a scraped snapshot, with ETags and an LRU response cache."""
+import asyncio
+import glob
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from aiohttp import web
+
+from .search import InvertedIndex
+from .snapshot import SNAPSHOT_EXTENSION, read_pages
+
+# Most hits one search request can ask for; larger limits are clamped to it
+MAX_SEARCH_LIMIT = 100
+
+def parse_since(value: str) -> float:
+    """Parse an ISO 8601 date/time or a Unix timestamp."""
+    try:
+        return float(value)
+    except ValueError:
+        when = datetime.fromisoformat(value)
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return when.timestamp()
+
+def latest_snapshot(directory: str = "output") -> Optional[str]:
+    """Return the most recently modified JSON or binary snapshot in ``directory``.
+
+    Manifests, status files and redirect maps (including ``redirects.json``
+    left by older versions) are not snapshots and are skipped.
+    """
+    candidates = [
+        path for path in glob.glob(os.path.join(directory, "*.json"))
+        if not path.endswith(('.manifest.json', '.status.json'))
+        and os.path.basename(path) != 'redirects.json'
+    ] + glob.glob(os.path.join(directory, f"*.{SNAPSHOT_EXTENSION}"))
+    return max(candidates, key=os.path.getmtime, default=None)
+
+class Corpus:
+    """An immutable, indexed view of one snapshot.
+
+    ``changed_at`` carries over from the previous corpus for pages whose
+    content is unchanged, so ``changed-since`` queries survive reloads.
+    """
+
+    def __init__(self, pages: List[Dict[str, str]], loaded_at: float, previous: Optional["Corpus"] = None):
+        """Build the URL, search and change-time indexes."""
+        self.pages: Dict[str, Dict[str, str]] = {}
+        self.hashes: Dict[str, str] = {}
+        self.changed_at: Dict[str, float] = {}
+        self.index = InvertedIndex()
+        for page in pages:
+            url = page['url']
+            digest = hashlib.sha256(json.dumps(page, sort_keys=True).encode('utf-8')).hexdigest()
+            self.pages[url] = page
+            self.hashes[url] = digest
+            if previous and previous.hashes.get(url) == digest:
+                self.changed_at[url] = previous.changed_at[url]
+            else:
+                self.changed_at[url] = loaded_at
+            self.index.add_page(page)
+        self.by_change = sorted(self.changed_at.items(), key=lambda item: item[1])
+        self.version = hashlib.sha256("".join(sorted(self.hashes.values())).encode('ascii')).hexdigest()[:16]
+
+    def search(self, query: str, limit: int = 20) -> List[Dict]:
+        """Return the best matching pages for ``query``, ranked by BM25."""
+        return [hit._asdict() for hit in self.index.search(query, limit)]
+
+    def changed_since(self, since: float) -> List[Dict]:
+        """Return pages whose content changed after ``since``, oldest first."""
+        return [
+            {'url': url, 'changed_at': datetime.fromtimestamp(changed, timezone.utc).isoformat()}
+            for url, changed in self.by_change if changed > since
+        ]
+
+def load_corpus(path: str, previous: Optional[Corpus] = None) -> Corpus:
+    """Load a JSON or binary snapshot from disk and index it."""
+    pages = read_pages(path)
+    loaded_at = os.path.getmtime(path) if previous is None else time.time()
+    return Corpus(pages, loaded_at, previous)
+
+class LRUCache:
+    """A small least recently used cache."""
+
+    def __init__(self, max_entries: int = 1024):
+        """Create an empty cache holding at most ``max_entries`` items."""
+        self.max_entries = max_entries
+        self.entries: OrderedDict = OrderedDict()
+
+    def get(self, key):
+        """Return a cached value and mark it recently used, or None."""
+        if key not in self.entries:
+            return None
+        self.entries.move_to_end(key)
+        return self.entries[key]
+
+    def put(self, key, value) -> None:
+        """Store a value, evicting the least recently used entry if full."""
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+class CorpusServer:
+    """Serve page, search and changed-since queries over the latest snapshot.
+
+    A background task polls the snapshot file and swaps in a freshly indexed
+    corpus when it changes. Handlers take one reference to the corpus per
+    request, so the swap is atomic and in-flight requests are never dropped.
+    """
+
+    def __init__(self, snapshot_path: str, reload_interval: float = 5.0, cache_entries: int = 1024):
+        """Load and index the snapshot."""
+        self.snapshot_path = snapshot_path
+        self.reload_interval = reload_interval
+        self.corpus = load_corpus(snapshot_path)
+        self.mtime = os.path.getmtime(snapshot_path)
+        self.cache = LRUCache(cache_entries)
+        self._reload_task: Optional[asyncio.Task] = None
+
+    async def reload_if_changed(self) -> bool:
+        """Re-index the snapshot if the file changed, returning whether it did."""
+        mtime = os.path.getmtime(self.snapshot_path)
+        if mtime == self.mtime:
+            return False
+        loop = asyncio.get_running_loop()
+        corpus = await loop.run_in_executor(None, load_corpus, self.snapshot_path, self.corpus)
+        self.corpus, self.mtime = corpus, mtime
+        print(f"Reloaded snapshot {self.snapshot_path} ({len(corpus.pages)} pages)")
+        return True
+
+    async def _watch_snapshot(self) -> None:
+        """Poll the snapshot file for changes until cancelled."""
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            try:
+                await self.reload_if_changed()
+            except (OSError, ValueError) as e:
+                print(f"Error reloading snapshot: {str(e)}")
+
+    async def _on_startup(self, app: web.Application) -> None:
+        """Start polling the snapshot."""
+        self._reload_task = asyncio.ensure_future(self._watch_snapshot())
+
+    async def _on_cleanup(self, app: web.Application) -> None:
+        """Stop polling the snapshot."""
+        if self._reload_task:
+            self._reload_task.cancel()
+
+    def _respond(self, request: web.Request, corpus: Corpus, build) -> web.Response:
+        """Serve a cached JSON body with an ETag, building it on a cache miss."""
+        key = (corpus.version, request.path_qs)
+        cached = self.cache.get(key)
+        if cached is None:
+            body = json.dumps(build(), ensure_ascii=False).encode('utf-8')
+            cached = (f'"{hashlib.sha1(body).hexdigest()}"', body)
+            self.cache.put(key, cached)
+        etag, body = cached
+        if request.headers.get('If-None-Match') == etag:
+            return web.Response(status=304, headers={'ETag': etag})
+        return web.Response(body=body, content_type='application/json', headers={'ETag': etag})
+
+    async def handle_page(self, request: web.Request) -> web.Response:
+        """``GET /page?url=...``: return one page."""
+        corpus = self.corpus
+        url = request.query.get('url', '')
+        if url not in corpus.pages:
+            raise web.HTTPNotFound(text=f"No page for {url}")
+        return self._respond(request, corpus, lambda: corpus.pages[url])
+
+    async def handle_search(self, request: web.Request) -> web.Response:
+        """``GET /search?q=...&limit=N``: return matching pages, at most ``MAX_SEARCH_LIMIT``."""
+        corpus = self.corpus
+        query = request.query.get('q', '')
+        try:
+            limit = int(request.query.get('limit', 20))
+        except ValueError:
+            limit = 0
+        if limit < 1:
+            raise web.HTTPBadRequest(text="limit must be a positive whole number")
+        limit = min(limit, MAX_SEARCH_LIMIT)
+        return self._respond(request, corpus, lambda: corpus.search(query, limit))
+
+    async def handle_changed(self, request: web.Request) -> web.Response:
+        """``GET /changed?since=...``: return pages changed after a time."""
+        corpus = self.corpus
+        try:
+            since = parse_since(request.query.get('since', '0'))
+        except ValueError:
+            raise web.HTTPBadRequest(text="since must be an ISO date or Unix timestamp")
+        return self._respond(request, corpus, lambda: corpus.changed_since(since))
+
+    async def handle_status(self, request: web.Request) -> web.Response:
+        """``GET /status``: describe the loaded snapshot."""
+        corpus = self.corpus
+        return web.json_response({
+            'snapshot': self.snapshot_path,
+            'version': corpus.version,
+            'pages': len(corpus.pages),
+        })
+
+    def app(self) -> web.Application:
+        """Build the aiohttp application."""
+        app = web.Application()
+        app.router.add_get('/page', self.handle_page)
+        app.router.add_get('/search', self.handle_search)
+        app.router.add_get('/changed', self.handle_changed)
+        app.router.add_get('/status', self.handle_status)
+        app.on_startup.append(self._on_startup)
+        app.on_cleanup.append(self._on_cleanup)
+        return app
+
+async def serve(snapshot_path: str, host: str = '127.0.0.1', port: int = 8080, reload_interval: float = 5.0) -> None:
+    """Serve the snapshot until cancelled."""
+    server = CorpusServer(snapshot_path, reload_interval)
+    runner = web.AppRunner(server.app())
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    print(f"Serving {snapshot_path} ({len(server.corpus.pages)} pages) on http://{host}:{port}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
@@ -0,0 +1,175 @@
+"""Compressed, sharded output sinks with a shard manifest."""
+import gzip
+import hashlib
+import io
+import json
+import os
+import re
+import textwrap
+from typing import Dict, IO, Iterator, List, Optional
+
+from .records import as_dict
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+COMPRESSIONS = ('gzip', 'zstd')
+# Formats written by ShardedWriter, so the only ones that can be compressed or sharded
+TEXT_FORMATS = ('json', 'txt')
+EXTENSIONS = {None: '', 'gzip': '.gz', 'zstd': '.zst'}
+TXT_SEPARATOR = "-" * 80 + "\n\n"
+
+def parse_size(value: str) -> int:
+    """Parse a byte size such as ``500000``, ``64KB`` or ``10MB``."""
+    match = re.fullmatch(r'\s*(\d+)\s*([KMG]?)B?\s*', value.upper())
+    if not match:
+        raise ValueError(f"Invalid size: {value}")
+    number, unit = match.groups()
+    return int(number) * {'': 1, 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}[unit]
+
+def open_compressed(path: str, mode: str = 'rb', compression: Optional[str] = None) -> IO[bytes]:
+    """Open a binary file, transparently (de)compressing gzip or zstd."""
+    if compression is None:
+        compression = next((name for name, ext in EXTENSIONS.items() if ext and path.endswith(ext)), None)
+    if compression == 'gzip':
+        return gzip.open(path, mode)
+    if compression == 'zstd':
+        if zstandard is None:
+            raise ImportError("zstd compression requires zstandard (pip install zstandard)")
+        raw = open(path, mode)
+        if 'w' in mode:
+            return zstandard.ZstdCompressor().stream_writer(raw)
+        return zstandard.ZstdDecompressor().stream_reader(raw)
+    return open(path, mode)
+
+def format_page(page: Dict[str, str], output_format: str) -> str:
+    """Render a single page as it appears inside an output file."""
+    if output_format == 'json':
+        return textwrap.indent(json.dumps(as_dict(page), ensure_ascii=False, indent=4), ' ' * 4)
+    return (
+        f"URL: {page['url']}\n"
+        f"Title: {page['title']}\n"
+        f"Content:\n{page['content']}\n\n"
+        + TXT_SEPARATOR
+    )
+
+def _file_sha256(path: str) -> str:
+    """Return the SHA-256 hex digest of a file on disk."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class ShardedWriter:
+    """Write pages to one or more (optionally compressed) shards plus a manifest.
+
+    Shards roll over once their uncompressed size would exceed ``shard_size``
+    bytes. Each JSON shard is a complete JSON array, so shards can be read
+    independently and in parallel.
+    """
+
+    def __init__(self, base_path: str, output_format: str, compression: Optional[str] = None,
+                 shard_size: Optional[int] = None):
+        """Prepare a writer for files derived from ``base_path``."""
+        if compression not in EXTENSIONS:
+            raise ValueError(f"Unsupported compression: {compression}")
+        self.base_path = base_path
+        self.output_format = output_format
+        self.compression = compression
+        self.shard_size = shard_size
+        self.shards: List[Dict] = []
+        self._file: Optional[IO[bytes]] = None
+        self._current: Optional[Dict] = None
+
+    def __enter__(self):
+        """Context manager entry."""
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit."""
+        self.close()
+
+    @property
+    def manifest_path(self) -> str:
+        """Path of the manifest describing the written shards."""
+        stem, _ = os.path.splitext(self.base_path)
+        return f"{stem}.manifest.json"
+
+    def _shard_path(self, index: int) -> str:
+        """Return the file path for the shard with the given index."""
+        stem, ext = os.path.splitext(self.base_path)
+        if self.shard_size:
+            stem = f"{stem}-{index:05d}"
+        return f"{stem}{ext}{EXTENSIONS[self.compression]}"
+
+    def _open_shard(self) -> None:
+        """Start a new shard file."""
+        path = self._shard_path(len(self.shards))
+        self._file = open_compressed(path, 'wb', self.compression)
+        self._current = {
+            'file': os.path.basename(path),
+            'first_url': None,
+            'last_url': None,
+            'count': 0,
+            'bytes': 0,
+        }
+        if self.output_format == 'json':
+            self._file.write(b"[\n")
+
+    def _close_shard(self) -> None:
+        """Finish the current shard and record it in the manifest."""
+        if self._file is None:
+            return
+        if self.output_format == 'json':
+            self._file.write(b"\n]" if self._current['count'] else b"]")
+        self._file.close()
+        path = os.path.join(os.path.dirname(self.base_path), self._current['file'])
+        self._current['sha256'] = _file_sha256(path)
+        self.shards.append(self._current)
+        self._file = None
+        self._current = None
+
+    def write(self, page: Dict[str, str]) -> None:
+        """Append a page, rolling over to a new shard when the current one is full."""
+        encoded = format_page(page, self.output_format).encode('utf-8')
+        if (self._current is not None and self.shard_size and self._current['count']
+                and self._current['bytes'] + len(encoded) > self.shard_size):
+            self._close_shard()
+        if self._file is None:
+            self._open_shard()
+        if self.output_format == 'json' and self._current['count']:
+            self._file.write(b",\n")
+        self._file.write(encoded)
+        self._current['bytes'] += len(encoded)
+        self._current['count'] += 1
+        self._current['first_url'] = self._current['first_url'] or page['url']
+        self._current['last_url'] = page['url']
+
+    def close(self) -> None:
+        """Close the last shard and write the manifest if one is needed."""
+        if self._file is None and not self.shards:
+            self._open_shard()
+        self._close_shard()
+        if self.shard_size or self.compression:
+            manifest = {
+                'format': self.output_format,
+                'compression': self.compression,
+                'shard_size': self.shard_size,
+                'count': sum(shard['count'] for shard in self.shards),
+                'shards': self.shards,
+            }
+            with open(self.manifest_path, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, ensure_ascii=False, indent=4)
+
+def read_json_shards(manifest_path: str) -> Iterator[Dict[str, str]]:
+    """Yield every page from the JSON shards listed in a manifest."""
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    directory = os.path.dirname(manifest_path)
+    for shard in manifest['shards']:
+        with open_compressed(os.path.join(directory, shard['file']), 'rb', manifest['compression']) as raw:
+            with io.TextIOWrapper(raw, encoding='utf-8') as text:
+                yield from json.load(text)
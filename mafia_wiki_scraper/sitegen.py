@@ -0,0 +1,241 @@
+"""Deterministic generator and local server for synthetic GitBook-style wikis.
+
+Pages form a tree rooted at the wiki's base path. Every page carries the
+same sidebar, links to its parent (so the link graph has cycles) and to its
+children, repeats some links in other spellings of the same URL, and every
+so often links to a page that does not exist or carries a very large body.
+Pages are rendered on request, so serving a huge wiki needs no memory.
+Alongside the HTML, the same pages are served as Markdown through a stand-in
+for the GitBook content API, for testing the API backend.
+"""
+import argparse
+import asyncio
+import multiprocessing
+import posixpath
+import random
+import re
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional
+
+from aiohttp import web
+
+WORDS = (
+    "family boss capo soldier crime smuggling bullets rank heist casino bank cash "
+    "cooldown jail bail territory respect loyalty weapon car garage drugs booze "
+    "city market price hour travel bodyguard kill protection favour vote"
+).split()
+
+PAGE_RE = re.compile(r'page-(\d+)$')
+
+# Where the stand-in content API is served, next to the wiki
+API_PREFIX = '/api/v1'
+SPACE_ID = 'synthetic'
+
+class SyntheticWiki:
+    """A deterministic wiki of ``pages`` pages served under ``prefix``."""
+
+    def __init__(self, pages: int, seed: int = 0, fanout: int = 4, nav_size: int = 20,
+                 broken_every: int = 50, large_every: int = 500, large_size: int = 256 * 1024,
+                 prefix: str = '/wiki', api: bool = True):
+        """Describe the wiki; nothing is rendered until a page is requested.
+
+        With ``api`` unset, only the HTML is served and the content API
+        answers 404, as for a site that is not on GitBook.
+        """
+        self.pages = pages
+        self.seed = seed
+        self.fanout = fanout
+        self.nav_size = nav_size
+        self.broken_every = broken_every
+        self.large_every = large_every
+        self.large_size = large_size
+        self.prefix = prefix.rstrip('/')
+        self.api = api
+
+    def parent(self, page: int) -> Optional[int]:
+        """Return the parent of a page, or None for the root."""
+        return (page - 1) // self.fanout if page else None
+
+    def children(self, page: int) -> List[int]:
+        """Return the children of a page."""
+        first = page * self.fanout + 1
+        return list(range(first, min(first + self.fanout, self.pages)))
+
+    def path(self, page: int) -> str:
+        """Return the URL path of a page, nesting it under its ancestors."""
+        segments = []
+        while page:
+            segments.append(f"page-{page}")
+            page = self.parent(page)
+        return "/".join([self.prefix, *reversed(segments)])
+
+    def page_for_path(self, path: str) -> Optional[int]:
+        """Return the page served at ``path``, or None if there is none."""
+        if path.rstrip('/') == self.prefix:
+            return 0
+        match = PAGE_RE.search(path)
+        if not match or int(match.group(1)) >= self.pages:
+            return None
+        page = int(match.group(1))
+        return page if self.path(page) == path else None
+
+    def urls(self, base_url: str) -> List[str]:
+        """Return the URL of every page, given the base URL yielded by ``serve_wiki``."""
+        return [base_url + self.path(page)[len(self.prefix):] for page in range(self.pages)]
+
+    def api_url(self, base_url: str) -> str:
+        """Return the URL of the stand-in content API, given the base URL yielded by ``serve_wiki``."""
+        return base_url[:len(base_url) - len(self.prefix)] + API_PREFIX
+
+    def title(self, page: int) -> str:
+        """Return the title of a page."""
+        return f"Topic {page}" if page else "Synthetic Wiki"
+
+    def text(self, page: int) -> str:
+        """Return the body text of a page."""
+        rng = random.Random(self.seed * 1_000_003 + page)
+        words = rng.choices(WORDS, k=rng.randint(40, 160))
+        if self.large_every and page and page % self.large_every == 0:
+            words *= self.large_size // (len(' '.join(words)) + 1) + 1
+        return ' '.join(words)
+
+    def render(self, page: int) -> str:
+        """Return the HTML of a page."""
+        nav = ''.join(
+            f'<li><a href="{self.path(item)}">{self.title(item)}</a></li>'
+            for item in range(min(self.nav_size, self.pages))
+        )
+        links = [f'<a href="{self.path(child)}">{self.title(child)}</a>' for child in self.children(page)]
+        parent = self.parent(page)
+        if parent is not None:
+            links.append(f'<a href="{self.path(parent)}">Back to {self.title(parent)}</a>')
+        for child in self.children(page)[:1]:
+            # The same page again, once with a fragment and once relative to this one
+            relative = posixpath.relpath(self.path(child), posixpath.dirname(self.path(page)))
+            links.append(f'<a href="{self.path(child)}#details">Details</a>')
+            links.append(f'<a href="{relative}">Again</a>')
+        if self.broken_every and page % self.broken_every == self.broken_every - 1:
+            links.append(f'<a href="{self.prefix}/missing-{page}">Missing</a>')
+        return (
+            f"<html><head><title>{self.title(page)}</title></head><body>"
+            f"<nav><ul>{nav}</ul></nav>"
+            f"<main><h1>{self.title(page)}</h1><p>{self.text(page)}</p>"
+            f"<h2>Related</h2><p>{' '.join(links)}</p></main>"
+            "</body></html>"
+        )
+
+    def render_markdown(self, page: int) -> str:
+        """Return the Markdown of a page, as the content API gives it."""
+        links = [f"- [{self.title(child)}]({self.path(child)})" for child in self.children(page)]
+        if self.broken_every and page % self.broken_every == self.broken_every - 1:
+            links.append(f"- [Missing]({self.prefix}/missing-{page})")
+        related = "\n\n## Related\n\n" + "\n".join(links) if links else ""
+        return f"# {self.title(page)}\n\n{self.text(page)}{related}\n"
+
+    def page_tree(self, page: int) -> Dict:
+        """Return a page and its descendants in the content API's tree format."""
+        return {
+            'id': f"page-{page}",
+            'title': self.title(page),
+            'type': 'document',
+            'path': self.path(page)[len(self.prefix):].lstrip('/'),
+            'pages': [self.page_tree(child) for child in self.children(page)],
+        }
+
+    async def handle_resolve(self, request: web.Request) -> web.Response:
+        """Resolve a published URL to the space holding it."""
+        if not request.query.get('url', '').endswith(self.prefix):
+            raise web.HTTPNotFound()
+        return web.json_response({'space': SPACE_ID})
+
+    async def handle_content(self, request: web.Request) -> web.Response:
+        """List the whole page tree of the space."""
+        if request.match_info['space'] != SPACE_ID:
+            raise web.HTTPNotFound()
+        return web.json_response({'id': f"revision-{self.seed}", 'pages': [self.page_tree(0)]})
+
+    async def handle_page(self, request: web.Request) -> web.Response:
+        """Serve one page's Markdown."""
+        match = PAGE_RE.fullmatch(request.match_info['page'])
+        if request.match_info['space'] != SPACE_ID or not match or int(match.group(1)) >= self.pages:
+            raise web.HTTPNotFound()
+        page = int(match.group(1))
+        return web.json_response({'id': f"page-{page}", 'title': self.title(page),
+                                  'markdown': self.render_markdown(page)})
+
+    async def handle(self, request: web.Request) -> web.Response:
+        """Serve one page, or 404 for paths outside the wiki."""
+        page = self.page_for_path(request.path)
+        if page is None:
+            raise web.HTTPNotFound()
+        return web.Response(text=self.render(page), content_type='text/html')
+
+    def app(self) -> web.Application:
+        """Build the aiohttp application serving the wiki."""
+        app = web.Application()
+        if self.api:
+            app.router.add_get(f'{API_PREFIX}/urls/content', self.handle_resolve)
+            app.router.add_get(f'{API_PREFIX}/spaces/{{space}}/content', self.handle_content)
+            app.router.add_get(f'{API_PREFIX}/spaces/{{space}}/content/page/{{page}}', self.handle_page)
+        app.router.add_get('/{tail:.*}', self.handle)
+        return app
+
+@asynccontextmanager
+async def serve_wiki(wiki: SyntheticWiki, host: str = '127.0.0.1', port: int = 0,
+                     reuse_port: bool = False) -> AsyncIterator[str]:
+    """Serve a wiki on a local port and yield its base URL.
+
+    With ``reuse_port`` set, several processes can serve the same port and
+    the kernel spreads connections between them.
+    """
+    runner = web.AppRunner(wiki.app(), access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port, reuse_port=reuse_port or None)
+    await site.start()
+    bound_port = runner.addresses[0][1]
+    try:
+        yield f"http://{host}:{bound_port}{wiki.prefix}"
+    finally:
+        await runner.cleanup()
+
+async def _serve_forever(wiki: SyntheticWiki, host: str, port: int, reuse_port: bool = False) -> None:
+    """Serve a wiki until cancelled."""
+    async with serve_wiki(wiki, host, port, reuse_port) as base_url:
+        print(f"Serving a {wiki.pages}-page synthetic wiki at {base_url}")
+        await asyncio.Event().wait()
+
+def run_server(pages: int, host: str, port: int, seed: int = 0, reuse_port: bool = False) -> None:
+    """Serve a synthetic wiki in this process until interrupted; a multiprocessing target."""
+    try:
+        asyncio.run(_serve_forever(SyntheticWiki(pages, seed=seed), host, port, reuse_port))
+    except KeyboardInterrupt:
+        pass
+
+def main() -> None:
+    """Serve a synthetic wiki for manual crawls and benchmarks."""
+    parser = argparse.ArgumentParser(description="Serve a synthetic GitBook-style wiki")
+    parser.add_argument('--pages', type=int, default=10_000, help='Number of pages (default: 10000)')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for page text (default: 0)')
+    parser.add_argument('--host', type=str, default='127.0.0.1', help='Address to listen on (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8081, help='Port to listen on (default: 8081)')
+    parser.add_argument('--processes', type=int, default=1,
+                        help='Server processes sharing the port, so the server is not the bottleneck (default: 1)')
+    args = parser.parse_args()
+    if args.processes == 1:
+        run_server(args.pages, args.host, args.port, args.seed)
+        return
+    context = multiprocessing.get_context('spawn')
+    processes = [
+        context.Process(target=run_server, args=(args.pages, args.host, args.port, args.seed, True))
+        for _ in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
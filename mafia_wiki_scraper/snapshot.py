@@ -0,0 +1,155 @@
+"""Memory-mapped snapshot format with a sorted URL index for O(log n) lookups.
+
+File layout (all integers little-endian)::
+
+    header   magic "MWSNAP01", u32 version, u32 count, u64 index offset, u64 urls offset
+    records  per page: u32 length + UTF-8 JSON of the page dict
+    index    ``count`` fixed-size entries sorted by URL bytes:
+             u64 url offset, u32 url length, u64 record offset, u32 record length
+    urls     the URL bytes referenced by the index
+
+Opening a snapshot only reads the header, so it takes constant time no
+matter how large the corpus is. Lookups binary-search the index through the
+memory map and decode only the matching record.
+"""
+import json
+import mmap
+import struct
+from typing import Dict, Iterable, Iterator, List, Optional, Union
+
+from .records import PageRecord, as_dict
+
+MAGIC = b"MWSNAP01"
+FORMAT_VERSION = 1
+SNAPSHOT_EXTENSION = 'mwsnap'
+
+_HEADER = struct.Struct('<8sIIQQ')
+_LENGTH = struct.Struct('<I')
+_ENTRY = struct.Struct('<QIQI')
+
+def write_snapshot(pages: Iterable[Union[PageRecord, Dict[str, str]]], path: str) -> int:
+    """Write pages to a snapshot file and return the number of records."""
+    entries = []
+    with open(path, 'wb') as f:
+        f.write(b"\0" * _HEADER.size)
+        for page in pages:
+            record = json.dumps(as_dict(page), ensure_ascii=False).encode('utf-8')
+            offset = f.tell()
+            f.write(_LENGTH.pack(len(record)))
+            f.write(record)
+            entries.append((page['url'].encode('utf-8'), offset + _LENGTH.size, len(record)))
+
+        # Later duplicates of a URL win, matching dict semantics
+        entries = sorted({url: (url, offset, length) for url, offset, length in entries}.values())
+        index_offset = f.tell()
+        urls_offset = index_offset + _ENTRY.size * len(entries)
+        url_offset = urls_offset
+        for url, offset, length in entries:
+            f.write(_ENTRY.pack(url_offset, len(url), offset, length))
+            url_offset += len(url)
+        for url, _, _ in entries:
+            f.write(url)
+
+        f.seek(0)
+        f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, len(entries), index_offset, urls_offset))
+    return len(entries)
+
+class SnapshotReader:
+    """Random access to a snapshot file through ``mmap``."""
+
+    def __init__(self, path: str):
+        """Map the file and validate its header."""
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"{path} is not a snapshot file")
+        if len(self._map) < _HEADER.size:
+            self.close()
+            raise ValueError(f"{path} is not a snapshot file")
+        magic, version, self.count, self.index_offset, self.urls_offset = _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a version {FORMAT_VERSION} snapshot file")
+
+    def __enter__(self):
+        """Context manager entry."""
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit."""
+        self.close()
+
+    def __len__(self) -> int:
+        """Return the number of pages in the snapshot."""
+        return self.count
+
+    def __contains__(self, url: str) -> bool:
+        """Return whether the snapshot holds a page for ``url``."""
+        return self._find(url) is not None
+
+    def __iter__(self) -> Iterator[Dict[str, str]]:
+        """Yield every page in URL order."""
+        for position in range(self.count):
+            yield self._record(position)
+
+    def close(self) -> None:
+        """Unmap and close the file."""
+        self._map.close()
+        self._file.close()
+
+    def _entry(self, position: int):
+        """Return the index entry at ``position``."""
+        return _ENTRY.unpack_from(self._map, self.index_offset + position * _ENTRY.size)
+
+    def _url(self, position: int) -> bytes:
+        """Return the URL bytes of the index entry at ``position``."""
+        url_offset, url_length, _, _ = self._entry(position)
+        return self._map[url_offset:url_offset + url_length]
+
+    def _record(self, position: int) -> Dict[str, str]:
+        """Decode the record referenced by the index entry at ``position``."""
+        _, _, offset, length = self._entry(position)
+        return json.loads(self._map[offset:offset + length].decode('utf-8'))
+
+    def _find(self, url: str) -> Optional[int]:
+        """Binary-search the index for ``url``."""
+        target = url.encode('utf-8')
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self._url(middle) < target:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self.count and self._url(low) == target:
+            return low
+        return None
+
+    def get(self, url: str) -> Optional[Dict[str, str]]:
+        """Return the page for ``url``, or None if it is not in the snapshot."""
+        position = self._find(url)
+        return None if position is None else self._record(position)
+
+    def urls(self) -> Iterator[str]:
+        """Yield every URL in sorted order without decoding any records."""
+        for position in range(self.count):
+            yield self._url(position).decode('utf-8')
+
+def is_snapshot(path: str) -> bool:
+    """Return whether ``path`` starts with the snapshot magic bytes."""
+    try:
+        with open(path, 'rb') as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+def read_pages(path: str) -> List[Dict[str, str]]:
+    """Return every page in a binary snapshot or a JSON output file."""
+    if is_snapshot(path):
+        with SnapshotReader(path) as reader:
+            return list(reader)
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
@@ -0,0 +1,115 @@
+"""Structured extraction of a page's section tree, tables and lists."""
+import re
+from typing import Dict, List, Union
+
+from bs4 import BeautifulSoup, NavigableString, Tag
+
+HEADINGS = ('h1', 'h2', 'h3', 'h4', 'h5', 'h6')
+LISTS = ('ul', 'ol')
+NUMBER_RE = re.compile(r'[-+]?(\d{1,3}(,\d{3})+|\d+)(\.\d+)?')
+
+Value = Union[str, int, float]
+
+def parse_value(text: str) -> Value:
+    """Return ``text`` as an int or float if it is a plain number, otherwise unchanged."""
+    if not NUMBER_RE.fullmatch(text):
+        return text
+    number = text.replace(',', '')
+    digits = number.split('.')[0].lstrip('+-')
+    # Identifiers such as "007" only look like numbers; typing them would drop their leading zeros
+    if str(int(digits)) != digits:
+        return text
+    return float(number) if '.' in number else int(number)
+
+def cell_text(cell: Tag) -> str:
+    """Return the whitespace-normalised text of a table cell or list item."""
+    return cell.get_text(separator=' ', strip=True)
+
+def parse_table(table: Tag) -> Dict[str, List]:
+    """Return a table's header row and typed data rows.
+
+    Cells spanning several columns are repeated so every row lines up with
+    the headers. A first row made only of ``<th>`` cells is the header.
+    """
+    rows = []
+    for row in table.find_all('tr'):
+        if row.find_parent('table') is not table:
+            continue
+        cells = []
+        for cell in row.find_all(('td', 'th'), recursive=False):
+            try:
+                span = max(1, int(cell.get('colspan', 1)))
+            except ValueError:
+                span = 1
+            cells.extend([cell] * span)
+        if cells:
+            rows.append(cells)
+
+    headers: List[str] = []
+    if rows and all(cell.name == 'th' for cell in rows[0]):
+        headers = [cell_text(cell) for cell in rows.pop(0)]
+    return {
+        'headers': headers,
+        'rows': [[parse_value(cell_text(cell)) for cell in row] for row in rows],
+    }
+
+def parse_list(element: Tag) -> Dict:
+    """Return a list's items; nested lists become the ``items`` of their parent item."""
+    items = []
+    for item in element.find_all('li', recursive=False):
+        nested = [parse_list(child) for child in item.find_all(LISTS, recursive=False)]
+        text = ' '.join(
+            child.get_text(separator=' ', strip=True) if isinstance(child, Tag) else child.strip()
+            for child in item.children
+            if not (isinstance(child, Tag) and child.name in LISTS)
+        ).strip()
+        items.append({'text': ' '.join(text.split()), 'lists': nested} if nested else text)
+    return {'ordered': element.name == 'ol', 'items': items}
+
+def new_section(heading: str, level: int) -> Dict:
+    """Return an empty section node."""
+    return {'heading': heading, 'level': level, 'text': '', 'tables': [], 'lists': [], 'sections': []}
+
+def extract_document(soup: BeautifulSoup) -> Dict:
+    """Build a section tree with typed tables and lists from a parsed page.
+
+    The root section holds content before the first heading. Each heading
+    starts a section nested under the closest preceding heading of a higher
+    level. Table and list contents appear only in ``tables`` and ``lists``,
+    not in the section ``text``.
+    """
+    root = new_section('', 0)
+    stack = [root]
+    text: Dict[int, List[str]] = {id(root): []}
+    consumed = set()
+
+    for node in (soup.body or soup).descendants:
+        if id(node) in consumed:
+            continue
+        if isinstance(node, Tag) and node.name in HEADINGS + ('table',) + LISTS:
+            consumed.update(id(child) for child in node.descendants)
+            if node.name == 'table':
+                stack[-1]['tables'].append(parse_table(node))
+            elif node.name in LISTS:
+                stack[-1]['lists'].append(parse_list(node))
+            else:
+                level = int(node.name[1])
+                while stack[-1]['level'] >= level:
+                    stack.pop()
+                section = new_section(cell_text(node), level)
+                stack[-1]['sections'].append(section)
+                stack.append(section)
+                text[id(section)] = []
+        elif type(node) is NavigableString:
+            stripped = node.strip()
+            if stripped:
+                text[id(stack[-1])].append(stripped)
+
+    def finish(section: Dict) -> None:
+        """Join each section's collected text."""
+        section['text'] = ' '.join(text[id(section)])
+        for child in section['sections']:
+            finish(child)
+
+    finish(root)
+    return root
@@ -0,0 +1,109 @@
+"""Benchmarks behind the speed and memory figures quoted for past changes.
+
+These reconstruct the code paths each change replaced and measure both, so
+the figures can be reproduced. They only run when ``MAFIA_BENCHMARKS=1`` is
+set; run with ``-s`` to see the numbers.
+"""
+import os
+import random
+import sys
+import time
+import timeit
+import tracemalloc
+
+import pytest
+
+from ..decoding import declared_encoding
+from ..extract import content_hash
+from ..records import PageRecord
+
+pytestmark = [
+    pytest.mark.benchmark,
+    pytest.mark.skipif(os.environ.get('MAFIA_BENCHMARKS') != '1', reason="set MAFIA_BENCHMARKS=1 to run"),
+]
+
+CONTENT_TYPE = "text/html; charset=utf-8"
+
+def synthetic_page(size: int, non_ascii: float, seed: int = 0) -> bytes:
+    """Return a UTF-8 HTML page of about ``size`` bytes with a ``non_ascii`` share of non-ASCII words."""
+    rng = random.Random(seed)
+    words, length = [], 0
+    while length < size:
+        word = rng.choice(("café", "naïve", "über", "€100")) if rng.random() < non_ascii else \
+            rng.choice(("family", "boss", "capo", "heist", "casino", "respect"))
+        words.append(word)
+        length += len(word.encode('utf-8')) + 1
+    return f"<html><head><title>Bench</title></head><body><p>{' '.join(words)}</p></body></html>".encode('utf-8')
+
+def decode_then_hash(content: bytes) -> str:
+    """The path replaced in user-043: decode to ``str`` for the parser, then re-encode it to hash."""
+    text = content.decode(declared_encoding(content, CONTENT_TYPE))
+    return content_hash(text)
+
+def hash_bytes(content: bytes) -> str:
+    """The current path: choose the encoding from the prefix and hash the raw bytes."""
+    declared_encoding(content, CONTENT_TYPE)
+    return content_hash(content)
+
+def peak_allocated(fn, *args) -> int:
+    """Return the peak bytes traced while calling ``fn``."""
+    tracemalloc.start()
+    try:
+        fn(*args)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+@pytest.mark.parametrize("size, non_ascii", [(14 * 1024, 0.0), (256 * 1024, 0.1)])
+def test_raw_bytes_skip_the_decoded_copy(size, non_ascii):
+    """Test that hashing raw bytes is no slower than decoding and re-encoding, and allocates no copy."""
+    content = synthetic_page(size, non_ascii)
+    timings = {}
+    for fn in (decode_then_hash, hash_bytes):
+        runs = timeit.repeat(lambda: fn(content), number=50, repeat=5)
+        timings[fn.__name__] = min(runs) / 50
+    allocated = {fn.__name__: peak_allocated(fn, content) for fn in (decode_then_hash, hash_bytes)}
+    print(f"{len(content) // 1024} KB page, {non_ascii:.0%} non-ASCII: "
+          f"{timings['hash_bytes'] * 1e6:.0f} us vs {timings['decode_then_hash'] * 1e6:.0f} us, "
+          f"{allocated['hash_bytes'] / 1024:.0f} KB vs {allocated['decode_then_hash'] / 1024:.0f} KB allocated")
+
+    assert decode_then_hash(content) == hash_bytes(content)
+    assert allocated['hash_bytes'] * 10 < allocated['decode_then_hash']
+    # Within noise for ASCII pages, where decoding is a memcpy; clearly faster otherwise
+    assert timings['hash_bytes'] < timings['decode_then_hash'] * (1.25 if non_ascii == 0 else 0.75)
+
+def test_page_records_halve_per_page_memory():
+    """Test that a PageRecord takes well under the memory of the dict and fetched_at entry it replaced (user-045)."""
+    pages = 100_000
+    # The strings are shared with the link sets and responses either way, so create them up front
+    urls = [sys.intern(f"https://example.com/wiki/page-{n}") for n in range(pages)]
+    titles = [f"Topic {n}" for n in range(pages)]
+    contents = [f"Text of page {n}" for n in range(pages)]
+    hashes = [content_hash(content) for content in contents]
+    now = time.time()
+
+    def dicts():
+        """Build the dict per page plus the separate fetched_at map the scraper used to keep."""
+        fetched_at = {}
+        results = []
+        for url, title, content in zip(urls, titles, contents):
+            results.append({'url': url, 'title': title, 'content': content})
+            fetched_at[url] = now + 0.5
+        return results, fetched_at
+
+    def records():
+        """Build one PageRecord per page, with the status, fetch time, hash and size it now carries."""
+        return [PageRecord(url, title, content, 200, now + 0.5, digest, len(content))
+                for url, title, content, digest in zip(urls, titles, contents, hashes)]
+
+    per_page = {}
+    for build in (dicts, records):
+        tracemalloc.start()
+        kept = build()
+        per_page[build.__name__] = tracemalloc.get_traced_memory()[0] / pages
+        tracemalloc.stop()
+        del kept
+    print(f"dict plus fetched_at entry: {per_page['dicts']:.0f} bytes per page, "
+          f"PageRecord: {per_page['records']:.0f} bytes per page")
+
+    assert per_page['records'] < per_page['dicts'] * 0.6
@@ -0,0 +1,88 @@
+"""Tests for the extraction cache."""
+from unittest.mock import patch
+
+import pytest
+from aioresponses import aioresponses
+
+from ..cache import ExtractionCache
+from ..decoding import DEFAULT_ENCODING
+from ..extract import Extraction, extract, extraction_key
+from ..scraper import WikiScraper
+
+@pytest.fixture
+def cache_path(tmp_path):
+    """Fixture for a cache database path."""
+    return str(tmp_path / "extractions.sqlite")
+
+def test_get_put(cache_path):
+    """Test storing and retrieving an extraction."""
+    extraction = Extraction("Title", "Some text", ["/page1", "https://external.com"])
+    with ExtractionCache(cache_path) as cache:
+        assert cache.get("abc") is None
+        cache.put("abc", extraction)
+        assert cache.get("abc") == extraction
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    with ExtractionCache(cache_path) as cache:
+        assert cache.get("abc") == extraction
+
+def test_version_bump_invalidates(cache_path):
+    """Test that entries from another extractor version are discarded."""
+    with ExtractionCache(cache_path, version=1) as cache:
+        cache.put("abc", Extraction("Title", "Old text", []))
+
+    with ExtractionCache(cache_path, version=2) as cache:
+        assert cache.get("abc") is None
+        assert len(cache) == 0
+
+def test_size_eviction(cache_path):
+    """Test that least recently used entries are evicted over the size limit."""
+    with ExtractionCache(cache_path, max_bytes=250) as cache:
+        for i in range(3):
+            cache.put(f"hash{i}", Extraction("", "x" * 100, []))
+        assert cache.get("hash0") is None
+        assert cache.get("hash2") is not None
+        assert cache.total_bytes <= 250
+
+@pytest.mark.asyncio
+async def test_scraper_skips_parsing_unchanged_pages(cache_path):
+    """Test that discovery and fetch share one parse per unchanged page."""
+    html = '<html><head><title>Main</title></head><body>Text <a href="/page1">Link</a></body></html>'
+    with ExtractionCache(cache_path) as cache:
+        async with WikiScraper("https://example.com", cache=cache) as scraper:
+            with aioresponses() as m:
+                m.get("https://example.com", status=200, content_type='text/html', body=html, repeat=True)
+                with patch("mafia_wiki_scraper.scraper.extract", wraps=extract) as mock_extract:
+                    links = await scraper.get_internal_links("https://example.com")
+                    page = await scraper.scrape_page("https://example.com")
+
+        assert links == {"https://example.com/page1"}
+        assert page["title"] == "Main"
+        assert mock_extract.call_count == 1
+        assert cache.get(extraction_key(html, DEFAULT_ENCODING)).links == ["/page1"]
+
+@pytest.mark.asyncio
+async def test_encoding_is_part_of_the_key(cache_path):
+    """Test that the same bytes decoded with another encoding are not served from the cache."""
+    html = '<html><head><title>Caf\u00e9</title></head><body>Caf\u00e9 cr\u00e8me</body></html>'.encode('utf-8')
+    with ExtractionCache(cache_path) as cache:
+        with aioresponses() as m:
+            m.get("https://a.example.com", status=200, body=html, content_type='text/html; charset=utf-8')
+            m.get("https://b.example.com", status=200, body=html, content_type='text/html; charset=latin-1')
+            async with WikiScraper("https://a.example.com", cache=cache) as scraper:
+                utf8 = await scraper.scrape_page("https://a.example.com")
+                latin1 = await scraper.scrape_page("https://b.example.com")
+
+    assert utf8.title == "Caf\u00e9"
+    assert latin1.title == "Caf\u00c3\u00a9"
+    assert cache.misses == 2
+
+def test_sections_round_trip(cache_path):
+    """Test that sections are cached and entries without them miss when sections are needed."""
+    html = '<html><body><h1>Ranks</h1><p>Rank up</p></body></html>'
+    with ExtractionCache(cache_path) as cache:
+        cache.put("plain", extract(html))
+        cache.put("sectioned", extract(html, sections=True))
+        assert cache.get("plain", sections=True) is None
+        assert cache.get("plain").sections is None
+        assert cache.get("sectioned", sections=True) == extract(html, sections=True)
@@ -0,0 +1,86 @@
+"""Tests for heading-aware chunking."""
+from argparse import Namespace
+from unittest.mock import patch
+
+import pytest
+from aioresponses import aioresponses
+
+from ..chunking import ChunkWriter, chunk_sections, read_chunks, split_words
+from ..cli import chunks_path, scrape_site
+from ..extract import Section, extract
+from ..scraper import WikiScraper
+
+PAGE = """
+<html><head><title>Crimes</title></head><body>
+<nav>Home</nav>
+<h1>Crimes</h1><p>Crimes earn money.</p>
+<h2>Cooldowns</h2><p>Each crime has a <b>cooldown</b>.</p>
+<h3>Jail</h3><p>Failing sends you to jail.</p>
+<h4>Bail</h4><p>Bail costs money.</p>
+<h2>Rewards <span>table</span></h2><ul><li>Cash</li><li>Rank</li></ul>
+<script>var ignored = 1;</script>
+</body></html>
+"""
+
+@pytest.fixture
+def sections():
+    """Fixture for the sections of the test page."""
+    return extract(PAGE, sections=True).sections
+
+def test_extract_sections(sections):
+    """Test that sections follow the h1-h3 structure of the page."""
+    assert sections == [
+        Section([], "Home"),
+        Section(["Crimes"], "Crimes earn money."),
+        Section(["Crimes", "Cooldowns"], "Each crime has a cooldown ."),
+        Section(["Crimes", "Cooldowns", "Jail"], "Failing sends you to jail. Bail Bail costs money."),
+        Section(["Crimes", "Rewards table"], "Cash Rank"),
+    ]
+    assert extract(PAGE).sections is None
+
+def test_chunk_ids_are_stable(sections):
+    """Test that chunk IDs survive edits to their text and to other sections."""
+    chunks = chunk_sections("https://example.com/crimes", sections)
+    assert [chunk.position for chunk in chunks] == list(range(5))
+    assert chunks[2].words == 6 and chunks[2].chars == len(chunks[2].text)
+
+    edited = [Section(["Crimes", "Cooldowns"], "Cooldowns were removed.")] + sections[4:]
+    edited_chunks = chunk_sections("https://example.com/crimes", edited)
+    assert edited_chunks[0].id == chunks[2].id
+    assert edited_chunks[0].hash != chunks[2].hash
+    assert edited_chunks[1] == chunks[4]._replace(position=1)
+
+def test_long_sections_are_split():
+    """Test that sections are split by word count."""
+    assert split_words("a b c d e", 2) == ["a b", "c d", "e"]
+    chunks = chunk_sections("https://example.com", [Section(["Ranks"], "a b c d e")], max_words=2)
+    assert [chunk.text for chunk in chunks] == ["a b", "c d", "e"]
+    assert len({chunk.id for chunk in chunks}) == 3
+
+def test_writer_reports_changes(tmp_path):
+    """Test that the writer compares chunk hashes with the previous file."""
+    path = str(tmp_path / "site.chunks.jsonl")
+    url = "https://example.com"
+    with ChunkWriter(path) as writer:
+        writer.write(chunk_sections(url, [Section(["A"], "one"), Section(["B"], "two")]))
+    assert writer.stats == {'new': 2, 'changed': 0, 'unchanged': 0, 'removed': 0}
+
+    with ChunkWriter(path) as writer:
+        writer.write(chunk_sections(url, [Section(["A"], "one"), Section(["C"], "three")]))
+    assert writer.stats == {'new': 1, 'changed': 0, 'unchanged': 1, 'removed': 1}
+    assert [record['text'] for record in read_chunks(path)] == ["one", "three"]
+
+@pytest.mark.asyncio
+async def test_scrape_site_writes_chunks(tmp_path, monkeypatch):
+    """Test that --chunks writes chunks while scraping."""
+    monkeypatch.chdir(tmp_path)
+    args = Namespace(format='json', chunks=True)
+    async with WikiScraper("https://example.com") as scraper:
+        with aioresponses() as m:
+            m.get("https://example.com", status=200, content_type='text/html', body=PAGE, repeat=True)
+            with patch("mafia_wiki_scraper.cli.save_output", return_value="out.json"):
+                await scrape_site(scraper, args)
+
+    records = list(read_chunks(chunks_path()))
+    assert [record['headings'] for record in records][1] == ["Crimes"]
+    assert {record['url'] for record in records} == {"https://example.com"}
@@ -6,7 +6,9 @@ import pytest
 from unittest.mock import patch, MagicMock, AsyncMock
 from argparse import Namespace
 
-from ..cli import save_output, run_scraper, main, cli_main
+from ..cli import save_output, run_scraper, main, cli_main, load_sites, site_name, start_urls
+from ..scraper import WikiScraper
+from ..records import PageRecord
 
 @pytest.fixture
 def mock_data():
@@ -102,6 +104,24 @@ async def test_main_with_custom_format(tmp_path, mock_scraper):
             args = mock_run.call_args[0][0]
             assert args.format == 'json'
 
+@pytest.mark.asyncio
+@pytest.mark.parametrize("output_format, options, message", [
+    ("parquet", ['--compress', 'gzip'], "--compress cannot be used with --format parquet"),
+    ("snapshot", ['--compress', 'zstd', '--shard-size', '10MB'],
+     "--compress and --shard-size cannot be used with --format snapshot"),
+])
+async def test_main_rejects_compression_for_binary_formats(output_format, options, message, capsys):
+    """Test that compression and sharding options are refused for formats that cannot honour them."""
+    with patch('sys.argv', ['scraper', '--format', output_format] + options):
+        with patch('mafia_wiki_scraper.cli.run_scraper') as mock_run:
+            with pytest.raises(SystemExit) as exit_info:
+                await main()
+            mock_run.assert_not_called()
+    assert exit_info.value.code == 2
+    assert message in capsys.readouterr().err
+    with pytest.raises(ValueError):
+        save_output([], output_format, compression='gzip')
+
 @pytest.mark.asyncio
 async def test_main_with_custom_url(tmp_path, mock_scraper):
     """Test main function with custom URL."""
@@ -113,7 +133,7 @@ async def test_main_with_custom_url(tmp_path, mock_scraper):
             await main()
             mock_run.assert_called_once()
             args = mock_run.call_args[0][0]
-            assert args.url == test_url
+            assert args.url == [test_url]
 
 @pytest.mark.asyncio
 async def test_main_keyboard_interrupt(tmp_path, mock_scraper):
@@ -152,3 +172,88 @@ def test_cli_main_general_exception(tmp_path, mock_scraper):
                 with pytest.raises(Exception, match=test_error):
                     cli_main()
                 mock_print.assert_called_once_with(f"An error occurred: {test_error}")
+
+@pytest.mark.asyncio
+async def test_run_scraper_streams_columnar(temp_output_dir):
+    """Test that columnar formats are written while pages are fetched, with each record's metadata."""
+    pq = pytest.importorskip("pyarrow.parquet")
+    args = Namespace(url="https://example.com", format="parquet")
+    record = PageRecord("https://example.com", "Test", "Content", status=203, fetched_at=1700000000.25,
+                        content_hash="cd" * 32, size=2048)
+
+    with patch("mafia_wiki_scraper.cli.WikiScraper") as MockScraper:
+        mock_instance = MagicMock()
+        mock_instance.results = []
+
+        async def discover():
+            yield 1, 1
+
+        async def fetch():
+            mock_instance.results.append(record)
+            yield 1, 1
+
+        mock_instance.get_all_internal_links = discover
+        mock_instance.fetch_pages_with_progress = fetch
+        MockScraper.return_value.__aenter__.return_value = mock_instance
+
+        await run_scraper(args)
+
+    output_file = next((temp_output_dir / "output").glob("*.parquet"))
+    [row] = pq.read_table(str(output_file)).to_pylist()
+    assert (row['url'], row['title'], row['content']) == ("https://example.com", "Test", "Content")
+    assert row['status'] == 203
+    assert row['fetched_at'].timestamp() == 1700000000.25
+    assert (row['content_hash'], row['byte_size']) == ("cd" * 32, 2048)
+
+def test_start_urls_from_flags_and_config(tmp_path):
+    """Test collecting start URLs from repeated --url flags and a config file."""
+    config = tmp_path / "sites.json"
+    config.write_text(json.dumps({"sites": [{"url": "https://b.com/docs"}, {"url": "https://a.com"}]}))
+
+    assert load_sites(str(config)) == ["https://b.com/docs", "https://a.com"]
+    args = Namespace(url=["https://a.com", "https://c.com"], config=str(config))
+    assert start_urls(args) == ["https://a.com", "https://c.com", "https://b.com/docs"]
+    assert start_urls(Namespace(url=None)) == ["https://mafiagame.gitbook.io/bnb-mafia"]
+    assert site_name("https://bnb-mafia.gitbook.io/bnb-mafia") == "bnb-mafia.gitbook.io_bnb-mafia"
+
+@pytest.mark.asyncio
+async def test_run_scraper_multiple_sites(temp_output_dir):
+    """Test that several sites share one session and each get their own output."""
+    from aioresponses import aioresponses
+    args = Namespace(url=["https://a.com", "https://b.com"], format="json", ignore_robots=True, rate=100.0)
+
+    with aioresponses() as m:
+        for site in ("a", "b"):
+            m.get(f"https://{site}.com", status=200, content_type='text/html', repeat=True,
+                  body=f"<html><head><title>{site}</title></head><body>Site {site}</body></html>")
+        with patch("mafia_wiki_scraper.cli.WikiScraper", wraps=WikiScraper) as MockScraper:
+            await run_scraper(args)
+
+    sessions = {id(call.kwargs['session']) for call in MockScraper.call_args_list}
+    assert len(sessions) == 1
+    outputs = sorted(p.name for p in (temp_output_dir / "output").glob("*.json"))
+    assert [name.split("_")[0] for name in outputs] == ["a.com", "b.com"]
+    with open(temp_output_dir / "output" / outputs[0], 'r', encoding='utf-8') as f:
+        assert json.load(f)[0]["title"] == "a"
+
+@pytest.mark.asyncio
+async def test_replay_is_not_throttled(temp_output_dir):
+    """Test that replaying an archive skips the live crawl's rate limit and robots.txt."""
+    import time
+    from ..sitegen import SyntheticWiki, serve_wiki
+    warc = str(temp_output_dir / "crawl.warc.gz")
+    wiki = SyntheticWiki(40, large_every=0)
+    async with serve_wiki(wiki) as base_url:
+        await run_scraper(Namespace(url=base_url, format="json", warc=warc, ignore_robots=True, rate=1000.0))
+    for output in (temp_output_dir / "output").glob("*.json"):
+        output.unlink()
+
+    # At the default 5 requests a second, replaying 40 pages twice over would take 16s
+    start = time.perf_counter()
+    with patch("mafia_wiki_scraper.cli.WikiScraper", wraps=WikiScraper) as MockScraper:
+        await run_scraper(Namespace(url=base_url, format="json", replay=warc))
+    assert time.perf_counter() - start < 5
+    assert MockScraper.call_args.kwargs['scheduler'] is None
+    [output] = (temp_output_dir / "output").glob("*.json")
+    with open(output, 'r', encoding='utf-8') as f:
+        assert len(json.load(f)) == 40
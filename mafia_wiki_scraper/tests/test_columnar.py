@@ -0,0 +1,87 @@
+"""Tests for the columnar export module."""
+import json
+import os
+
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+
+from ..cli import save_output
+from ..columnar import ColumnarWriter, read_columnar
+from ..records import PageRecord
+
+@pytest.fixture
+def pages():
+    """Fixture for scraped pages with repeated titles and non-ASCII text."""
+    return [
+        {"url": f"https://example.com/page{i}", "title": "Ranks | $MAFIA", "content": f"Content {i} 💊"}
+        for i in range(5)
+    ]
+
+@pytest.fixture
+def temp_output_dir(tmp_path):
+    """Fixture for temporary output directory."""
+    original_dir = os.getcwd()
+    os.chdir(tmp_path)
+    yield tmp_path
+    os.chdir(original_dir)
+
+@pytest.mark.parametrize("output_format", ["parquet", "arrow"])
+def test_round_trip_matches_json(pages, temp_output_dir, output_format):
+    """Test that columnar output reads back identical to the JSON output."""
+    json_file = save_output(pages, "json")
+    columnar_file = save_output(pages, output_format)
+
+    with open(json_file, 'r', encoding='utf-8') as f:
+        json_pages = json.load(f)
+    assert read_columnar(columnar_file) == json_pages
+
+def test_writer_streams_record_batches(pages, tmp_path):
+    """Test that rows are flushed in record batches of the configured size."""
+    path = str(tmp_path / "pages.arrow")
+    with ColumnarWriter(path, "arrow", batch_size=2) as writer:
+        for page in pages:
+            writer.write(page, fetched_at=1700000000.0)
+
+    with pa.memory_map(path, 'r') as source:
+        reader = ipc.open_file(source)
+        assert reader.num_record_batches == 3
+        table = reader.read_all()
+    assert writer.rows_written == 5
+    assert pa.types.is_dictionary(table.schema.field('title').type)
+    row = table.slice(0, 1).to_pylist()[0]
+    assert row['status'] == 200
+    assert row['byte_size'] == len(pages[0]['content'].encode('utf-8'))
+    assert len(row['content_hash']) == 64
+
+def test_writer_keeps_record_metadata(tmp_path):
+    """Test that a record's status, fetch time, and hash and size of its fetched bytes are written as they are."""
+    path = str(tmp_path / "pages.parquet")
+    record = PageRecord("https://example.com/gone", "Gone", "Moved away", status=410,
+                        fetched_at=1700000000.5, content_hash="ab" * 32, size=4096)
+    with ColumnarWriter(path, "parquet") as writer:
+        writer.write(record)
+
+    row = pq.read_table(path).to_pylist()[0]
+    assert row['status'] == 410
+    assert row['fetched_at'].timestamp() == 1700000000.5
+    assert row['content_hash'] == "ab" * 32
+    assert row['byte_size'] == 4096
+
+def test_parquet_uses_zstd(pages, tmp_path):
+    """Test that Parquet output is zstd compressed."""
+    path = str(tmp_path / "pages.parquet")
+    with ColumnarWriter(path, "parquet") as writer:
+        for page in pages:
+            writer.write(page)
+
+    metadata = pq.ParquetFile(path).metadata
+    assert metadata.num_rows == 5
+    assert metadata.row_group(0).column(0).compression == 'ZSTD'
+
+def test_writer_rejects_unknown_format(tmp_path):
+    """Test that unsupported formats are rejected."""
+    with pytest.raises(ValueError):
+        ColumnarWriter(str(tmp_path / "pages.csv"), "csv")
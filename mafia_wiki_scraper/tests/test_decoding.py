@@ -0,0 +1,38 @@
+"""Tests for choosing a page's encoding."""
+import codecs
+
+from ..decoding import Body, declared_encoding, header_encoding, meta_encoding
+from ..extract import extract
+
+def test_header_charset():
+    """Test that the Content-Type charset is read and validated."""
+    assert header_encoding('text/html; charset="ISO-8859-1"') == 'iso-8859-1'
+    assert header_encoding('text/html;charset=utf-8') == 'utf-8'
+    assert header_encoding('text/html') is None
+    assert header_encoding('text/html; charset=bogus') is None
+    assert header_encoding(None) is None
+
+def test_names_accepted_by_lxml():
+    """Test that aliases only Python or only libxml2 knows map to a name both accept."""
+    assert header_encoding('text/html; charset=latin-1') == 'iso8859-1'
+    assert header_encoding('text/html; charset=utf-16le') == 'utf-16le'
+
+def test_meta_charset_in_prefix_only():
+    """Test that <meta> declarations are found only near the start of the document."""
+    assert meta_encoding(b'<html><head><meta charset="windows-1252">') == 'windows-1252'
+    assert meta_encoding(b'<meta http-equiv="Content-Type" content="text/html; charset=koi8-r">') == 'koi8-r'
+    assert meta_encoding(b' ' * 2048 + b'<meta charset="koi8-r">') is None
+
+def test_bom_wins_over_declarations():
+    """Test that a byte order mark overrides the header and <meta> tag."""
+    content = codecs.BOM_UTF16_LE + '<meta charset="latin-1">'.encode('utf-16-le')
+    assert declared_encoding(content, 'text/html; charset=latin-1') == 'utf-16le'
+    assert declared_encoding(b'<p>plain</p>', 'text/html; charset=latin-1') == 'iso8859-1'
+    assert declared_encoding(b'<p>plain</p>') is None
+
+def test_extract_from_bytes_matches_text():
+    """Test that extracting raw bytes gives the same result as extracting decoded text."""
+    html = '<html><head><title>Niño</title></head><body><a href="/x">été</a></body></html>'
+    body = Body(html.encode('latin-1'), 'latin-1')
+
+    assert extract(body.content, encoding=body.encoding) == extract(body.text())
@@ -0,0 +1,212 @@
+"""Tests for the shared frontier and multi-process crawls."""
+import asyncio
+import glob
+import json
+import multiprocessing
+import os
+import signal
+from argparse import Namespace
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+import pytest
+from aiohttp import web
+
+from ..cli import run_scraper
+from ..frontier import CLAIMED, DONE, FAILED, PENDING, Frontier
+from ..history import HistoryStore
+from ..parallel import crawl_parallel, merge_outputs, resolve_base_url, worker_main
+from ..redirects import RedirectMap
+from ..sitegen import SyntheticWiki, serve_wiki
+
+@asynccontextmanager
+async def serve_moved(wiki: SyntheticWiki, base_url: str) -> AsyncIterator[str]:
+    """Serve a host that permanently redirects every path to the wiki at ``base_url``; yield its old URL."""
+    async def moved(request: web.Request) -> web.Response:
+        """Send every request on the old host to the same path on the new one."""
+        raise web.HTTPMovedPermanently(base_url[:-len(wiki.prefix)] + request.path)
+
+    old = web.Application()
+    old.router.add_get('/{tail:.*}', moved)
+    runner = web.AppRunner(old)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    try:
+        yield f"http://127.0.0.1:{runner.addresses[0][1]}{wiki.prefix}"
+    finally:
+        await runner.cleanup()
+
+def claim_until_empty(path, worker, output):
+    """Claim URLs in small batches and record them, as a worker process would."""
+    claimed = []
+    with Frontier(path) as frontier:
+        while True:
+            urls = frontier.claim(worker, 7)
+            if not urls:
+                break
+            claimed.extend(urls)
+            frontier.complete(urls)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(claimed, f)
+
+@pytest.fixture
+def frontier_path(tmp_path):
+    """Fixture for a frontier database path."""
+    return str(tmp_path / "frontier.sqlite")
+
+def test_add_claim_complete(frontier_path):
+    """Test the life cycle of frontier URLs."""
+    with Frontier(frontier_path) as frontier:
+        assert frontier.add(["a", "b", "c"]) == 3
+        assert frontier.add(["a", "d"]) == 1
+        claimed = frontier.claim(1, 3)
+        assert len(claimed) == 3 and not frontier.finished()
+        assert frontier.count(PENDING) == 1 and frontier.count(CLAIMED) == 3
+
+        frontier.complete(claimed[:2])
+        frontier.complete(claimed[2:], FAILED)
+        assert frontier.claim(2, 10) == [url for url in "abcd" if url not in claimed]
+        assert frontier.release(2) == 1
+        assert frontier.count(PENDING) == 1
+        frontier.complete(frontier.claim(1, 10))
+        assert frontier.finished()
+        assert (frontier.count(DONE), frontier.count(FAILED)) == (3, 1)
+
+def test_each_url_claimed_once_across_processes(frontier_path, tmp_path):
+    """Test that concurrent processes never claim the same URL."""
+    urls = [f"https://example.com/page-{i}" for i in range(500)]
+    with Frontier(frontier_path) as frontier:
+        frontier.add(urls)
+
+    context = multiprocessing.get_context('spawn')
+    outputs = [str(tmp_path / f"claimed-{worker}.json") for worker in range(4)]
+    processes = [context.Process(target=claim_until_empty, args=(frontier_path, worker, output))
+                 for worker, output in enumerate(outputs)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    claimed = []
+    for output in outputs:
+        with open(output, encoding='utf-8') as f:
+            claimed.extend(json.load(f))
+    assert sorted(claimed) == sorted(urls)
+
+def test_merge_outputs_deduplicates(tmp_path):
+    """Test that merged worker outputs hold each page once, sorted by URL."""
+    first, second = tmp_path / "worker-1.jsonl", tmp_path / "worker-2.jsonl"
+    first.write_text(json.dumps({"url": "b", "content": "old"}) + "\n" + json.dumps({"url": "a"}) + "\n")
+    second.write_text(json.dumps({"url": "b", "content": "new"}) + "\n")
+    merged = merge_outputs([str(first), str(second), str(tmp_path / "missing.jsonl")])
+    assert merged == [{"url": "a"}, {"url": "b", "content": "new"}]
+
+@pytest.mark.asyncio
+async def test_crawl_parallel(tmp_path):
+    """Test that several worker processes crawl every page exactly once."""
+    wiki = SyntheticWiki(120, broken_every=25, large_every=0)
+    async with serve_wiki(wiki) as base_url:
+        loop = asyncio.get_running_loop()
+        pages = await loop.run_in_executor(None, lambda: crawl_parallel(base_url, 3, str(tmp_path)))
+
+    assert [page['url'] for page in pages] == sorted(wiki.urls(base_url))
+    assert os.listdir(tmp_path) == []
+
+class SlowWiki(SyntheticWiki):
+    """A synthetic wiki that takes a while to answer, so a crawl is still running when a worker dies."""
+
+    async def handle(self, request: web.Request) -> web.Response:
+        """Serve one page after a short delay."""
+        await asyncio.sleep(0.1)
+        return await super().handle(request)
+
+@pytest.mark.asyncio
+async def test_crawl_parallel_restarts_killed_worker(tmp_path, capsys):
+    """Test that a worker killed mid-crawl has its URLs requeued and is restarted, so no page is lost."""
+    wiki = SlowWiki(150, broken_every=0, large_every=0)
+    async with serve_wiki(wiki) as base_url:
+        loop = asyncio.get_running_loop()
+        crawl = loop.run_in_executor(None, lambda: crawl_parallel(base_url, 2, str(tmp_path)))
+        # Wait until a worker holds claimed URLs, then kill it
+        victim = None
+        while victim is None:
+            await asyncio.sleep(0.05)
+            paths = glob.glob(str(tmp_path / "*" / "frontier.sqlite"))
+            if paths and multiprocessing.active_children():
+                with Frontier(paths[0]) as frontier:
+                    if frontier.count(CLAIMED):
+                        victim = multiprocessing.active_children()[0]
+        os.kill(victim.pid, signal.SIGKILL)
+        pages = await crawl
+
+    assert [page['url'] for page in pages] == sorted(wiki.urls(base_url))
+    output = capsys.readouterr().out
+    assert f"Exited with code -{signal.SIGKILL}; released" in output
+
+@pytest.mark.asyncio
+async def test_worker_main_runs_in_process(tmp_path, frontier_path, capsys):
+    """Test a worker crawling a frontier on its own, writing one JSON line per page."""
+    wiki = SyntheticWiki(30, broken_every=10, large_every=0)
+    output = str(tmp_path / "worker-1.jsonl")
+    async with serve_wiki(wiki) as base_url:
+        with Frontier(frontier_path) as frontier:
+            frontier.add([base_url])
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(
+            None, lambda: worker_main(frontier_path, base_url, 1, output, {'rate': 1000.0}))
+
+    assert [page['url'] for page in merge_outputs([output])] == sorted(wiki.urls(base_url))
+    assert "[worker 1] Wrote 30 pages" in capsys.readouterr().out
+    with Frontier(frontier_path) as frontier:
+        assert frontier.finished()
+        assert (frontier.count(DONE), frontier.count(FAILED)) == (30, 3)
+
+@pytest.mark.asyncio
+async def test_resolve_base_url_survives_unreachable_site():
+    """Test that a base URL that cannot be fetched is left for the workers to report."""
+    redirects = RedirectMap()
+    assert await resolve_base_url("http://127.0.0.1:9/wiki", redirects) == "http://127.0.0.1:9/wiki"
+    assert len(redirects) == 0
+
+@pytest.mark.asyncio
+async def test_crawl_parallel_follows_moved_base_url(tmp_path):
+    """Test that every worker crawls under the base URL's redirect target, not just the one that fetched it."""
+    wiki = SyntheticWiki(60, broken_every=0, large_every=0)
+    redirects = str(tmp_path / "state" / "redirects.json")
+    async with serve_wiki(wiki) as base_url, serve_moved(wiki, base_url) as old_url:
+        loop = asyncio.get_running_loop()
+        pages = await loop.run_in_executor(
+            None, lambda: crawl_parallel(old_url, 3, str(tmp_path), redirects=redirects))
+
+    assert [page['url'] for page in pages] == sorted(wiki.urls(base_url))
+    with open(redirects, encoding='utf-8') as f:
+        assert json.load(f) == {old_url: base_url}
+
+@pytest.mark.asyncio
+async def test_cli_workers_option(tmp_path, monkeypatch):
+    """Test that --workers saves the merged pages."""
+    monkeypatch.chdir(tmp_path)
+    wiki = SyntheticWiki(20, broken_every=0, large_every=0)
+    async with serve_wiki(wiki) as base_url:
+        await run_scraper(Namespace(url=base_url, format='json', workers=2, rate=1000.0))
+
+    [output_file] = [name for name in os.listdir(tmp_path / "output") if name.endswith(".json")]
+    with open(tmp_path / "output" / output_file, encoding='utf-8') as f:
+        assert len(json.load(f)) == 20
+
+@pytest.mark.asyncio
+async def test_cli_workers_history_uses_resolved_site(tmp_path, monkeypatch):
+    """Test that --workers keys history by the moved base URL, as a single-process crawl does."""
+    monkeypatch.chdir(tmp_path)
+    wiki = SyntheticWiki(20, broken_every=0, large_every=0)
+    history = str(tmp_path / "history.sqlite")
+    async with serve_wiki(wiki) as base_url, serve_moved(wiki, base_url) as old_url:
+        for workers in (2, 1):
+            await run_scraper(Namespace(url=old_url, format='json', workers=workers, rate=1000.0,
+                                        history=history, redirects=str(tmp_path / "redirects.json")))
+
+    with HistoryStore(history) as store:
+        assert store.sites() == [base_url]
+        assert len(store) == 2
+        assert store.db.execute("SELECT COUNT(*) FROM changes").fetchone()[0] == 20
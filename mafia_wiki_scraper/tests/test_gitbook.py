@@ -0,0 +1,116 @@
+"""Tests for the GitBook content-API backend."""
+import json
+from argparse import Namespace
+
+import pytest
+
+from ..cli import run_scraper
+from ..extract import Section, markdown_sections, markdown_text
+from ..gitbook import GitBookScraper
+from ..scraper import WikiScraper
+from ..sitegen import SyntheticWiki, serve_wiki
+from ..warc import WarcWriter, iter_records
+
+@pytest.fixture
+def wiki():
+    """Fixture for a small synthetic wiki served as both HTML and Markdown."""
+    return SyntheticWiki(100, broken_every=20, large_every=0)
+
+def test_markdown_text():
+    """Test that Markdown markup is reduced to its words."""
+    markdown = (
+        "# Ranks\n\n"
+        "Earn **respect** with `crimes` and [heists](/wiki/heists), see ![the chart](chart.png).\n\n"
+        "{% hint style=\"info\" %}\nRanks reset_daily.\n{% endhint %}\n\n"
+        "| Rank | Respect |\n| --- | ---: |\n| Capo | 1,000 |\n\n"
+        "- first\n1. second\n> quoted\n"
+    )
+    assert markdown_text(markdown) == (
+        "Ranks Earn respect with crimes and heists, see the chart. Ranks reset_daily. "
+        "Rank Respect Capo 1,000 first second quoted"
+    )
+
+def test_markdown_sections():
+    """Test that sections nest under level 1-3 headings and deeper headings stay inside them."""
+    markdown = "Intro\n# Guide\nText\n## Jail\nBail out\n#### Tip\nPay\n## Bank\nSave\n"
+    assert markdown_sections(markdown) == [
+        Section([], "Intro"),
+        Section(["Guide"], "Text"),
+        Section(["Guide", "Jail"], "Bail out Tip Pay"),
+        Section(["Guide", "Bank"], "Save"),
+    ]
+
+@pytest.mark.asyncio
+async def test_api_crawl_matches_html_pages(wiki):
+    """Test that the API backend finds every page with the same titles and text, in fewer bytes."""
+    async with serve_wiki(wiki) as base_url:
+        async with GitBookScraper(base_url, api_url=wiki.api_url(base_url), max_concurrent=20) as scraper:
+            pages = await scraper.scrape_all_pages()
+        async with WikiScraper(base_url, max_concurrent=20) as scraper:
+            html_pages = await scraper.scrape_all_pages()
+
+    assert sorted(page.url for page in pages) == sorted(wiki.urls(base_url))
+    by_url = {page.url: page for page in pages}
+    root = by_url[base_url]
+    assert root.title == "Synthetic Wiki"
+    assert root.content.startswith(f"Synthetic Wiki {wiki.text(0)} Related Topic 1")
+    for page in html_pages:
+        assert wiki.text(int(page.url.rsplit('-', 1)[1]) if page.url != base_url else 0) in by_url[page.url].content
+    assert sum(page.size for page in pages) < sum(page.size for page in html_pages) / 2
+
+@pytest.mark.asyncio
+async def test_falls_back_to_html_without_api(wiki):
+    """Test that a site without the content API is scraped from its HTML."""
+    wiki.api = False
+    async with serve_wiki(wiki) as base_url:
+        async with GitBookScraper(base_url, api_url=wiki.api_url(base_url), max_concurrent=20) as scraper:
+            pages = await scraper.scrape_all_pages()
+
+    assert not scraper.page_ids
+    assert sorted(page.url for page in pages) == sorted(wiki.urls(base_url))
+
+@pytest.mark.asyncio
+async def test_sections_for_chunking(wiki):
+    """Test that extraction callbacks get the Markdown heading structure."""
+    extractions = {}
+    async with serve_wiki(wiki) as base_url:
+        async with GitBookScraper(base_url, api_url=wiki.api_url(base_url), space='synthetic',
+                                  sections=True) as scraper:
+            scraper.extraction_callbacks.append(lambda url, extraction: extractions.update({url: extraction}))
+            await scraper.scrape_all_pages()
+
+    sections = extractions[base_url].sections
+    assert [section.headings for section in sections] == [["Synthetic Wiki"], ["Synthetic Wiki", "Related"]]
+    assert sections[0].text == wiki.text(0)
+
+@pytest.mark.asyncio
+async def test_archive_leaves_out_token(wiki, tmp_path):
+    """Test that the API token sent with every request is not written to the WARC archive."""
+    path = str(tmp_path / "crawl.warc.gz")
+    async with serve_wiki(wiki) as base_url:
+        with WarcWriter(path) as writer:
+            async with GitBookScraper(base_url, api_url=wiki.api_url(base_url), token='s3cret-token',
+                                      warc_writer=writer) as scraper:
+                pages = await scraper.scrape_all_pages()
+
+    assert len(pages) == 100
+    requests = [block for headers, block in iter_records(path) if headers.get('WARC-Type') == 'request']
+    assert any(b"/api/v1/spaces/synthetic/content" in block for block in requests)
+    for block in requests:
+        assert b"s3cret-token" not in block
+        assert b"Authorization" not in block
+
+@pytest.mark.asyncio
+async def test_cli_source_option(wiki, tmp_path, monkeypatch):
+    """Test that ``--source gitbook`` crawls through the API and writes the usual output."""
+    monkeypatch.chdir(tmp_path)
+    async with serve_wiki(wiki) as base_url:
+        await run_scraper(Namespace(
+            url=[base_url], format='json', source='gitbook', gitbook_api=wiki.api_url(base_url),
+            ignore_robots=True, rate=1000.0, redirects=None,
+        ))
+
+    [output_file] = (tmp_path / "output").glob("*.json")
+    pages = json.loads(output_file.read_text())
+    assert len(pages) == 100
+    assert set(pages[0]) == {'url', 'title', 'content'}
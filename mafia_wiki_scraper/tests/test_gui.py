@@ -1,9 +1,13 @@
 """Tests for the GUI module."""
+import json
 import os
+import queue
 import sys
 import pytest
 import tkinter as tk
 import asyncio
+from itertools import count
+from types import SimpleNamespace
 from unittest.mock import MagicMock, patch
 from pathlib import Path
 
@@ -11,7 +15,73 @@ from pathlib import Path
 project_root = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(project_root))
 
-from mafia_wiki_scraper.gui import MafiaWikiScraperGUI, main
+from mafia_wiki_scraper.gui import (
+    RESULTS_BATCH_INTERVAL, ROW_HEIGHT, MafiaWikiScraperGUI, ResultsList, fit_text, format_size, load_pages, main,
+    output_file_name, result_row, visible_rows,
+)
+from mafia_wiki_scraper.records import PageRecord
+from mafia_wiki_scraper.search import InvertedIndex
+from mafia_wiki_scraper.snapshot import read_pages, write_snapshot
+
+PAGES = [
+    PageRecord("https://example.com/a", "Alpha", "Family business", status=200, fetched_at=1700000000.0, size=15),
+    PageRecord("https://example.com/b", "Bravo", "Casino heist", status=200, size=12),
+]
+
+class Var:
+    """Stand-in for a Tk variable, which needs a Tk root and so a display."""
+
+    def __init__(self, value=""):
+        self.value = value
+
+    def get(self):
+        return self.value
+
+    def set(self, value):
+        self.value = value
+
+def headless_results(height: int = 10 * ROW_HEIGHT) -> ResultsList:
+    """Create a results list without Tk widgets; the canvas only needs to report its size."""
+    results = ResultsList.__new__(ResultsList)
+    results.pages, results.top, results.selected, results.follow, results.rows = [], 0, None, True, []
+    results.on_select = None
+    results.font, results.char_width = None, 7
+    results.canvas = MagicMock()
+    results.canvas.winfo_height.return_value = height
+    results.canvas.winfo_width.return_value = 800
+    ids = count(1)
+    results.canvas.create_rectangle.side_effect = lambda *args, **kwargs: next(ids)
+    results.canvas.create_text.side_effect = lambda *args, **kwargs: next(ids)
+    results.scrollbar = MagicMock()
+    return results
+
+@pytest.fixture
+def headless(tmp_path, monkeypatch):
+    """Create the app without a window; widgets are mocks and ``after`` runs immediate callbacks at once."""
+    monkeypatch.setenv("HOME", str(tmp_path / "home"))
+    gui = MafiaWikiScraperGUI.__new__(MafiaWikiScraperGUI)
+    gui.base_url = "https://example.com"
+    gui.output_dir = Var(str(tmp_path / "out"))
+    gui.output_format = Var("JSON")
+    gui.settings_file = tmp_path / "settings.json"
+    gui.settings = {}
+    gui.sounds = {}
+    gui.scraping = False
+    gui.current_output_file = None
+    gui.pending_pages = queue.Queue()
+    gui.loop = MagicMock()
+    gui.results_list = headless_results()
+    for name in ('scrape_button', 'status_label', 'inspection_progress', 'fetching_progress', 'progress_bar',
+                 'pages_label', 'open_button', 'preview', 'search_entry', 'search_results', 'update'):
+        setattr(gui, name, MagicMock())
+    gui.scheduled = []
+    gui.after = lambda delay, callback: callback() if delay == 0 else gui.scheduled.append((delay, callback))
+    os.makedirs(gui.output_dir.get())
+    return gui
+
+def status(gui) -> str:
+    """Return the text last shown in the status label."""
+    return gui.status_label.configure.call_args.kwargs['text']
 
 @pytest.fixture
 def app(monkeypatch):
@@ -22,7 +92,10 @@ def app(monkeypatch):
     
     # Mock the main window
     with patch('customtkinter.CTk') as mock_ctk:
-        app_instance = MafiaWikiScraperGUI()
+        try:
+            app_instance = MafiaWikiScraperGUI()
+        except tk.TclError as e:
+            pytest.skip(f"Tk needs a display: {e}")
         # Prevent the app from actually starting
         app_instance.mainloop = lambda: None
         return app_instance
@@ -63,3 +136,287 @@ def test_main_function():
         main()
         mock_app.assert_called_once()
         mock_app.return_value.mainloop.assert_called_once()
+
+def test_result_row_formatting():
+    """Test the cells shown for a page in the results list."""
+    page = PageRecord("https://example.com/a", None, "text", status=200, size=2048)
+    assert result_row(page) == ("(untitled)", "https://example.com/a", "2.0 KB", "200")
+    assert format_size(512) == "512 B"
+    assert format_size(3 * 1024 * 1024) == "3.0 MB"
+    assert fit_text("abcdefghij", 50, 10) == "abcd\u2026"
+    assert fit_text("abc", 50, 10) == "abc"
+
+def test_visible_rows():
+    """Test that only the rows in view are drawn."""
+    assert visible_rows(0, 10 * ROW_HEIGHT, 50000) == range(0, 10)
+    assert visible_rows(49995, 10 * ROW_HEIGHT + 1, 50000) == range(49995, 50000)
+    assert visible_rows(0, 10 * ROW_HEIGHT, 3) == range(0, 3)
+
+def test_results_list_scrolling():
+    """Test that the results list follows new pages until scrolled away from the end."""
+    results = headless_results()
+    pages = [PageRecord(f"https://example.com/{n}", str(n), "") for n in range(100)]
+
+    results.add(pages[:50])
+    assert results.top == 40
+    results.yview('scroll', -1, 'pages')
+    assert results.top == 30 and not results.follow
+    results.add(pages[50:])
+    assert results.top == 30
+    results.yview('moveto', 1.0)
+    assert results.top == 90 and results.follow
+    results.scrollbar.set.assert_called_with(0.9, 1.0)
+
+def test_load_pages_from_json_and_snapshot(tmp_path):
+    """Test that saved results load back from either output format."""
+    pages = [
+        PageRecord("https://example.com/b", "B", "Bravo"),
+        PageRecord("https://example.com/a", None, "Alpha", document={"sections": []}),
+    ]
+    assert output_file_name("JSON") == "mafia_wiki.json"
+    assert output_file_name("Snapshot") == "mafia_wiki.mwsnap"
+    json_file = tmp_path / output_file_name("JSON")
+    json_file.write_text(json.dumps([page.to_dict() for page in pages]), encoding='utf-8')
+    snapshot_file = tmp_path / output_file_name("Snapshot")
+    write_snapshot(pages, str(snapshot_file))
+
+    assert load_pages(str(json_file)) == pages
+    # Snapshots are stored in URL order
+    assert load_pages(str(snapshot_file)) == pages[::-1]
+    assert load_pages(str(snapshot_file))[0].document == {"sections": []}
+
+def test_cancelled_scrape_keeps_previous_output(headless):
+    """Test that cancelling mid-scrape leaves the last good output file untouched."""
+    gui = headless
+    previous = json.dumps([{"url": "https://example.com/old", "title": "Old", "content": "Kept"}])
+    output_file = Path(gui.output_dir.get()) / output_file_name("JSON")
+    output_file.write_text(previous, encoding='utf-8')
+    gui.scraping = True
+
+    class CancelledScraper:
+        """Streams one page to the output, then the user presses stop."""
+
+        def __init__(self, base_url):
+            self.page_callbacks = []
+
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, exc_type, exc_val, exc_tb):
+            pass
+
+        async def get_all_internal_links(self):
+            yield 1, 2
+
+        async def fetch_pages_with_progress(self):
+            for callback in self.page_callbacks:
+                callback(PageRecord("https://example.com/new", "New", "Partial"))
+            gui.scraping = False
+            yield 1, 2
+
+    with patch('mafia_wiki_scraper.gui.WikiScraper', CancelledScraper):
+        asyncio.run(gui._run_scraper())
+
+    assert status(gui) == "Scraping cancelled."
+    assert output_file.read_text(encoding='utf-8') == previous
+    assert os.listdir(gui.output_dir.get()) == [output_file.name]
+
+class FakeScraper:
+    """Finds and scrapes ``PAGES`` without touching the network."""
+
+    pages = PAGES
+
+    def __init__(self, base_url):
+        self.page_callbacks = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+    async def get_all_internal_links(self):
+        yield len(self.pages), len(self.pages)
+
+    async def fetch_pages_with_progress(self):
+        for current, page in enumerate(self.pages, 1):
+            for callback in self.page_callbacks:
+                callback(page)
+            yield current, len(self.pages)
+
+    async def scrape_all_pages_with_progress(self):
+        for page in self.pages:
+            yield page
+
+@pytest.mark.parametrize("output_format", ["JSON", "Snapshot"])
+def test_scrape_saves_output_and_index(headless, output_format):
+    """Test that a finished scrape saves the chosen format and a search index, and lists the pages."""
+    gui = headless
+    gui.output_format.set(output_format)
+    gui.scraping = True
+    with patch('mafia_wiki_scraper.gui.WikiScraper', FakeScraper):
+        asyncio.run(gui._run_scraper())
+
+    output_file = os.path.join(gui.output_dir.get(), output_file_name(output_format))
+    assert status(gui) == f"Scraping completed! Saved 2 pages to {output_file}"
+    assert [page['url'] for page in read_pages(output_file)] == [page.url for page in PAGES]
+    assert gui.current_output_file == output_file
+    assert sorted(os.listdir(gui.output_dir.get())) == sorted([output_file_name(output_format), "mafia_wiki.idx"])
+    assert [hit.url for hit in InvertedIndex.load(str(gui.index_file())).search("casino")] == [PAGES[1].url]
+    gui.open_button.configure.assert_called_with(state="normal")
+    gui.progress_bar.set.assert_called_with(1.0)
+    assert gui.pending_pages.qsize() == 2
+    assert not gui.scraping
+
+def test_scrape_without_pages_reports_error(headless):
+    """Test that a scrape finding nothing shows an error instead of saving."""
+    gui = headless
+    gui.scraping = True
+    with patch.object(FakeScraper, 'pages', []), patch('mafia_wiki_scraper.gui.WikiScraper', FakeScraper):
+        asyncio.run(gui._run_scraper())
+    assert status(gui).startswith("Error: No pages found to scrape.")
+    assert os.listdir(gui.output_dir.get()) == []
+
+    gui.output_dir.set("")
+    asyncio.run(gui._run_scraper())
+    assert status(gui) == "Error: Please select an output directory first."
+
+def test_results_list_draws_visible_rows():
+    """Test that the pooled rows are labelled with the pages in view and clicks select a page."""
+    selected = []
+    results = headless_results(height=3 * ROW_HEIGHT + 1)
+    results.on_select = selected.append
+    results.build_rows()
+    assert len(results.rows) == 4
+
+    results.add(PAGES)
+    labels = [call.kwargs['text'] for call in results.canvas.itemconfigure.call_args_list if 'text' in call.kwargs]
+    assert "Alpha" in labels and "https://example.com/b" in labels
+
+    results.click(SimpleNamespace(y=ROW_HEIGHT + 3))
+    assert selected == [PAGES[1]] and results.selected == 1
+    results.click(SimpleNamespace(y=3 * ROW_HEIGHT))
+    assert selected == [PAGES[1]]
+
+    results.add([PageRecord(f"https://example.com/{n}", str(n), "") for n in range(20)])
+    results.wheel(SimpleNamespace(num=4, delta=0))
+    assert results.top == 16 and not results.follow
+    results.wheel(SimpleNamespace(num=5, delta=-120))
+    assert results.top == 19 and results.follow
+
+    results.clear()
+    assert (results.pages, results.top, results.selected) == ([], 0, None)
+
+def test_results_flush_preview_and_search(headless):
+    """Test batching queued pages into the list, previewing one, and searching the index."""
+    gui = headless
+    for page in PAGES:
+        gui.queue_page(page)
+    gui.flush_results()
+    assert gui.results_list.pages == PAGES
+    gui.pages_label.configure.assert_called_with(text="Pages Scraped: 2")
+    assert gui.scheduled == [(RESULTS_BATCH_INTERVAL, gui.flush_results)]
+
+    gui.show_preview(PAGES[0])
+    preview = gui.preview.insert.call_args.args[1]
+    assert preview.startswith("Alpha\nhttps://example.com/a\nStatus 200  |  15 B  |  2023-11-")
+    assert preview.endswith("Family business")
+
+    gui.search_entry.get.return_value = "casino"
+    gui.run_search()
+    assert gui.search_results.insert.call_args.args[1] == "No search index yet. Scrape the wiki first."
+    index = InvertedIndex()
+    for page in PAGES:
+        index.add_page(page)
+    index.save(str(gui.index_file()))
+    gui.run_search()
+    assert gui.search_results.insert.call_args.args[1] == "Bravo\n    https://example.com/b"
+    gui.search_entry.get.return_value = "nothing here"
+    gui.run_search()
+    assert gui.search_results.insert.call_args.args[1] == "No matching pages."
+
+def test_load_and_open_results(headless, tmp_path):
+    """Test loading saved pages into the list and opening the file they came from."""
+    gui = headless
+    snapshot_file = tmp_path / output_file_name("Snapshot")
+    write_snapshot(PAGES, str(snapshot_file))
+    with patch('mafia_wiki_scraper.gui.filedialog.askopenfilename', return_value=str(snapshot_file)):
+        gui.load_results()
+    assert [page.url for page in gui.results_list.pages] == [page.url for page in PAGES]
+    assert gui.current_output_file == str(snapshot_file)
+    assert status(gui) == f"Loaded 2 pages from {snapshot_file}"
+
+    with patch('mafia_wiki_scraper.gui.subprocess.run') as run, patch('mafia_wiki_scraper.gui.sys.platform', 'linux'):
+        gui.open_output_file()
+        # Snapshots are binary, so their folder is opened instead
+        run.assert_called_once_with(["xdg-open", str(tmp_path)])
+        gui.current_output_file = None
+        gui.open_output_file()
+        assert run.call_count == 1
+
+    broken = tmp_path / "broken.json"
+    broken.write_text("not json", encoding='utf-8')
+    with patch('mafia_wiki_scraper.gui.filedialog.askopenfilename', return_value=str(broken)):
+        gui.load_results()
+    assert status(gui).startswith(f"Error: Could not load {broken}")
+    with patch('mafia_wiki_scraper.gui.filedialog.askopenfilename', return_value="") as dialog:
+        gui.load_results()
+        gui.scraping = True
+        gui.load_results()
+        assert dialog.call_count == 1
+
+def test_settings_round_trip(headless, tmp_path):
+    """Test that the output directory and format are saved and restored."""
+    gui = headless
+    chosen = tmp_path / "chosen"
+    chosen.mkdir()
+    gui.output_format.set("Snapshot")
+    with patch('mafia_wiki_scraper.gui.filedialog.askdirectory', return_value=str(chosen)):
+        gui.browse_directory()
+    assert json.loads(gui.settings_file.read_text()) == {"last_directory": str(chosen), "output_format": "Snapshot"}
+
+    gui.output_dir.set("")
+    assert gui.load_settings()["output_format"] == "Snapshot"
+    assert gui.output_dir.get() == str(chosen)
+
+    # A saved directory that is gone falls back to one under Documents
+    chosen.rmdir()
+    default_dir = tmp_path / "home" / "Documents" / "Mafia Wiki Scraper"
+    assert gui.load_settings() == {"last_directory": str(default_dir)}
+    assert default_dir.is_dir()
+
+def test_progress_and_errors(headless):
+    """Test the thread-safe progress and status updates."""
+    gui = headless
+    gui.update_inspection_progress(1, 4)
+    gui.inspection_progress.set.assert_called_with(0.25)
+    assert status(gui) == "Inspecting wiki... (1/4 pages)"
+    gui.update_fetching_progress(3, 4)
+    gui.fetching_progress.set.assert_called_with(0.75)
+    assert status(gui) == "Fetching page 3 of 4"
+    gui.update_progress(150)
+    gui.progress_bar.set.assert_called_with(1.0)
+
+    gui.scraping = True
+    gui.show_error("Boom")
+    assert status(gui) == "Error: Boom" and not gui.scraping
+    gui.scrape_button.configure.assert_called_with(text="Start Scraping", state="normal")
+
+def test_start_and_stop_scraping(headless):
+    """Test that the scrape button starts a scrape on the async loop and stops a running one."""
+    gui = headless
+    with patch('mafia_wiki_scraper.gui.asyncio.run_coroutine_threadsafe') as submit:
+        gui.start_scraping()
+        coroutine, loop = submit.call_args.args
+        coroutine.close()
+    assert gui.scraping and loop is gui.loop
+    gui.scrape_button.configure.assert_called_with(text="Stop Scraping", state="disabled")
+    gui.pages_label.configure.assert_called_with(text="Pages Scraped: 0")
+
+    gui.start_scraping()
+    assert not gui.scraping
+    gui.scrape_button.configure.assert_called_with(text="Start Scraping")
+
+    gui.output_dir.set("")
+    gui.start_scraping()
+    assert status(gui) == "Error: Please select an output directory first"
@@ -0,0 +1,98 @@
+"""Tests for the snapshot history store."""
+import json
+from argparse import Namespace
+from datetime import datetime
+
+import pytest
+
+from ..cli import run_as_of, run_history
+from ..history import HistoryStore, parse_when
+from ..records import PageRecord
+
+DAY = 86400.0
+START = datetime(2026, 10, 1, 12).timestamp()
+
+def pages(day: int):
+    """Return a day's crawl of a 50-page wiki where only page 7 changes and page 9 is removed on day 2."""
+    result = [PageRecord(f"https://example.com/p{i}", f"Page {i}", f"Text {i}") for i in range(50)]
+    result[7].content = f"Text 7, edit {day}"
+    return [page for page in result if not (day >= 2 and page.url.endswith("/p9"))]
+
+@pytest.fixture
+def store(tmp_path):
+    """Fixture for a history with three daily snapshots."""
+    with HistoryStore(str(tmp_path / "history.sqlite")) as history:
+        for day in range(3):
+            history.add_snapshot(pages(day), "example", START + day * DAY)
+        yield history
+
+def test_storage_grows_with_changes(tmp_path):
+    """Test that unchanged pages are stored once however many snapshots there are."""
+    with HistoryStore(str(tmp_path / "history.sqlite")) as history:
+        assert history.add_snapshot(pages(0), "example", START) == \
+            {'new': 50, 'changed': 0, 'unchanged': 0, 'removed': 0}
+        assert history.add_snapshot(pages(1), "example", START + DAY) == \
+            {'new': 0, 'changed': 1, 'unchanged': 49, 'removed': 0}
+        assert history.add_snapshot(pages(2), "example", START + 2 * DAY) == \
+            {'new': 0, 'changed': 1, 'unchanged': 48, 'removed': 1}
+
+        assert len(history) == 3
+        assert history.db.execute("SELECT COUNT(*) FROM blobs").fetchone()[0] == 52
+        assert history.db.execute("SELECT COUNT(*) FROM changes").fetchone()[0] == 53
+
+def test_as_of_rebuilds_snapshots(store):
+    """Test that a whole snapshot is rebuilt as it stood at a past time."""
+    assert store.as_of(START - 1) == []
+    day1 = store.as_of(START + DAY + 1)
+    assert len(day1) == 50
+    assert day1[0]["url"] == "https://example.com/p0"
+    assert next(page for page in day1 if page["url"].endswith("/p7"))["content"] == "Text 7, edit 1"
+    assert len(store.as_of(START + 2 * DAY)) == 49
+
+def test_page_history(store):
+    """Test that a page's versions and removal are listed in order."""
+    assert store.page_as_of("https://example.com/p7", START)["content"] == "Text 7, edit 0"
+    assert store.page_as_of("https://example.com/p9", START + 2 * DAY) is None
+    assert [page and page["content"] for _, page in store.history("https://example.com/p9")] == ["Text 9", None]
+    assert len(store.history("https://example.com/p7")) == 3
+
+def test_sites_are_tracked_separately(tmp_path):
+    """Test that a snapshot of one site does not mark another site's pages removed."""
+    with HistoryStore(str(tmp_path / "history.sqlite")) as history:
+        history.add_snapshot([{"url": "https://a.com/", "title": "A", "content": "a"}], "a", START)
+        stats = history.add_snapshot([{"url": "https://b.com/", "title": "B", "content": "b"}], "b", START + 1)
+
+        assert stats['removed'] == 0
+        assert [page["url"] for page in history.as_of(START + 2)] == ["https://a.com/", "https://b.com/"]
+
+def test_parse_when_bare_date_is_end_of_day():
+    """Test that a bare date covers snapshots taken during that day."""
+    assert parse_when("2026-10-01") > START
+    assert parse_when("2026-10-01T12:00") == START
+
+def test_cli_history_and_as_of(store, tmp_path, capsys):
+    """Test the history and as-of subcommands."""
+    run_history(Namespace(store=store.path, page_url="https://example.com/p9"))
+    output = capsys.readouterr().out
+    assert "2026-10-01 12:00:00  Page 9 (6 chars)" in output
+    assert "2026-10-03 12:00:00  removed" in output
+
+    run_as_of(Namespace(store=store.path, date="2026-10-02", page_url="https://example.com/p7", output=None))
+    assert json.loads(capsys.readouterr().out)["content"] == "Text 7, edit 1"
+
+    output_file = tmp_path / "as-of.json"
+    run_as_of(Namespace(store=store.path, date="2026-10-02", page_url=None, output=str(output_file)))
+    assert len(json.loads(output_file.read_text())) == 50
+
+def test_cli_as_of_picks_one_site(tmp_path, capsys):
+    """Test that as-of asks for --site when the store holds several sites, and rebuilds only that one."""
+    with HistoryStore(str(tmp_path / "history.sqlite")) as history:
+        history.add_snapshot([{"url": "https://a.com/", "title": "A", "content": "a"}], "https://a.com/", START)
+        history.add_snapshot([{"url": "https://b.com/", "title": "B", "content": "b"}], "https://b.com/", START + 1)
+        assert history.sites() == ["https://a.com/", "https://b.com/"]
+
+    run_as_of(Namespace(store=history.path, date="2026-10-02", page_url=None, output=None))
+    assert "choose one with --site: https://a.com/, https://b.com/" in capsys.readouterr().out
+
+    run_as_of(Namespace(store=history.path, date="2026-10-02", page_url=None, output=None, site="https://b.com/"))
+    assert capsys.readouterr().out.split() == ["https://b.com/"]
@@ -0,0 +1,132 @@
+"""Tests for the link checker."""
+import json
+from argparse import Namespace
+
+import pytest
+from aioresponses import aioresponses
+
+from ..cli import build_parser, run_check_links
+from ..linkcheck import DEFAULT_CHECK_RATE, LinkChecker, format_report
+from ..scraper import WikiScraper
+from ..sitegen import SyntheticWiki, serve_wiki
+
+@pytest.fixture
+def wiki():
+    """Fixture for a small synthetic wiki with a broken link on every 20th page."""
+    return SyntheticWiki(200, broken_every=20, large_every=0)
+
+@pytest.mark.asyncio
+async def test_finds_broken_links_in_synthetic_wiki(wiki):
+    """Test that every page is crawled once and every broken link is reported with its source."""
+    async with serve_wiki(wiki) as base_url:
+        async with WikiScraper(base_url, max_concurrent=20) as scraper:
+            report = await LinkChecker(scraper).run()
+
+    assert report.pages == 200
+    broken = {result.url: result.status for result in report.broken()}
+    assert broken == {f"{base_url}/missing-{page}": 404 for page in range(19, 200, 20)}
+    assert report.sources[f"{base_url}/missing-19"] == {base_url + wiki.path(19)[len("/wiki"):]}
+    assert not report.redirects()
+
+@pytest.mark.asyncio
+async def test_redirects_and_head_fallback():
+    """Test that redirect chains are recorded and external links fall back from HEAD to GET."""
+    base_url = "https://example.com/wiki"
+    home = ('<a href="/wiki/old">Old</a> <a href="https://other.org/page">Other</a> '
+            '<a href="mailto:admin@example.com">Mail</a>')
+    async with WikiScraper(base_url) as scraper:
+        with aioresponses() as m:
+            m.get(base_url, status=200, content_type='text/html', body=home)
+            # Discovery follows the redirect, then the link itself is checked for its chain
+            m.get(f"{base_url}/old", status=301, headers={'Location': f"{base_url}/new"}, repeat=True)
+            m.get(f"{base_url}/new", status=200, content_type='text/html', body="<p>New</p>", repeat=True)
+            m.head("https://other.org/page", status=405)
+            m.get("https://other.org/page", status=200, content_type='text/html', body="<p>Other</p>")
+
+            report = await LinkChecker(scraper, external=True).run()
+
+    assert not report.broken()
+    [redirect] = report.redirects()
+    assert redirect.chain == [(f"{base_url}/old", 301)]
+    assert redirect.final_url == f"{base_url}/new"
+    assert report.results["https://other.org/page"].method == 'GET'
+    assert "mailto:admin@example.com" not in report.results
+    assert f"{base_url}/old (301) -> {base_url}/new (200)" in format_report(report, 2.0)
+
+@pytest.mark.asyncio
+async def test_link_graph_comes_from_discovery():
+    """Test that pages are read once by the scraper's discovery, with its fragment and content-type rules."""
+    base_url = "https://example.com/wiki"
+    home = ('<a href="/wiki/page#intro">Intro</a> <a href="/wiki/page">Page</a> '
+            '<a href="/wiki/rules.pdf">Rules</a>')
+    async with WikiScraper(base_url) as scraper:
+        with aioresponses() as m:
+            m.get(base_url, status=200, content_type='text/html', body=home)
+            m.get(f"{base_url}/page", status=200, content_type='text/html', body='<a href="/wiki">Home</a>')
+            m.get(f"{base_url}/rules.pdf", status=200, content_type='application/pdf', body=b"%PDF")
+            m.head(f"{base_url}/rules.pdf", status=200)
+
+            report = await LinkChecker(scraper).run()
+
+    assert report.pages == 2 and not report.broken()
+    assert sorted(report.results) == [base_url, f"{base_url}/page", f"{base_url}/rules.pdf"]
+    assert report.results[f"{base_url}/page"].method == 'GET'
+    assert report.results[f"{base_url}/rules.pdf"].method == 'HEAD'
+    assert report.sources == {
+        base_url: {f"{base_url}/page"},
+        f"{base_url}/page": {base_url},
+        f"{base_url}/rules.pdf": {base_url},
+    }
+
+@pytest.mark.asyncio
+async def test_external_links_skipped_by_default():
+    """Test that links leaving the site are only checked on request."""
+    async with WikiScraper("https://example.com/wiki") as scraper:
+        with aioresponses() as m:
+            m.get("https://example.com/wiki", status=200, content_type='text/html',
+                  body='<a href="https://other.org/page">Other</a>')
+
+            report = await LinkChecker(scraper).run()
+
+    assert list(report.results) == ["https://example.com/wiki"]
+
+@pytest.mark.asyncio
+async def test_unexpected_errors_are_broken_links():
+    """Test that a malformed target or an unexpected request error is reported rather than ending the audit."""
+    base_url = "https://example.com/wiki"
+    home = '<a href="http://[broken/page">Bad</a> <a href="/wiki/odd">Odd</a> <a href="/wiki/fine">Fine</a>'
+    async with WikiScraper(base_url) as scraper:
+        with aioresponses() as m:
+            m.get(base_url, status=200, content_type='text/html', body=home)
+            m.get(f"{base_url}/odd", exception=ValueError("unsupported target"), repeat=True)
+            m.get(f"{base_url}/fine", status=200, content_type='text/html', body="<p>Fine</p>")
+
+            report = await LinkChecker(scraper).run()
+
+    broken = {result.url: result.error for result in report.broken()}
+    assert broken == {
+        "http://[broken/page": "invalid URL: Invalid IPv6 URL",
+        f"{base_url}/odd": "ValueError: unsupported target",
+    }
+    assert report.sources["http://[broken/page"] == {base_url}
+    assert report.pages == 2
+
+def test_check_links_rate_default():
+    """Test that link audits are not held to the crawl's per-host rate by default."""
+    assert build_parser().parse_args(['check-links']).rate == DEFAULT_CHECK_RATE
+    assert build_parser().parse_args([]).rate == 5.0
+
+@pytest.mark.asyncio
+async def test_check_links_command(wiki, tmp_path, capsys):
+    """Test that the check-links command prints a summary and saves the full report."""
+    output = tmp_path / "links.json"
+    async with serve_wiki(wiki) as base_url:
+        await run_check_links(Namespace(
+            url=[base_url], config=None, external=False, concurrency=20, per_host=8, rate=1000.0,
+            ignore_robots=True, timeout=10.0, slow=2.0, max_page_size='10MB', output=str(output),
+        ))
+
+    assert "Broken links: 10" in capsys.readouterr().out
+    report = json.loads(output.read_text())[base_url]
+    assert report["pages"] == 200
+    assert report["broken"][0]["linked_from"]
@@ -0,0 +1,122 @@
+"""Tests for the staged processing pipeline."""
+import asyncio
+import threading
+from functools import partial
+
+import pytest
+
+from ..pipeline import Pipeline, Stage
+from ..scraper import WikiScraper
+from ..sitegen import SyntheticWiki, serve_wiki
+
+def square(number):
+    """Square a number; module level so worker processes can run it."""
+    return number * number
+
+@pytest.mark.asyncio
+async def test_stages_run_in_order():
+    """Test that items pass through every stage and None drops an item."""
+    async def double(number):
+        """Double a number on the event loop."""
+        return number * 2
+
+    pipeline = Pipeline([
+        Stage('double', double, concurrency=3),
+        Stage('odd', lambda number: None if number % 4 == 0 else number),
+        Stage('square', square, executor='thread', concurrency=2),
+    ], log=lambda message: None)
+    results = [item async for item in pipeline.stream(range(10))]
+
+    assert sorted(results) == [4, 36, 100, 196, 324]
+    assert [(stats.processed, stats.emitted) for stats in pipeline.stats] == [(10, 10), (10, 5), (5, 5)]
+
+@pytest.mark.asyncio
+async def test_slow_stage_applies_backpressure():
+    """Test that a slow stage holds back the source instead of letting items pile up."""
+    pulled = []
+
+    def source():
+        """Yield items, remembering how many were taken."""
+        for number in range(50):
+            pulled.append(number)
+            yield number
+
+    async def slow(number):
+        """Take a while over each item."""
+        await asyncio.sleep(0.005)
+        return number
+
+    sunk = []
+    pipeline = Pipeline([Stage('fast', lambda number: number), Stage('slow', slow)], queue_size=2,
+                        log=lambda message: None)
+    async for number in pipeline.stream(source()):
+        sunk.append(number)
+        # Each queue holds two items and each stage one more in hand, plus one blocked on a put
+        assert len(pulled) - len(sunk) <= 8
+
+    assert sunk == list(range(50))
+    assert all(stats.max_depth <= 2 for stats in pipeline.stats)
+
+@pytest.mark.asyncio
+async def test_errors_are_counted_and_dropped():
+    """Test that an item whose stage fails is logged and skipped."""
+    messages = []
+    pipeline = Pipeline([Stage('invert', lambda number: 1 / number)], log=messages.append)
+
+    assert await pipeline.run([1, 0, 2]) == 2
+    assert pipeline.stats[0].errors == 1
+    assert messages == ["invert failed: division by zero"]
+    assert "invert: 3 in, 2 out, 1 errors" in pipeline.summary()
+
+@pytest.mark.asyncio
+async def test_executors():
+    """Test that thread stages run concurrently and process stages run in other processes."""
+    barrier = threading.Barrier(4, timeout=5)
+    threads = Pipeline([Stage('wait', lambda number: barrier.wait() >= 0 and number, 4, 'thread')])
+    assert sorted(await collect(threads, range(4))) == [0, 1, 2, 3]
+
+    processes = Pipeline([Stage('square', partial(square), 2, 'process')])
+    assert sorted(await collect(processes, range(5))) == [0, 1, 4, 9, 16]
+
+    with pytest.raises(ValueError):
+        Stage('bad', square, executor='gpu')
+
+async def collect(pipeline, items):
+    """Return everything a pipeline produces."""
+    return [item async for item in pipeline.stream(items)]
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('executor', ['thread', 'process'])
+async def test_scraper_parse_executors(executor):
+    """Test that parsing off the event loop gives the same pages as parsing on it."""
+    wiki = SyntheticWiki(40, broken_every=0, large_every=0)
+    async with serve_wiki(wiki) as base_url:
+        async with WikiScraper(base_url, max_concurrent=8) as scraper:
+            expected = await scraper.scrape_all_pages()
+        async with WikiScraper(base_url, max_concurrent=8, parse_executor=executor, parse_workers=2) as scraper:
+            pages = await scraper.scrape_all_pages()
+
+    key = lambda page: page['url']
+    assert sorted(pages, key=key) == sorted(expected, key=key)
+    assert [stats.name for stats in scraper.pipeline_stats] == ['fetch', 'parse', 'transform', 'sink']
+    assert scraper.pipeline_stats[1].executor == executor
+
+@pytest.mark.asyncio
+async def test_scraper_dedup():
+    """Test that pages repeating another page's text are dropped when deduplicating."""
+    from aioresponses import aioresponses
+    base_url = "https://example.com"
+    html = '<html><head><title>Same</title></head><body>Same text</body></html>'
+    async with WikiScraper(base_url, dedup=True) as scraper:
+        scraper.all_links = {base_url, f"{base_url}/copy", f"{base_url}/other"}
+        with aioresponses() as m:
+            m.get(base_url, status=200, content_type='text/html', body=html)
+            m.get(f"{base_url}/copy", status=200, content_type='text/html', body=html)
+            m.get(f"{base_url}/other", status=200, content_type='text/html',
+                  body='<html><head><title> Other </title></head><body>Other text</body></html>')
+            async for _ in scraper.fetch_pages_with_progress():
+                pass
+
+    assert len(scraper.results) == 2
+    assert len(scraper.duplicates) == 1
+    assert {page.title for page in scraper.results} == {"Same", "Other"}
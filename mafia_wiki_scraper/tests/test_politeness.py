@@ -0,0 +1,66 @@
+"""Tests for the per-host politeness scheduler."""
+import time
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from aioresponses import aioresponses
+
+from ..politeness import HostScheduler, TokenBucket, parse_retry_after
+from ..scraper import WikiScraper
+
+ROBOTS = """
+User-agent: *
+Disallow: /private
+Crawl-delay: 2
+"""
+
+def test_parse_retry_after():
+    """Test Retry-After in both seconds and HTTP-date form."""
+    assert parse_retry_after("3") == 3.0
+    assert parse_retry_after(None) == 1.0
+    assert parse_retry_after("garbage") == 1.0
+    later = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=30), usegmt=True)
+    assert 25 < parse_retry_after(later) <= 30
+
+def test_token_bucket_spaces_requests():
+    """Test that reservations beyond the burst are spaced at the bucket rate."""
+    bucket = TokenBucket(rate=10, burst=2)
+    delays = [bucket.reserve() for _ in range(4)]
+    assert delays[:2] == [0.0, 0.0]
+    assert delays[2] == pytest.approx(0.1, abs=0.01)
+    assert delays[3] == pytest.approx(0.2, abs=0.01)
+
+def test_token_bucket_pause():
+    """Test that a pause delays the next reservation."""
+    bucket = TokenBucket(rate=10, burst=5)
+    bucket.pause(2)
+    assert bucket.reserve() == pytest.approx(2.1, abs=0.01)
+
+@pytest.mark.asyncio
+async def test_robots_disallow_and_crawl_delay():
+    """Test that robots.txt rules and Crawl-delay are applied per origin."""
+    scheduler = HostScheduler(rate=10)
+    async with WikiScraper("https://example.com", scheduler=scheduler) as scraper:
+        with aioresponses() as m:
+            m.get("https://example.com/robots.txt", status=200, body=ROBOTS)
+            assert await scraper.scrape_page("https://example.com/private/page") is None
+            assert await scheduler.allowed("https://example.com/public", scraper.session)
+
+    assert scheduler.bucket("https://example.com").rate == 0.5
+    assert scheduler.bucket("https://other.com").rate == 10
+
+@pytest.mark.asyncio
+async def test_retry_after_429():
+    """Test that a 429 is retried once the Retry-After delay has passed."""
+    scheduler = HostScheduler(rate=100, respect_robots=False)
+    html = "<html><head><title>Page</title></head><body>Text</body></html>"
+    async with WikiScraper("https://example.com", scheduler=scheduler) as scraper:
+        with aioresponses() as m:
+            m.get("https://example.com/page", status=429, headers={"Retry-After": "0.2"})
+            m.get("https://example.com/page", status=200, content_type='text/html', body=html)
+            start = time.monotonic()
+            result = await scraper.scrape_page("https://example.com/page")
+
+    assert result["title"] == "Page"
+    assert time.monotonic() - start >= 0.2
@@ -0,0 +1,84 @@
+"""Tests for per-phase profiling."""
+import os
+import pstats
+from argparse import Namespace
+
+import pytest
+
+from ..cli import run_scraper
+from ..profiling import NULL_PROFILER, PhaseProfiler, format_bytes
+from ..sitegen import SyntheticWiki, serve_wiki
+
+def outer_work():
+    """Do some work charged to the outer phase."""
+    return sum(range(1000))
+
+def inner_work():
+    """Do some work charged to the nested phase."""
+    return sorted(range(1000), reverse=True)
+
+def function_names(path):
+    """Return the names of the functions recorded in a pstats file."""
+    return {name for _, _, name in pstats.Stats(path).stats}
+
+def test_cpu_phases_charge_innermost(tmp_path):
+    """Test that nested phases pause the outer phase's profiler."""
+    profiler = PhaseProfiler('cpu', str(tmp_path))
+    with profiler.phase('fetching'):
+        outer_work()
+        with profiler.phase('extraction'):
+            inner_work()
+    report = profiler.close()
+
+    assert report.index("CPU profile: fetching") < report.index("CPU profile: extraction")
+    fetching = function_names(str(tmp_path / "fetching.pstats"))
+    extraction = function_names(str(tmp_path / "extraction.pstats"))
+    assert 'outer_work' in fetching and 'inner_work' not in fetching
+    assert 'inner_work' in extraction and 'outer_work' not in extraction
+
+def test_mem_phases(tmp_path):
+    """Test retained memory, peaks and snapshots per phase."""
+    profiler = PhaseProfiler('mem', str(tmp_path))
+    profiler.start()
+    kept = []
+    with profiler.phase('fetching'):
+        for _ in range(3):
+            with profiler.phase('extraction'):
+                kept.append(bytearray(100_000))
+                scratch = bytearray(1_000_000)
+                del scratch
+    report = profiler.close()
+
+    extraction = profiler.stats['extraction']
+    assert extraction.calls == 3
+    assert 300_000 <= extraction.retained < 1_000_000
+    assert extraction.peak >= 1_000_000
+    assert profiler.stats['fetching'].peak >= 1_000_000
+    assert os.path.exists(tmp_path / "fetching.tracemalloc")
+    assert not os.path.exists(tmp_path / "extraction.tracemalloc")
+    assert "Memory: extraction: 3 calls" in report
+
+def test_disabled_profiler():
+    """Test that the no-op profiler measures nothing."""
+    with NULL_PROFILER.phase('discovery'):
+        pass
+    assert NULL_PROFILER.close() == ""
+    with pytest.raises(ValueError):
+        PhaseProfiler('disk')
+
+def test_format_bytes():
+    """Test human-readable byte counts."""
+    assert format_bytes(512) == "+512.0 B"
+    assert format_bytes(-1536) == "-1.5 KB"
+    assert format_bytes(3 * 1024 ** 3) == "+3.0 GB"
+
+@pytest.mark.asyncio
+async def test_cli_profile_option(tmp_path, monkeypatch, capsys):
+    """Test that --profile cpu saves one pstats file per phase."""
+    monkeypatch.chdir(tmp_path)
+    async with serve_wiki(SyntheticWiki(10, broken_every=0, large_every=0)) as base_url:
+        await run_scraper(Namespace(url=base_url, format='json', profile='cpu', rate=1000.0))
+
+    for phase in ('discovery', 'fetching', 'extraction', 'output'):
+        assert (tmp_path / "output" / "profile" / f"{phase}.pstats").exists()
+    assert "CPU profile: extraction" in capsys.readouterr().out
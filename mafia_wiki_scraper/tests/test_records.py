@@ -0,0 +1,42 @@
+"""Tests for the compact page record."""
+import json
+import sys
+
+import pytest
+
+from ..records import PageRecord, as_dict
+from ..sinks import format_page
+
+def test_record_reads_like_a_page_dict():
+    """Test that output fields are readable by key and to_dict gives the JSON form."""
+    record = PageRecord("https://example.com/a", "A", "Text", 200, 1700000000.0, "abc", 42)
+
+    assert record["title"] == "A"
+    assert record.get("document") is None
+    assert "document" not in record
+    with pytest.raises(KeyError):
+        record["status"]
+    assert record.to_dict() == {"url": "https://example.com/a", "title": "A", "content": "Text"}
+    assert record == {"url": "https://example.com/a", "title": "A", "content": "Text"}
+    assert as_dict(record) == record.to_dict()
+
+def test_structured_record_includes_document():
+    """Test that the document appears in the output form only when present."""
+    record = PageRecord("https://example.com/a", "A", "Text", document={"heading": None})
+
+    assert list(record.keys()) == ["url", "title", "content", "document"]
+    assert json.loads(format_page(record, 'json'))["document"] == {"heading": None}
+
+def test_url_is_interned():
+    """Test that records share their URL string with other holders of the same URL."""
+    url = "".join(["https://example.com/", "interned"])
+
+    assert PageRecord(url, None, "").url is sys.intern(url)
+
+def test_record_is_smaller_than_a_dict():
+    """Test that a record holding more fields still takes less memory than the old page dict."""
+    record = PageRecord("https://example.com/a", "A", "Text", 200, 1700000000.0, "abc", 42)
+    page = {"url": record.url, "title": record.title, "content": record.content}
+
+    assert not hasattr(record, '__dict__')
+    assert sys.getsizeof(record) < sys.getsizeof(page)
@@ -0,0 +1,37 @@
+"""Tests for the persistent redirect map."""
+import json
+
+from ..redirects import RedirectMap
+
+def test_resolve_follows_chains(tmp_path):
+    """Test that recorded hops resolve to the final target."""
+    redirects = RedirectMap()
+    redirects.record(["https://a.example.com/", "https://b.example.com/"], "https://c.example.com/")
+
+    assert redirects.resolve("https://a.example.com/") == "https://c.example.com/"
+    assert redirects.resolve("https://c.example.com/") == "https://c.example.com/"
+    assert redirects.resolve("https://other.example.com/") == "https://other.example.com/"
+
+def test_resolve_stops_on_loops():
+    """Test that a redirect loop does not hang resolution."""
+    redirects = RedirectMap()
+    redirects.record(["https://a.example.com/"], "https://b.example.com/")
+    redirects.record(["https://b.example.com/"], "https://a.example.com/")
+
+    assert redirects.resolve("https://a.example.com/") in {"https://a.example.com/", "https://b.example.com/"}
+
+def test_save_and_reload(tmp_path):
+    """Test that the map persists across runs and is only written when changed."""
+    path = tmp_path / "output" / "redirects.json"
+    redirects = RedirectMap(str(path))
+    redirects.save()
+    assert not path.exists()
+
+    redirects.record(["https://a.example.com/"], "https://b.example.com/")
+    redirects.save()
+
+    assert json.loads(path.read_text()) == {"https://a.example.com/": "https://b.example.com/"}
+    reloaded = RedirectMap(str(path))
+    assert len(reloaded) == 1
+    assert reloaded.resolve("https://a.example.com/") == "https://b.example.com/"
+    assert not reloaded.dirty
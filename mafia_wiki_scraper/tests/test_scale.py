@@ -0,0 +1,104 @@
+"""Crawl synthetic wikis of 10k and 100k pages.
+
+These tests take minutes, so they only run when ``MAFIA_SCALE_TESTS=1`` is
+set. Budgets can be tightened as the crawler gets faster.
+"""
+import multiprocessing
+import os
+import resource
+import socket
+import sys
+import time
+
+import pytest
+
+from ..parallel import crawl_parallel
+from ..scraper import WikiScraper
+from ..sitegen import SyntheticWiki, run_server, serve_wiki
+
+pytestmark = [
+    pytest.mark.scale,
+    pytest.mark.skipif(os.environ.get('MAFIA_SCALE_TESTS') != '1', reason="set MAFIA_SCALE_TESTS=1 to run"),
+]
+
+# pages: (wall time budget in seconds, peak memory growth budget in bytes)
+BUDGETS = {
+    10_000: (600, 512 * 1024 ** 2),
+    100_000: (7200, 4 * 1024 ** 3),
+}
+
+def peak_rss() -> int:
+    """Return the peak resident set size of this process in bytes."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("pages", sorted(BUDGETS))
+async def test_crawl_at_scale(pages):
+    """Test that a large crawl returns every page once within its time and memory budget."""
+    wiki = SyntheticWiki(pages)
+    time_budget, memory_budget = BUDGETS[pages]
+    rss_before = peak_rss()
+    start = time.perf_counter()
+
+    async with serve_wiki(wiki) as base_url:
+        async with WikiScraper(base_url, max_concurrent=50) as scraper:
+            results = await scraper.scrape_all_pages()
+
+    elapsed = time.perf_counter() - start
+    memory = peak_rss() - rss_before
+    print(f"{pages} pages in {elapsed:.1f}s ({pages / elapsed:.0f} pages/s), peak memory +{memory / 1024 ** 2:.0f} MB")
+
+    urls = [page['url'] for page in results]
+    assert len(urls) == len(set(urls)) == pages
+    assert set(urls) == set(wiki.urls(base_url))
+    assert elapsed < time_budget
+    assert memory < memory_budget
+
+def free_port() -> int:
+    """Return a TCP port that is currently free on localhost."""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def wait_for_port(port: int, timeout: float = 10.0) -> None:
+    """Wait until something accepts connections on ``port``."""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=1):
+                return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.1)
+
+@pytest.mark.skipif((os.cpu_count() or 1) < 4, reason="needs at least 4 cores")
+def test_workers_scale_with_cores():
+    """Test that crawl throughput grows close to linearly with worker processes."""
+    pages = 10_000
+    workers = (os.cpu_count() or 1) // 2
+    port = free_port()
+    # Serve from as many processes as there are workers, so the server is not the bottleneck
+    context = multiprocessing.get_context('spawn')
+    servers = [context.Process(target=run_server, args=(pages, '127.0.0.1', port, 0, True), daemon=True)
+               for _ in range(workers)]
+    for server in servers:
+        server.start()
+    try:
+        wait_for_port(port)
+        base_url = f"http://127.0.0.1:{port}/wiki"
+        timings = {}
+        for count in (1, workers):
+            start = time.perf_counter()
+            results = crawl_parallel(base_url, count, max_concurrent=20)
+            timings[count] = time.perf_counter() - start
+            assert len(results) == pages
+    finally:
+        for server in servers:
+            server.terminate()
+
+    speedup = timings[1] / timings[workers]
+    print(f"1 worker: {timings[1]:.1f}s, {workers} workers: {timings[workers]:.1f}s, speedup {speedup:.1f}x")
+    assert speedup >= 0.6 * workers
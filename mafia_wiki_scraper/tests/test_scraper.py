@@ -1,9 +1,11 @@
 """Tests for the WikiScraper class."""
+import asyncio
 import pytest
 import pytest_asyncio
 from aioresponses import aioresponses
 from bs4 import BeautifulSoup
 
+from ..redirects import RedirectMap
 from ..scraper import WikiScraper
 
 @pytest.fixture
@@ -36,7 +38,7 @@ async def scraper(base_url):
 async def test_scrape_page_success(scraper, base_url, mock_html):
     """Test successful page scraping."""
     with aioresponses() as m:
-        m.get(f"{base_url}", status=200, body=mock_html)
+        m.get(f"{base_url}", status=200, content_type='text/html', body=mock_html)
         result = await scraper.scrape_page(base_url)
         
         assert result is not None
@@ -56,7 +58,7 @@ async def test_scrape_page_failure(scraper, base_url):
 async def test_get_internal_links(scraper, base_url, mock_html):
     """Test internal links extraction."""
     with aioresponses() as m:
-        m.get(f"{base_url}", status=200, body=mock_html)
+        m.get(f"{base_url}", status=200, content_type='text/html', body=mock_html)
         links = await scraper.get_internal_links(base_url)
         
         assert len(links) == 2
@@ -87,12 +89,119 @@ async def test_scrape_all_pages(scraper, base_url):
     with aioresponses() as m:
         # Mock both the initial page and the link extraction requests
         for url, html in mock_pages.items():
-            m.get(url, status=200, body=html)
+            m.get(url, status=200, content_type='text/html', body=html)
             # Mock the same URL again for link extraction
-            m.get(url, status=200, body=html)
+            m.get(url, status=200, content_type='text/html', body=html)
         
         results = await scraper.scrape_all_pages()
         
         assert len(results) == 2
         assert any(r["title"] == "Main" for r in results)
         assert any(r["title"] == "Page 1" for r in results)
+
+@pytest.mark.asyncio
+async def test_concurrent_fetches_share_one_request(scraper, base_url, mock_html):
+    """Test that concurrent fetches of one URL are served by a single request."""
+    async def slow_response(url, **kwargs):
+        """Keep the request open long enough for the other fetches to start."""
+        await asyncio.sleep(0.01)
+
+    with aioresponses() as m:
+        # Registered once, so a second request would fail
+        m.get(f"{base_url}/page1", status=200, content_type='text/html', body=mock_html, callback=slow_response)
+
+        results = await asyncio.gather(*(scraper.fetch(f"{base_url}/page1") for _ in range(3)))
+
+        assert [status for status, _, _ in results] == [200, 200, 200]
+        assert all(html.content == mock_html.encode() for _, _, html in results)
+        assert scraper.coalesced == 2
+        assert not scraper.inflight
+
+@pytest.mark.asyncio
+async def test_redirects_are_memoised(scraper, base_url, mock_html):
+    """Test that a URL seen redirecting is requested at its target next time."""
+    with aioresponses() as m:
+        m.get(f"{base_url}/old", status=301, headers={'Location': f"{base_url}/new"})
+        m.get(f"{base_url}/new", status=200, content_type='text/html', body=mock_html, repeat=True)
+
+        await scraper.fetch(f"{base_url}/old")
+        status, _, html = await scraper.fetch(f"{base_url}/old")
+
+        assert status == 200
+        assert html.text() == mock_html
+        assert scraper.redirects.resolve(f"{base_url}/old") == f"{base_url}/new"
+
+@pytest.mark.asyncio
+async def test_crawl_follows_redirected_base_url():
+    """Test that a crawl whose base URL redirects continues under the target."""
+    async with WikiScraper("https://old.example.com/wiki") as scraper:
+        with aioresponses() as m:
+            m.get("https://old.example.com/wiki", status=302,
+                  headers={'Location': "https://new.example.com/wiki"})
+            m.get("https://new.example.com/wiki", status=200, content_type='text/html', repeat=True,
+                  body='<html><head><title>Main</title></head><body><a href="/wiki/page1">1</a></body></html>')
+            m.get("https://new.example.com/wiki/page1", status=200, content_type='text/html', repeat=True,
+                  body='<html><head><title>Page 1</title></head><body>Content 1</body></html>')
+
+            results = await scraper.scrape_all_pages()
+
+        assert scraper.base_url == "https://new.example.com/wiki"
+        assert sorted(r["url"] for r in results) == ["https://new.example.com/wiki",
+                                                     "https://new.example.com/wiki/page1"]
+
+@pytest.mark.asyncio
+async def test_fetch_decodes_declared_encoding(scraper, base_url):
+    """Test that pages are parsed from bytes in the encoding their host declares."""
+    latin1 = '<html><head><meta charset="iso-8859-1"><title>Caf\xe9</title></head><body>na\xefve</body></html>'
+    with aioresponses() as m:
+        m.get(f"{base_url}/declared", status=200, content_type='text/html', body=latin1.encode('latin-1'))
+        m.get(f"{base_url}/undeclared", status=200, content_type='text/html',
+              body='<title>Cr\xe8me</title>'.encode('latin-1'))
+
+        declared = await scraper.scrape_page(f"{base_url}/declared")
+        undeclared = await scraper.scrape_page(f"{base_url}/undeclared")
+
+    assert declared["title"] == "Caf\xe9"
+    assert declared["content"] == "Caf\xe9 na\xefve"
+    # The page declares nothing, so the host's last declared encoding is used
+    assert undeclared["title"] == "Cr\xe8me"
+
+@pytest.mark.asyncio
+async def test_non_html_responses_are_skipped(scraper, base_url):
+    """Test that non-HTML responses go to the asset callbacks instead of the parser."""
+    assets = []
+    scraper.asset_callbacks.append(lambda url, headers: assets.append((url, headers['Content-Type'])))
+    with aioresponses() as m:
+        m.get(f"{base_url}/rules.pdf", status=200, content_type='application/pdf', body=b'%PDF-1.7')
+
+        page, links = await scraper.crawl_page(f"{base_url}/rules.pdf")
+
+    assert (page, links) == (None, set())
+    assert assets == [(f"{base_url}/rules.pdf", 'application/pdf')]
+    assert scraper.skipped == {f"{base_url}/rules.pdf": "not HTML (application/pdf)"}
+
+@pytest.mark.asyncio
+async def test_oversized_pages_are_skipped(base_url):
+    """Test that pages over the size limit are abandoned, whether or not they declare a length."""
+    html = "<html><body>" + "x" * 1000 + "</body></html>"
+    async with WikiScraper(base_url, max_page_size=100) as scraper:
+        with aioresponses() as m:
+            m.get(f"{base_url}/declared", status=200, content_type='text/html', body=html,
+                  headers={'Content-Length': str(len(html))})
+            m.get(f"{base_url}/streamed", status=200, content_type='text/html', body=html)
+            m.get(f"{base_url}/small", status=200, content_type='text/html', body="<title>Small</title>")
+
+            assert await scraper.scrape_page(f"{base_url}/declared") is None
+            assert await scraper.scrape_page(f"{base_url}/streamed") is None
+            assert (await scraper.scrape_page(f"{base_url}/small"))["title"] == "Small"
+
+        assert scraper.skipped[f"{base_url}/declared"] == f"too large ({len(html)} bytes)"
+        assert scraper.skipped[f"{base_url}/streamed"] == "larger than 100 bytes"
+
+@pytest.mark.asyncio
+async def test_remembered_base_url_redirect_rebases_crawl():
+    """Test that a base URL known to redirect is crawled under its target from the start."""
+    redirects = RedirectMap()
+    redirects.record(["https://old.example.com/wiki"], "https://new.example.com/wiki")
+    async with WikiScraper("https://old.example.com/wiki", redirects=redirects) as scraper:
+        assert scraper.base_url == "https://new.example.com/wiki"
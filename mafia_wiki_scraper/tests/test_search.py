@@ -0,0 +1,116 @@
+"""Tests for the inverted search index."""
+from argparse import Namespace
+
+import pytest
+from aioresponses import aioresponses
+
+from ..cli import run_scraper, run_search
+from ..search import InvertedIndex, decode_postings, encode_varint, tokenize
+
+@pytest.fixture
+def pages():
+    """Fixture for a few wiki-like pages."""
+    return [
+        {"url": "https://example.com/smuggling", "title": "Smuggling",
+         "content": "Smuggling prices change every hour. Buy low, sell high."},
+        {"url": "https://example.com/killing", "title": "Killing",
+         "content": "Killing requires bullets and a high rank."},
+        {"url": "https://example.com/ranks", "title": "Ranks",
+         "content": "Rank table: every rank unlocks new crimes. Rank up by doing crimes."},
+    ]
+
+@pytest.fixture
+def index(pages):
+    """Fixture for an index containing the pages."""
+    index = InvertedIndex()
+    for page in pages:
+        index.add_page(page)
+    return index
+
+def test_varint_postings_round_trip():
+    """Test delta/varint encoding of postings."""
+    data = bytearray()
+    previous = 0
+    for doc_id, frequency in [(1, 3), (200, 1), (70000, 42)]:
+        encode_varint(doc_id - previous, data)
+        encode_varint(frequency, data)
+        previous = doc_id
+    assert list(decode_postings(bytes(data))) == [(1, 3), (200, 1), (70000, 42)]
+
+def test_tokenize():
+    """Test lowercase word tokenisation."""
+    assert tokenize("Rank-up: 12 Crimes!") == ["rank", "up", "12", "crimes"]
+
+def test_bm25_ranking(index):
+    """Test that the page with more matching terms ranks first."""
+    hits = index.search("rank")
+    assert [hit.url for hit in hits][:2] == ["https://example.com/ranks", "https://example.com/killing"]
+    assert hits[0].score > hits[1].score
+    assert index.search("nothing matches") == []
+
+def test_incremental_update_replaces_changed_pages(index, pages):
+    """Test that unchanged pages are skipped and changed pages re-indexed."""
+    assert not index.add_page(pages[0])
+    assert index.add_page(dict(pages[1], content="Killing needs a gun license now."))
+    assert len(index) == 3
+    assert [hit.url for hit in index.search("bullets")] == []
+    assert [hit.url for hit in index.search("license")] == ["https://example.com/killing"]
+
+def test_remove_and_compact(index):
+    """Test that removed pages disappear from results, before and after compaction."""
+    index.remove("https://example.com/ranks")
+    assert all(hit.url != "https://example.com/ranks" for hit in index.search("rank"))
+    index.compact()
+    assert not index.deleted
+    assert [hit.url for hit in index.search("rank")] == ["https://example.com/killing"]
+
+def test_retain_drops_pages_missing_from_a_new_crawl(index, pages):
+    """Test that pages absent from a new crawl leave the results, the postings and the length statistics."""
+    assert index.retain(page['url'] for page in pages[1:]) == 1
+    assert len(index) == 2
+    assert index.search("smuggling") == []
+    assert "smuggling" not in index.postings and not index.deleted
+    fresh = InvertedIndex()
+    for page in pages[1:]:
+        fresh.add_page(page)
+    assert index.total_length == fresh.total_length
+    assert index.search("rank") == fresh.search("rank")
+    assert index.retain(page['url'] for page in pages) == 0
+
+@pytest.mark.asyncio
+async def test_cli_index_forgets_removed_pages(tmp_path, monkeypatch):
+    """Test that re-crawling with --index removes pages the site no longer has."""
+    monkeypatch.chdir(tmp_path)
+    args = Namespace(url="https://example.com", format="json", index=True, ignore_robots=True, rate=1000.0)
+    for links in ('<a href="/a">A</a> <a href="/b">B</a>', '<a href="/a">A</a>'):
+        with aioresponses() as m:
+            m.get("https://example.com", status=200, content_type='text/html', repeat=True,
+                  body=f"<html><head><title>Home</title></head><body>{links}</body></html>")
+            m.get("https://example.com/a", status=200, content_type='text/html', repeat=True,
+                  body="<html><head><title>A</title></head><body>Alpha smuggling</body></html>")
+            m.get("https://example.com/b", status=200, content_type='text/html', repeat=True,
+                  body="<html><head><title>B</title></head><body>Bravo smuggling</body></html>")
+            await run_scraper(args)
+
+    index = InvertedIndex.load(str(tmp_path / "output" / "mafia_game_wiki.idx"))
+    assert len(index) == 2
+    assert [hit.url for hit in index.search("smuggling")] == ["https://example.com/a"]
+
+def test_save_and_load(index, tmp_path):
+    """Test that a persisted index answers queries identically."""
+    path = str(tmp_path / "wiki.idx")
+    index.remove("https://example.com/killing")
+    index.save(path)
+    loaded = InvertedIndex.load(path)
+    assert loaded.search("rank") == index.search("rank")
+    assert loaded.add_page({"url": "https://example.com/new", "title": "New", "content": "rank"})
+    assert len(loaded) == 3
+
+def test_search_command(index, tmp_path, capsys):
+    """Test the search subcommand output."""
+    path = str(tmp_path / "wiki.idx")
+    index.save(path)
+    run_search(Namespace(index=path, query=["smuggling", "prices"], limit=5))
+    output = capsys.readouterr().out
+    assert "https://example.com/smuggling" in output
+    assert "1 results from 3 pages" in output
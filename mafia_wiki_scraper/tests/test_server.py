@@ -0,0 +1,117 @@
+"""Tests for the local read API server."""
+import json
+import os
+import time
+from unittest.mock import patch
+
+import pytest
+import pytest_asyncio
+from aiohttp.test_utils import TestClient, TestServer
+
+from ..cli import REDIRECTS_PATH
+from ..redirects import RedirectMap
+from ..server import MAX_SEARCH_LIMIT, CorpusServer, LRUCache, latest_snapshot
+
+PAGES = [
+    {"url": "https://example.com/ranks", "title": "Rank table", "content": "Ranks for the family"},
+    {"url": "https://example.com/crimes", "title": "Crimes", "content": "Crime cooldowns and rank bonus"},
+]
+
+@pytest.fixture
+def snapshot(tmp_path):
+    """Fixture for a JSON snapshot written a while ago."""
+    path = tmp_path / "wiki.json"
+    path.write_text(json.dumps(PAGES), encoding='utf-8')
+    os.utime(path, (time.time() - 3600, time.time() - 3600))
+    return str(path)
+
+@pytest_asyncio.fixture
+async def client(snapshot):
+    """Fixture for a test client against the corpus server."""
+    server = CorpusServer(snapshot, reload_interval=3600)
+    async with TestClient(TestServer(server.app())) as client:
+        client.corpus_server = server
+        yield client
+
+def test_lru_cache_evicts_oldest():
+    """Test least recently used eviction."""
+    cache = LRUCache(max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+
+def test_latest_snapshot(tmp_path, snapshot):
+    """Test that manifests and status files are not picked as snapshots."""
+    (tmp_path / "wiki.status.json").write_text("{}")
+    assert latest_snapshot(str(tmp_path)) == snapshot
+
+def test_latest_snapshot_skips_redirect_map(tmp_path, snapshot):
+    """Test that the redirect map written after every crawl is not served as a snapshot."""
+    redirects = RedirectMap(str(tmp_path / os.path.basename(REDIRECTS_PATH)))
+    redirects.record(["https://old.example.com/"], "https://example.com/")
+    redirects.save()
+    # Written by earlier versions under a name the snapshot glob matches
+    (tmp_path / "redirects.json").write_text(json.dumps(redirects.targets))
+    assert latest_snapshot(str(tmp_path)) == snapshot
+
+@pytest.mark.asyncio
+async def test_page_lookup_with_etag(client):
+    """Test page lookup, 404s and conditional requests."""
+    response = await client.get("/page", params={"url": "https://example.com/ranks"})
+    assert response.status == 200
+    assert (await response.json())["title"] == "Rank table"
+
+    etag = response.headers["ETag"]
+    response = await client.get("/page", params={"url": "https://example.com/ranks"},
+                                headers={"If-None-Match": etag})
+    assert response.status == 304
+
+    response = await client.get("/page", params={"url": "https://example.com/missing"})
+    assert response.status == 404
+
+@pytest.mark.asyncio
+async def test_search_is_ranked(client):
+    """Test that search results are ranked by relevance."""
+    response = await client.get("/search", params={"q": "rank table"})
+    hits = await response.json()
+    assert [hit["title"] for hit in hits] == ["Rank table", "Crimes"]
+    assert hits[0]["score"] > hits[1]["score"]
+
+    response = await client.get("/search", params={"q": "cooldowns"})
+    assert [hit["title"] for hit in await response.json()] == ["Crimes"]
+
+@pytest.mark.asyncio
+async def test_search_limit_is_validated(client):
+    """Test that a bad search limit is a 400 and a huge one is clamped."""
+    for limit in ("ten", "-1", "0"):
+        response = await client.get("/search", params={"q": "rank", "limit": limit})
+        assert response.status == 400
+        assert await response.text() == "limit must be a positive whole number"
+
+    response = await client.get("/search", params={"q": "rank", "limit": "1"})
+    assert len(await response.json()) == 1
+    with patch.object(client.corpus_server.corpus, 'search', return_value=[]) as search:
+        response = await client.get("/search", params={"q": "rank", "limit": "1000000"})
+    assert response.status == 200
+    search.assert_called_once_with("rank", MAX_SEARCH_LIMIT)
+
+@pytest.mark.asyncio
+async def test_hot_swap_and_changed_since(client, snapshot):
+    """Test that a rewritten snapshot is swapped in and reported as changed."""
+    before = time.time()
+    pages = [PAGES[0], dict(PAGES[1], content="New crime cooldowns")]
+    with open(snapshot, 'w', encoding='utf-8') as f:
+        json.dump(pages, f)
+
+    assert await client.corpus_server.reload_if_changed()
+    response = await client.get("/changed", params={"since": str(before - 1)})
+    assert [page["url"] for page in await response.json()] == ["https://example.com/crimes"]
+
+    response = await client.get("/search", params={"q": "new"})
+    assert [hit["title"] for hit in await response.json()] == ["Crimes"]
+
+    response = await client.get("/changed", params={"since": "not a date"})
+    assert response.status == 400
@@ -0,0 +1,81 @@
+"""Tests for the compressed and sharded output sinks."""
+import gzip
+import json
+import os
+
+import pytest
+
+from ..cli import save_output
+from ..sinks import ShardedWriter, open_compressed, parse_size, read_json_shards
+
+@pytest.fixture
+def pages():
+    """Fixture for a handful of scraped pages."""
+    return [
+        {"url": f"https://example.com/page{i}", "title": f"Page {i}", "content": "x" * 200}
+        for i in range(10)
+    ]
+
+@pytest.fixture
+def temp_output_dir(tmp_path):
+    """Fixture for temporary output directory."""
+    original_dir = os.getcwd()
+    os.chdir(tmp_path)
+    yield tmp_path
+    os.chdir(original_dir)
+
+def test_parse_size():
+    """Test parsing of human readable sizes."""
+    assert parse_size("1000") == 1000
+    assert parse_size("64KB") == 64 * 1024
+    assert parse_size("2m") == 2 * 1024 ** 2
+    with pytest.raises(ValueError):
+        parse_size("lots")
+
+def test_uncompressed_json_matches_json_dump(pages, tmp_path):
+    """Test that a single uncompressed shard is byte-identical to json.dump output."""
+    path = str(tmp_path / "out.json")
+    with ShardedWriter(path, "json") as writer:
+        for page in pages:
+            writer.write(page)
+
+    with open(path, 'r', encoding='utf-8') as f:
+        assert f.read() == json.dumps(pages, ensure_ascii=False, indent=4)
+    assert not os.path.exists(writer.manifest_path)
+
+def test_gzip_output(pages, temp_output_dir):
+    """Test that gzip compressed output decompresses to the original pages."""
+    output_file = save_output(pages, "json", compression="gzip")
+    assert output_file.endswith(".json.gz")
+    with gzip.open(output_file, 'rt', encoding='utf-8') as f:
+        assert json.load(f) == pages
+
+@pytest.mark.parametrize("compression", [None, "gzip", "zstd"])
+def test_sharded_rollover_and_manifest(pages, temp_output_dir, compression):
+    """Test size-based rollover and the manifest contents."""
+    if compression == "zstd":
+        pytest.importorskip("zstandard")
+    manifest_path = save_output(pages, "json", compression=compression, shard_size=1000)
+
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    assert manifest['count'] == len(pages)
+    assert len(manifest['shards']) > 1
+    assert all(shard['bytes'] <= 1000 for shard in manifest['shards'])
+    assert manifest['shards'][0]['file'].startswith("mafia_game_wiki_")
+    assert "-00000.json" in manifest['shards'][0]['file']
+    for previous, shard in zip(manifest['shards'], manifest['shards'][1:]):
+        assert previous['last_url'] < shard['first_url']
+    assert list(read_json_shards(manifest_path)) == sorted(pages, key=lambda page: page['url'])
+
+def test_sharded_txt_output(pages, temp_output_dir):
+    """Test that txt shards keep the page separator format."""
+    manifest_path = save_output(pages, "txt", compression="gzip", shard_size=600)
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+
+    first_shard = os.path.join(os.path.dirname(manifest_path), manifest['shards'][0]['file'])
+    with open_compressed(first_shard) as f:
+        content = f.read().decode('utf-8')
+    assert content.startswith("URL: https://example.com/page0\n")
+    assert content.count("-" * 80) == manifest['shards'][0]['count']
@@ -0,0 +1,42 @@
+"""Tests for the synthetic wiki generator, and a small crawl against it."""
+import pytest
+
+from ..scraper import WikiScraper
+from ..sitegen import SyntheticWiki, serve_wiki
+
+@pytest.fixture
+def wiki():
+    """Fixture for a small synthetic wiki with every kind of awkward link."""
+    return SyntheticWiki(200, broken_every=20, large_every=100, large_size=64 * 1024)
+
+def test_tree_paths(wiki):
+    """Test that paths nest under ancestors and map back to their page."""
+    assert wiki.path(0) == "/wiki"
+    assert wiki.path(5) == "/wiki/page-1/page-5"
+    assert wiki.children(1) == [5, 6, 7, 8]
+    assert wiki.parent(5) == 1
+    assert wiki.page_for_path("/wiki/page-1/page-5") == 5
+    assert wiki.page_for_path("/wiki/page-5") is None
+    assert wiki.page_for_path("/wiki/page-999") is None
+
+def test_rendering_is_deterministic(wiki):
+    """Test that the same seed renders the same pages."""
+    assert wiki.render(42) == SyntheticWiki(200, broken_every=20, large_every=100,
+                                            large_size=64 * 1024).render(42)
+    assert wiki.render(42) != SyntheticWiki(200, seed=1).render(42)
+    assert len(wiki.text(100)) >= 64 * 1024
+    assert 'missing-19' in wiki.render(19)
+
+@pytest.mark.asyncio
+async def test_crawl_synthetic_wiki(wiki):
+    """Test that a crawl finds every page exactly once despite cycles, duplicates and broken links."""
+    async with serve_wiki(wiki) as base_url:
+        async with WikiScraper(base_url, max_concurrent=20) as scraper:
+            pages = await scraper.scrape_all_pages()
+
+    urls = [page['url'] for page in pages]
+    assert len(urls) == len(set(urls))
+    assert set(urls) == set(wiki.urls(base_url))
+    titles = {page['url']: page['title'] for page in pages}
+    assert titles[base_url + "/page-1/page-5"] == "Topic 5"
+    assert not any('missing' in url or '#' in url for url in urls)
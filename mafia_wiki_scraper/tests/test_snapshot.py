@@ -0,0 +1,74 @@
+"""Tests for the memory-mapped snapshot format."""
+import json
+import os
+from argparse import Namespace
+
+import pytest
+
+from ..cli import run_show, save_output
+from ..snapshot import SnapshotReader, is_snapshot, write_snapshot
+
+@pytest.fixture
+def pages():
+    """Fixture for pages in non-sorted order with non-ASCII content."""
+    return [
+        {"url": f"https://example.com/page{i:03d}", "title": f"Page {i}", "content": f"Content {i} 💀"}
+        for i in (5, 1, 9, 3, 7, 0)
+    ]
+
+@pytest.fixture
+def snapshot_path(pages, tmp_path):
+    """Fixture for a written snapshot file."""
+    path = str(tmp_path / "wiki.mwsnap")
+    write_snapshot(pages, path)
+    return path
+
+def test_lookup_by_url(pages, snapshot_path):
+    """Test that every page is found by URL and missing URLs are not."""
+    with SnapshotReader(snapshot_path) as reader:
+        assert len(reader) == len(pages)
+        for page in pages:
+            assert reader.get(page['url']) == page
+        assert reader.get("https://example.com/page002") is None
+        assert reader.get("https://example.com/zzz") is None
+        assert "https://example.com/page001" in reader
+
+def test_iteration_is_url_sorted(pages, snapshot_path):
+    """Test that URLs and records iterate in sorted order."""
+    with SnapshotReader(snapshot_path) as reader:
+        urls = list(reader.urls())
+        assert urls == sorted(page['url'] for page in pages)
+        assert [page['url'] for page in reader] == urls
+
+def test_duplicate_urls_keep_last(tmp_path):
+    """Test that a repeated URL resolves to its last record."""
+    path = str(tmp_path / "dup.mwsnap")
+    count = write_snapshot([
+        {"url": "https://example.com/a", "title": "Old", "content": ""},
+        {"url": "https://example.com/a", "title": "New", "content": ""},
+    ], path)
+    assert count == 1
+    with SnapshotReader(path) as reader:
+        assert reader.get("https://example.com/a")["title"] == "New"
+
+def test_rejects_other_files(tmp_path):
+    """Test that non-snapshot files are rejected."""
+    path = tmp_path / "wiki.json"
+    path.write_text(json.dumps([]))
+    assert not is_snapshot(str(path))
+    with pytest.raises(ValueError):
+        SnapshotReader(str(path))
+
+def test_save_output_and_show(pages, tmp_path, capsys):
+    """Test writing a snapshot from the CLI and looking a page up."""
+    original_dir = os.getcwd()
+    os.chdir(tmp_path)
+    try:
+        output_file = save_output(pages, "snapshot")
+    finally:
+        os.chdir(original_dir)
+    output_file = str(tmp_path / output_file)
+    assert output_file.endswith(".mwsnap")
+
+    run_show(Namespace(snapshot=output_file, page_url="https://example.com/page003"))
+    assert json.loads(capsys.readouterr().out)["title"] == "Page 3"
@@ -0,0 +1,101 @@
+"""Tests for structured extraction."""
+import pytest
+from aioresponses import aioresponses
+from bs4 import BeautifulSoup
+
+from ..cache import ExtractionCache
+from ..extract import extract
+from ..scraper import WikiScraper
+from ..structured import parse_list, parse_table, parse_value
+
+PAGE = """
+<html><head><title>Ranks</title></head><body>
+<p>Intro text.</p>
+<h1>Ranks</h1>
+<p>Climb the ranks.</p>
+<table>
+  <tr><th>Rank</th><th>Experience</th><th>Bonus</th></tr>
+  <tr><td>Thug</td><td>0</td><td>1.5</td></tr>
+  <tr><td>Capo</td><td>12,500</td><td>n/a</td></tr>
+  <tr><td colspan="2">Godfather</td><td>3</td></tr>
+</table>
+<h2>Crimes</h2>
+<ol><li>Pickpocket</li><li>Robbery<ul><li>Bank</li><li>Store</li></ul></li></ol>
+<h3>Cooldowns</h3><p>Wait between crimes.</p>
+<h2>Smuggling</h2><p>Prices change hourly.</p>
+</body></html>
+"""
+
+@pytest.fixture
+def document():
+    """Fixture for the structured document of the test page."""
+    return extract(PAGE, structured=True).document
+
+def test_parse_value():
+    """Test that plain numbers are typed and everything else is kept as text."""
+    assert parse_value("12,500") == 12500
+    assert parse_value("-3") == -3
+    assert parse_value("1.5") == 1.5
+    assert parse_value("5 minutes") == "5 minutes"
+    assert parse_value("1,2") == "1,2"
+
+def test_parse_value_keeps_leading_zeros():
+    """Test that identifiers with leading zeros stay text, while zero itself is still a number."""
+    assert parse_value("007") == "007"
+    assert parse_value("0123") == "0123"
+    assert parse_value("00.5") == "00.5"
+    assert parse_value("0") == 0
+    assert parse_value("0.25") == 0.25
+    assert parse_value("-0.5") == -0.5
+
+def test_section_tree(document):
+    """Test that headings nest by level and text stays in its section."""
+    assert document['text'] == "Intro text."
+    [ranks] = document['sections']
+    assert (ranks['heading'], ranks['level'], ranks['text']) == ("Ranks", 1, "Climb the ranks.")
+    assert [section['heading'] for section in ranks['sections']] == ["Crimes", "Smuggling"]
+    crimes = ranks['sections'][0]
+    assert crimes['text'] == ""
+    assert crimes['sections'][0]['heading'] == "Cooldowns"
+    assert crimes['sections'][0]['text'] == "Wait between crimes."
+
+def test_tables(document):
+    """Test that tables become typed rows aligned with their headers."""
+    [table] = document['sections'][0]['tables']
+    assert table == {
+        'headers': ["Rank", "Experience", "Bonus"],
+        'rows': [["Thug", 0, 1.5], ["Capo", 12500, "n/a"], ["Godfather", "Godfather", 3]],
+    }
+    headerless = BeautifulSoup("<table><tr><td>a</td><td>1</td></tr></table>", 'lxml').table
+    assert parse_table(headerless) == {'headers': [], 'rows': [["a", 1]]}
+
+def test_lists(document):
+    """Test that lists keep their order flag and nested items."""
+    [crime_list] = document['sections'][0]['sections'][0]['lists']
+    assert crime_list == {
+        'ordered': True,
+        'items': ["Pickpocket", {'text': "Robbery", 'lists': [{'ordered': False, 'items': ["Bank", "Store"]}]}],
+    }
+    assert parse_list(BeautifulSoup("<ul></ul>", 'lxml').ul) == {'ordered': False, 'items': []}
+
+def test_cache_round_trip(tmp_path):
+    """Test that structured documents are cached and required when requested."""
+    with ExtractionCache(str(tmp_path / "cache.sqlite")) as cache:
+        cache.put("plain", extract(PAGE))
+        cache.put("structured", extract(PAGE, structured=True))
+        assert cache.get("plain", structured=True) is None
+        assert cache.get("structured", structured=True) == extract(PAGE, structured=True)
+
+@pytest.mark.asyncio
+async def test_scraper_adds_document_field():
+    """Test that structured scrapers add a document field to each page."""
+    with aioresponses() as m:
+        m.get("https://example.com", status=200, content_type='text/html', body=PAGE, repeat=True)
+        async with WikiScraper("https://example.com", structured=True) as scraper:
+            page = await scraper.scrape_page("https://example.com")
+        async with WikiScraper("https://example.com") as scraper:
+            plain = await scraper.scrape_page("https://example.com")
+
+    assert page['document']['sections'][0]['heading'] == "Ranks"
+    assert page['content'] == plain['content']
+    assert 'document' not in plain
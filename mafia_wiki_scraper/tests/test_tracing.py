@@ -0,0 +1,85 @@
+"""Tests for crawl timeline tracing."""
+import asyncio
+import json
+from argparse import Namespace
+
+import pytest
+
+from ..cli import run_scraper
+from ..scraper import WikiScraper
+from ..sitegen import SyntheticWiki, serve_wiki
+from ..tracing import NULL_TRACER, Tracer
+
+def worker_rows(events):
+    """Group complete events by worker row."""
+    rows = {}
+    for event in events:
+        if event['ph'] == 'X':
+            rows.setdefault(event['tid'], []).append(event)
+    return rows
+
+@pytest.mark.asyncio
+async def test_workers_reuse_lowest_free_row():
+    """Test that concurrent tasks get distinct rows and freed rows are reused."""
+    tracer = Tracer()
+    seen = []
+
+    async def work():
+        with tracer.worker() as worker:
+            seen.append(worker)
+            with tracer.span('work'):
+                await asyncio.sleep(0.01)
+
+    await asyncio.gather(work(), work(), work())
+    await work()
+    assert sorted(seen[:3]) == [1, 2, 3]
+    assert seen[3] == 1
+    assert {event['tid'] for event in tracer.events} == {1, 2, 3}
+
+def test_null_tracer_records_nothing(tmp_path):
+    """Test that the disabled tracer adds no session hooks and writes nothing."""
+    with NULL_TRACER.worker(), NULL_TRACER.span('parse'):
+        NULL_TRACER.complete('parse', NULL_TRACER.clock())
+    assert NULL_TRACER.trace_configs() == []
+    NULL_TRACER.export(str(tmp_path / "trace.json"))
+    assert not (tmp_path / "trace.json").exists()
+
+@pytest.mark.asyncio
+async def test_crawl_trace(tmp_path):
+    """Test that a traced crawl records per-worker spans in Chrome trace format."""
+    tracer = Tracer()
+    path = tmp_path / "trace.json"
+    async with serve_wiki(SyntheticWiki(30, broken_every=0, large_every=0)) as base_url:
+        async with WikiScraper(base_url, max_concurrent=4, tracer=tracer) as scraper:
+            await scraper.scrape_all_pages()
+    tracer.export(str(path))
+
+    trace = json.loads(path.read_text())
+    events = trace['traceEvents']
+    names = {event['name'] for event in events}
+    assert {'queue wait', 'request', 'connect', 'download', 'parse', 'page pipeline'} <= names
+    assert {event['args']['name'] for event in events if event['ph'] == 'M'} >= {'crawler', 'worker 1'}
+
+    rows = worker_rows(events)
+    assert max(rows) <= 4
+    for tid, spans in rows.items():
+        if tid == 0:
+            continue
+        # Spans on one worker row either nest or follow each other
+        spans.sort(key=lambda event: (event['ts'], -event['dur']))
+        open_ends = []
+        for span in spans:
+            while open_ends and open_ends[-1] <= span['ts']:
+                open_ends.pop()
+            assert not open_ends or span['ts'] + span['dur'] <= open_ends[-1] + 1
+            open_ends.append(span['ts'] + span['dur'])
+
+@pytest.mark.asyncio
+async def test_cli_trace_option(tmp_path, monkeypatch):
+    """Test that --trace writes a trace including the output write."""
+    monkeypatch.chdir(tmp_path)
+    async with serve_wiki(SyntheticWiki(10, broken_every=0, large_every=0)) as base_url:
+        await run_scraper(Namespace(url=base_url, format='json', trace="trace.json", rate=1000.0))
+
+    events = json.loads((tmp_path / "trace.json").read_text())['traceEvents']
+    assert any(event['name'] == 'write' and event['args']['pages'] == 10 for event in events)
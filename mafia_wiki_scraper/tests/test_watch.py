@@ -0,0 +1,115 @@
+"""Tests for watch mode."""
+import json
+import time
+
+import pytest
+from aioresponses import aioresponses
+from yarl import URL
+
+from ..scraper import WikiScraper
+from ..watch import Watcher, parse_duration
+
+BASE_URL = "https://example.com"
+MAIN = '<html><head><title>Main</title></head><body><a href="/page1">Link 1</a></body></html>'
+PAGE1 = '<html><head><title>Page 1</title></head><body>Version {}</body></html>'
+
+def test_parse_duration():
+    """Test parsing of interval strings."""
+    assert parse_duration("90") == 90
+    assert parse_duration("30s") == 30
+    assert parse_duration("15m") == 900
+    assert parse_duration("2h") == 7200
+    with pytest.raises(ValueError):
+        parse_duration("soon")
+
+@pytest.mark.asyncio
+async def test_watch_cycles_update_snapshot_in_place(tmp_path):
+    """Test revalidation, change detection, adaptive intervals and removals."""
+    output_file = str(tmp_path / "wiki.json")
+    status_file = str(tmp_path / "status.json")
+
+    async with WikiScraper(BASE_URL) as scraper:
+        watcher = Watcher(scraper, output_file, interval=60, status_file=status_file)
+        with aioresponses() as m:
+            m.get(BASE_URL, status=200, content_type='text/html', body=MAIN, headers={"ETag": '"main-1"'}, repeat=True)
+            m.get(f"{BASE_URL}/page1", status=200, content_type='text/html', body=PAGE1.format(1), repeat=True)
+            counts = await watcher.run_cycle()
+        assert counts['new'] == 2
+        with open(output_file, 'r', encoding='utf-8') as f:
+            assert {page['title'] for page in json.load(f)} == {"Main", "Page 1"}
+        assert watcher.pages[BASE_URL].validators() == {'If-None-Match': '"main-1"'}
+
+        for state in watcher.pages.values():
+            state.next_check = 0
+        with aioresponses() as m:
+            m.get(BASE_URL, status=304)
+            m.get(f"{BASE_URL}/page1", status=200, content_type='text/html', body=PAGE1.format(2))
+            counts = await watcher.run_cycle()
+        assert (counts['changed'], counts['unchanged']) == (1, 1)
+        assert watcher.pages[BASE_URL].interval == 120
+        assert watcher.pages[f"{BASE_URL}/page1"].interval == 30
+        with open(output_file, 'r', encoding='utf-8') as f:
+            assert "Version 2" in next(p for p in json.load(f) if p['title'] == "Page 1")['content']
+
+        watcher.pages[f"{BASE_URL}/page1"].next_check = 0
+        with aioresponses() as m:
+            m.get(f"{BASE_URL}/page1", status=404)
+            counts = await watcher.run_cycle()
+        assert counts['gone'] == 1
+        with open(output_file, 'r', encoding='utf-8') as f:
+            assert [page['title'] for page in json.load(f)] == ["Main"]
+
+        watcher.write_status('idle')
+    with open(status_file, 'r', encoding='utf-8') as f:
+        status = json.load(f)
+    assert status['cycle'] == 3
+    assert status['pages'] == 1
+
+@pytest.mark.asyncio
+async def test_watch_run_stops_after_cycles(tmp_path):
+    """Test that run() honours the cycle limit and reports a stopped state."""
+    status_file = str(tmp_path / "status.json")
+    async with WikiScraper(BASE_URL) as scraper:
+        watcher = Watcher(scraper, str(tmp_path / "wiki.json"), interval=60, status_file=status_file)
+        with aioresponses() as m:
+            m.get(BASE_URL, status=200, content_type='text/html', body=PAGE1.format(1), repeat=True)
+            await watcher.run(cycles=1)
+
+    with open(status_file, 'r', encoding='utf-8') as f:
+        assert json.load(f)['state'] == 'stopped'
+
+@pytest.mark.asyncio
+async def test_watch_fetches_each_page_once_per_cycle(tmp_path):
+    """Test that the first cycle fetches every page once and later cycles only request what is due."""
+    main_v2 = MAIN.replace('</body>', '<a href="/page2">Link 2</a></body>')
+    async with WikiScraper(BASE_URL) as scraper:
+        watcher = Watcher(scraper, str(tmp_path / "wiki.json"), interval=60)
+        with aioresponses() as m:
+            m.get(BASE_URL, status=200, content_type='text/html', body=MAIN, headers={"ETag": '"main-1"'}, repeat=True)
+            m.get(f"{BASE_URL}/page1", status=200, content_type='text/html', body=PAGE1.format(1),
+                  headers={"Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT"}, repeat=True)
+            started = time.time()
+            counts = await watcher.run_cycle()
+            assert (counts['new'], counts['checked']) == (2, 2)
+            assert {url: len(calls) for (_, url), calls in m.requests.items()} == {
+                URL(BASE_URL): 1, URL(f"{BASE_URL}/page1"): 1,
+            }
+            # Validators come from the fetch that found the page, and its first re-check waits an interval
+            assert watcher.pages[f"{BASE_URL}/page1"].validators() == {
+                'If-Modified-Since': "Mon, 01 Jan 2024 00:00:00 GMT",
+            }
+            assert all(state.next_check >= started + 60 for state in watcher.pages.values())
+
+            counts = await watcher.run_cycle()
+            assert counts['checked'] == 0
+            assert sum(len(calls) for calls in m.requests.values()) == 2
+
+        # A page newly linked from a changed one is fetched in the same cycle, known pages are not
+        watcher.pages[BASE_URL].next_check = 0
+        with aioresponses() as m:
+            m.get(BASE_URL, status=200, content_type='text/html', body=main_v2)
+            m.get(f"{BASE_URL}/page2", status=200, content_type='text/html', body=PAGE1.format(2))
+            counts = await watcher.run_cycle()
+            assert (counts['changed'], counts['new'], counts['checked']) == (1, 1, 2)
+            assert m.requests[('GET', URL(BASE_URL))][0].kwargs['headers'] == {'If-None-Match': '"main-1"'}
+            assert ('GET', URL(f"{BASE_URL}/page1")) not in m.requests
@@ -0,0 +1,156 @@
+"""Timeline tracing of crawl activity in Chrome Trace Event format.
+
+Load the exported JSON in ``chrome://tracing`` or https://ui.perfetto.dev.
+Each worker slot of a scraper's semaphore is a thread row, so the timeline
+shows what every worker was doing: waiting on the host scheduler, resolving,
+connecting, waiting for the first byte, downloading or parsing. The page
+pipeline and its parsing on the event loop appear on the ``crawler`` row.
+"""
+import heapq
+import json
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional
+
+import aiohttp
+
+# Worker slot of the running task; 0 is the crawler's own control flow
+_worker: ContextVar[int] = ContextVar('trace_worker', default=0)
+
+class Tracer:
+    """Collect span events and export them as Chrome Trace Event JSON."""
+
+    enabled = True
+
+    def __init__(self, pid: int = 1):
+        """Start the trace clock."""
+        self.pid = pid
+        self.origin = time.perf_counter_ns()
+        self.events: List[Dict] = []
+        self.free_workers: List[int] = []
+        self.workers = 0
+        self.async_ids = 0
+
+    def clock(self) -> float:
+        """Return microseconds since the tracer was created."""
+        return (time.perf_counter_ns() - self.origin) / 1000
+
+    def complete(self, name: str, start: float, url: Optional[str] = None, **args) -> None:
+        """Record a span from ``start`` until now on the current worker's row."""
+        if url is not None:
+            args['url'] = url
+        self.events.append({
+            'name': name, 'cat': 'crawl', 'ph': 'X', 'ts': start, 'dur': self.clock() - start,
+            'pid': self.pid, 'tid': _worker.get(), 'args': args,
+        })
+
+    def queued(self, start: float, url: Optional[str] = None) -> None:
+        """Record a wait for a worker slot as an async span, since it belongs to no worker yet."""
+        self.async_ids += 1
+        common = {'name': 'queue wait', 'cat': 'queue', 'id': self.async_ids, 'pid': self.pid, 'tid': 0}
+        self.events.append({**common, 'ph': 'b', 'ts': start, 'args': {'url': url} if url else {}})
+        self.events.append({**common, 'ph': 'e', 'ts': self.clock()})
+
+    @contextmanager
+    def span(self, name: str, url: Optional[str] = None, **args) -> Iterator[None]:
+        """Record the enclosed block as a span."""
+        start = self.clock()
+        try:
+            yield
+        finally:
+            self.complete(name, start, url, **args)
+
+    @contextmanager
+    def worker(self) -> Iterator[int]:
+        """Assign the lowest free worker row to the current task for the enclosed block."""
+        if self.free_workers:
+            worker = heapq.heappop(self.free_workers)
+        else:
+            self.workers += 1
+            worker = self.workers
+        token = _worker.set(worker)
+        try:
+            yield worker
+        finally:
+            _worker.reset(token)
+            heapq.heappush(self.free_workers, worker)
+
+    def trace_configs(self) -> List[aiohttp.TraceConfig]:
+        """Return aiohttp trace hooks that record connection and request timings."""
+        config = aiohttp.TraceConfig()
+
+        def start(attribute):
+            """Return a hook storing the start time on the request's trace context."""
+            async def hook(session, context, params):
+                setattr(context, attribute, self.clock())
+            return hook
+
+        def end(name, attribute):
+            """Return a hook recording a span from the stored start time."""
+            async def hook(session, context, params):
+                url = getattr(params, 'url', None)
+                args = {}
+                if getattr(params, 'response', None) is not None:
+                    args['status'] = params.response.status
+                if getattr(params, 'exception', None) is not None:
+                    args['error'] = repr(params.exception)
+                if getattr(params, 'host', None) is not None:
+                    args['host'] = params.host
+                self.complete(name, getattr(context, attribute, self.clock()),
+                              str(url) if url is not None else None, **args)
+            return hook
+
+        config.on_request_start.append(start('request_start'))
+        config.on_request_end.append(end('request', 'request_start'))
+        config.on_request_exception.append(end('request', 'request_start'))
+        config.on_connection_queued_start.append(start('queued_start'))
+        config.on_connection_queued_end.append(end('connection pool wait', 'queued_start'))
+        config.on_connection_create_start.append(start('connect_start'))
+        config.on_connection_create_end.append(end('connect', 'connect_start'))
+        config.on_dns_resolvehost_start.append(start('dns_start'))
+        config.on_dns_resolvehost_end.append(end('dns', 'dns_start'))
+        return [config]
+
+    def export(self, path: str) -> None:
+        """Write the trace file, naming the crawler and worker rows."""
+        names = [{'name': 'thread_name', 'ph': 'M', 'pid': self.pid, 'tid': 0, 'args': {'name': 'crawler'}}]
+        names += [
+            {'name': 'thread_name', 'ph': 'M', 'pid': self.pid, 'tid': worker, 'args': {'name': f'worker {worker}'}}
+            for worker in range(1, self.workers + 1)
+        ]
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': names + self.events, 'displayTimeUnit': 'ms'}, f)
+
+class NullTracer:
+    """A tracer that records nothing, used when tracing is off."""
+
+    enabled = False
+
+    def clock(self) -> float:
+        """Return zero; disabled tracers never read the clock."""
+        return 0.0
+
+    def complete(self, name: str, start: float, url: Optional[str] = None, **args) -> None:
+        """Do nothing."""
+
+    def queued(self, start: float, url: Optional[str] = None) -> None:
+        """Do nothing."""
+
+    def span(self, name: str, url: Optional[str] = None, **args):
+        """Return a context manager that does nothing."""
+        return _NULL_CONTEXT
+
+    def worker(self):
+        """Return a context manager that does nothing."""
+        return _NULL_CONTEXT
+
+    def trace_configs(self) -> List[aiohttp.TraceConfig]:
+        """Return no trace hooks, so sessions carry no tracing overhead."""
+        return []
+
+    def export(self, path: str) -> None:
+        """Do nothing."""
+
+_NULL_CONTEXT = nullcontext()
+NULL_TRACER = NullTracer()
@@ -0,0 +1,224 @@
+"""WARC archiving of HTTP exchanges and offline replay from an archive."""
+import base64
+import gzip
+import hashlib
+import uuid
+from datetime import datetime, timezone
+from typing import AsyncIterator, Dict, IO, Iterator, Mapping, Optional, Tuple
+from urllib.parse import urlparse
+
+from multidict import CIMultiDict
+
+from . import __version__
+
+# Bodies are archived decoded, so these headers no longer describe them
+_DROPPED_HEADERS = {'content-encoding', 'transfer-encoding', 'content-length'}
+# Credentials are never archived; WARC files get shared
+_SECRET_HEADERS = {'authorization', 'cookie', 'proxy-authorization'}
+
+def _record_id() -> str:
+    """Return a new WARC record ID."""
+    return f"<urn:uuid:{uuid.uuid4()}>"
+
+def _warc_date() -> str:
+    """Return the current time in WARC date format."""
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+def _header_lines(headers: Mapping[str, str]) -> bytes:
+    """Serialise headers as CRLF separated ``Name: value`` lines."""
+    return b"".join(f"{name}: {value}\r\n".encode('utf-8') for name, value in headers.items())
+
+class WarcWriter:
+    """Append request/response records to a gzip-per-record ``.warc.gz`` file."""
+
+    def __init__(self, path: str):
+        """Open the archive and write its warcinfo record."""
+        self.path = path
+        self._file: Optional[IO[bytes]] = open(path, 'ab')
+        info = f"software: mafia-wiki-scraper/{__version__}\r\nformat: WARC File Format 1.1\r\n"
+        self._write_record('warcinfo', None, 'application/warc-fields', info.encode('utf-8'))
+
+    def __enter__(self):
+        """Context manager entry."""
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit."""
+        self.close()
+
+    def close(self) -> None:
+        """Close the archive file."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _write_record(self, warc_type: str, url: Optional[str], content_type: str, block: bytes,
+                      extra: Optional[Dict[str, str]] = None) -> str:
+        """Write one gzip member containing a single WARC record."""
+        record_id = _record_id()
+        headers = {
+            'WARC-Type': warc_type,
+            'WARC-Record-ID': record_id,
+            'WARC-Date': _warc_date(),
+        }
+        if url:
+            headers['WARC-Target-URI'] = url
+        headers.update(extra or {})
+        headers['Content-Type'] = content_type
+        headers['Content-Length'] = str(len(block))
+        record = b"WARC/1.1\r\n" + _header_lines(headers) + b"\r\n" + block + b"\r\n\r\n"
+        self._file.write(gzip.compress(record))
+        return record_id
+
+    def write_exchange(self, url: str, status: int, reason: str, response_headers: Mapping[str, str],
+                       body: bytes, request_headers: Optional[Mapping[str, str]] = None,
+                       method: str = 'GET') -> None:
+        """Archive a request and its (decoded) response, leaving out any credentials sent."""
+        headers = {name: value for name, value in response_headers.items()
+                   if name.lower() not in _DROPPED_HEADERS}
+        headers['Content-Length'] = str(len(body))
+        block = f"HTTP/1.1 {status} {reason or ''}\r\n".encode('utf-8') + _header_lines(headers) + b"\r\n" + body
+        digest = base64.b32encode(hashlib.sha1(body).digest()).decode('ascii')
+        response_id = self._write_record(
+            'response', url, 'application/http;msgtype=response', block,
+            {'WARC-Payload-Digest': f"sha1:{digest}"},
+        )
+
+        parsed = urlparse(url)
+        target = parsed.path or '/'
+        if parsed.query:
+            target += f"?{parsed.query}"
+        request = {'Host': parsed.netloc}
+        request.update((name, value) for name, value in (request_headers or {}).items()
+                       if name.lower() not in _SECRET_HEADERS)
+        block = f"{method} {target} HTTP/1.1\r\n".encode('utf-8') + _header_lines(request) + b"\r\n"
+        self._write_record(
+            'request', url, 'application/http;msgtype=request', block,
+            {'WARC-Concurrent-To': response_id},
+        )
+        self._file.flush()
+
+def iter_records(path: str) -> Iterator[Tuple[Dict[str, str], bytes]]:
+    """Yield ``(warc_headers, block)`` for every record in a WARC file.
+
+    An archive cut off mid-record, e.g. by a crash during the crawl, ends at
+    its last complete record.
+    """
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rb') as f:
+        try:
+            while True:
+                line = f.readline()
+                if not line:
+                    return
+                if not line.strip():
+                    continue
+                headers = {}
+                for raw in iter(f.readline, b""):
+                    if raw == b"\r\n":
+                        break
+                    name, _, value = raw.decode('utf-8').partition(':')
+                    headers[name.strip()] = value.strip()
+                else:
+                    return
+                length = int(headers.get('Content-Length', -1))
+                block = f.read(length) if length >= 0 else b""
+                if len(block) != length:
+                    return
+                yield headers, block
+        except EOFError:
+            # gzip raises this for a member that was only partly written
+            return
+
+def parse_http_response(block: bytes) -> Tuple[int, str, CIMultiDict, bytes]:
+    """Split an archived HTTP response into status, reason, headers and body."""
+    head, _, body = block.partition(b"\r\n\r\n")
+    status_line, *header_lines = head.decode('utf-8', errors='replace').split("\r\n")
+    _, status, *reason = status_line.split(' ', 2)
+    headers = CIMultiDict()
+    for line in header_lines:
+        name, _, value = line.partition(':')
+        headers.add(name.strip(), value.strip())
+    return int(status), (reason[0] if reason else ''), headers, body
+
+class ReplayContent:
+    """Minimal stand-in for ``aiohttp.StreamReader`` over an archived body."""
+
+    def __init__(self, body: bytes):
+        """Store the body to hand out."""
+        self._body = body
+
+    async def iter_chunked(self, size: int) -> AsyncIterator[bytes]:
+        """Yield the body in chunks of at most ``size`` bytes."""
+        for start in range(0, len(self._body), size):
+            yield self._body[start:start + size]
+
+class ReplayResponse:
+    """Minimal stand-in for ``aiohttp.ClientResponse`` backed by archived bytes."""
+
+    def __init__(self, url: str, status: int, reason: str, headers: CIMultiDict, body: bytes):
+        """Store the archived response."""
+        self.url = url
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.content = ReplayContent(body)
+        self._body = body
+
+    async def read(self) -> bytes:
+        """Return the archived body."""
+        return self._body
+
+    async def text(self, encoding: Optional[str] = None, errors: str = 'strict') -> str:
+        """Decode the archived body using the declared charset."""
+        content_type = self.headers.get('Content-Type', '')
+        if encoding is None and 'charset=' in content_type:
+            encoding = content_type.split('charset=')[-1].split(';')[0].strip()
+        return self._body.decode(encoding or 'utf-8', errors='replace' if errors == 'strict' else errors)
+
+    def release(self) -> None:
+        """Nothing to release for archived responses."""
+
+class _ReplayRequest:
+    """Async context manager returned by ``ReplaySession.get``."""
+
+    def __init__(self, response: ReplayResponse):
+        """Wrap the response to hand out."""
+        self.response = response
+
+    async def __aenter__(self) -> ReplayResponse:
+        """Return the archived response."""
+        return self.response
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """Nothing to clean up."""
+
+class ReplaySession:
+    """Serve ``get`` requests from a WARC archive instead of the network.
+
+    Pass it as the ``session`` of a :class:`WikiScraper` to re-run extraction
+    over an archived crawl fully offline. URLs missing from the archive are
+    answered with a 404.
+    """
+
+    def __init__(self, path: str):
+        """Load every archived response from ``path``."""
+        self.path = path
+        self.closed = False
+        self.responses: Dict[str, Tuple[int, str, CIMultiDict, bytes]] = {}
+        for headers, block in iter_records(path):
+            if headers.get('WARC-Type') == 'response':
+                self.responses[headers['WARC-Target-URI']] = parse_http_response(block)
+
+    def get(self, url: str, **kwargs) -> _ReplayRequest:
+        """Return the archived response for ``url``."""
+        url = str(url)
+        if url in self.responses:
+            status, reason, headers, body = self.responses[url]
+        else:
+            status, reason, headers, body = 404, 'Not Found', CIMultiDict(), b''
+        return _ReplayRequest(ReplayResponse(url, status, reason, headers, body))
+
+    async def close(self) -> None:
+        """Mark the session closed."""
+        self.closed = True
@@ -0,0 +1,188 @@
+"""Long-running watch mode that keeps a scraped snapshot up to date."""
+import asyncio
+import json
+import os
+import re
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Set
+
+from .extract import content_hash
+from .records import PageRecord
+from .scraper import WikiScraper
+
+# Status codes meaning a page is gone and should leave the snapshot
+GONE_STATUSES = (404, 410)
+
+def parse_duration(value: str) -> float:
+    """Parse a duration such as ``90``, ``30s``, ``15m`` or ``2h`` into seconds."""
+    match = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*([smhd]?)\s*', value.lower())
+    if not match:
+        raise ValueError(f"Invalid duration: {value}")
+    number, unit = match.groups()
+    return float(number) * {'': 1, 's': 1, 'm': 60, 'h': 3600, 'd': 86400}[unit]
+
+def write_json_atomic(path: str, data) -> None:
+    """Write JSON to ``path`` via a temporary file so readers never see a partial file."""
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=4)
+    os.replace(tmp_path, path)
+
+class PageState:
+    """Validators and refresh schedule for one watched page."""
+
+    __slots__ = ('page', 'etag', 'last_modified', 'content_hash', 'interval', 'next_check', 'changes')
+
+    def __init__(self, interval: float):
+        """Create state for a page that has not been fetched yet."""
+        self.page: Optional[PageRecord] = None
+        self.etag: Optional[str] = None
+        self.last_modified: Optional[str] = None
+        self.content_hash: Optional[str] = None
+        self.interval = interval
+        self.next_check = 0.0
+        self.changes = 0
+
+    def validators(self) -> Dict[str, str]:
+        """Return conditional request headers for the last seen version."""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+class Watcher:
+    """Periodically re-check a site and update its JSON snapshot in place.
+
+    The scraper's session stays open between cycles, so connections and TLS
+    sessions are reused. Pages are re-checked with conditional requests; each
+    page's interval halves when it changes and doubles when it does not,
+    bounded by ``min_interval`` and ``max_interval``. Links found on new or
+    changed pages are fetched in the same cycle, so the first cycle crawls
+    the site and later ones only request pages that are due or newly linked.
+    """
+
+    def __init__(self, scraper: WikiScraper, output_file: str, interval: float,
+                 status_file: Optional[str] = None, min_interval: Optional[float] = None,
+                 max_interval: Optional[float] = None):
+        """Configure the watcher for an already constructed scraper."""
+        self.scraper = scraper
+        self.output_file = output_file
+        self.interval = interval
+        self.min_interval = min_interval or interval / 4
+        self.max_interval = max_interval or interval * 8
+        self.status_file = status_file
+        self.pages: Dict[str, PageState] = {}
+        self.cycle = 0
+        self.last_cycle: Dict = {}
+
+    def track(self, urls: Set[str]) -> None:
+        """Start watching any URLs not yet tracked; they are checked immediately."""
+        for url in urls:
+            if url not in self.pages:
+                self.pages[url] = PageState(self.interval)
+
+    def snapshot(self) -> List[Dict[str, str]]:
+        """Return the current pages in JSON output form."""
+        return [state.page.to_dict() for state in self.pages.values() if state.page]
+
+    async def check(self, url: str) -> str:
+        """Revalidate one page and return ``new``, ``changed``, ``unchanged``, ``gone`` or ``error``."""
+        state = self.pages[url]
+        async with self.scraper.slot(url):
+            try:
+                status, headers, html = await self.scraper.fetch(url, headers=state.validators())
+            except Exception as e:
+                self.scraper.log(f"Error when checking {url}: {str(e)}")
+                state.next_check = time.time() + self.min_interval
+                return 'error'
+
+        if status in GONE_STATUSES:
+            del self.pages[url]
+            return 'gone'
+        if status == 304 or html is None:
+            outcome = 'unchanged' if status == 304 else 'error'
+        else:
+            state.etag = headers.get('ETag')
+            state.last_modified = headers.get('Last-Modified')
+            html_hash = content_hash(html.content)
+            if html_hash == state.content_hash:
+                outcome = 'unchanged'
+            else:
+                first_fetch = state.content_hash is None
+                extraction = self.scraper.extract(html)
+                state.page = self.scraper.page(url, extraction, html, status)
+                state.content_hash = html_hash
+                state.changes += 1
+                self.track(self.scraper.internal_links(extraction, url))
+                # A page's first fetch says nothing about how often it changes
+                outcome = 'new' if first_fetch else 'changed'
+
+        if outcome == 'changed':
+            state.interval = max(self.min_interval, state.interval / 2)
+        elif outcome == 'unchanged':
+            state.interval = min(self.max_interval, state.interval * 2)
+        state.next_check = time.time() + state.interval
+        return outcome
+
+    async def run_cycle(self) -> Dict[str, int]:
+        """Check every due page once and persist the snapshot if anything changed."""
+        self.cycle += 1
+        if not self.pages:
+            self.track({self.scraper.base_url})
+        now = time.time()
+        checked: Set[str] = set()
+        outcomes: List[str] = []
+        # Pages linked from new or changed ones are tracked as due, so keep going until none are left
+        while True:
+            due = [url for url, state in self.pages.items() if state.next_check <= now and url not in checked]
+            if not due:
+                break
+            checked.update(due)
+            outcomes.extend(await asyncio.gather(*(self.check(url) for url in due)))
+        counts = {name: outcomes.count(name) for name in ('new', 'changed', 'unchanged', 'gone', 'error')}
+        counts['checked'] = len(checked)
+        if counts['new'] or counts['changed'] or counts['gone']:
+            write_json_atomic(self.output_file, self.snapshot())
+        self.last_cycle = counts
+        self.scraper.log(
+            f"Cycle {self.cycle}: checked {len(checked)}, new {counts['new']}, changed {counts['changed']}, "
+            f"gone {counts['gone']}, errors {counts['error']}"
+        )
+        return counts
+
+    def next_due(self) -> float:
+        """Return the time at which the next page is due for a check."""
+        return min((state.next_check for state in self.pages.values()), default=time.time() + self.interval)
+
+    def write_status(self, state: str) -> None:
+        """Write a small JSON status file for monitoring."""
+        if not self.status_file:
+            return
+        write_json_atomic(self.status_file, {
+            'state': state,
+            'url': self.scraper.base_url,
+            'output': self.output_file,
+            'cycle': self.cycle,
+            'pages': len(self.pages),
+            'last_cycle': self.last_cycle,
+            'next_check': datetime.fromtimestamp(self.next_due(), timezone.utc).isoformat(),
+            'updated': datetime.now(timezone.utc).isoformat(),
+        })
+
+    async def run(self, cycles: Optional[int] = None) -> None:
+        """Watch until cancelled, or for ``cycles`` cycles if given."""
+        try:
+            while cycles is None or self.cycle < cycles:
+                self.write_status('checking')
+                await self.run_cycle()
+                self.write_status('idle')
+                if cycles is not None and self.cycle >= cycles:
+                    break
+                await asyncio.sleep(max(0.0, self.next_due() - time.time()))
+        finally:
+            self.write_status('stopped')
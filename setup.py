@@ -4,6 +4,9 @@ setup(
     name="mafia_wiki_scraper",
     version="0.1.0-alpha",
     app=['mafia_wiki_scraper/gui.py'],
+    entry_points={
+        'console_scripts': ['mafia-wiki-scraper=mafia_wiki_scraper.cli:cli_main'],
+    },
     data_files=[
         ('', ['mafia_wiki_scraper/resources/logo.png', 'mafia_wiki_scraper/resources/success.wav'])
     ],